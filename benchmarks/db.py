@@ -0,0 +1,164 @@
+"""DB 연결 벤치마크
+
+요청 시작/종료 signal 사이에서 쿼리 하나를 실행하는 요청을 지정한 동시성으로 반복해
+연결 방식별 요청당 연결 + 쿼리 시간(p50/p90/p99)과 처리량을 측정합니다.
+
+- per_request : 요청마다 새로 연결합니다. (CONN_MAX_AGE=0, 기존 설정)
+- persistent  : 스레드별 연결을 유지하고 요청마다 처음 사용할 때 상태를 확인합니다. (CONN_MAX_AGE, CONN_HEALTH_CHECKS)
+- pool        : 워커 프로세스의 연결 풀에서 요청마다 연결을 빌리고 반환합니다. (DB_POOL_SIZE)
+
+설정된 DB(my_settings.DATABASES)에 접속하며, 드라이버를 비교하려면 DB_DRIVER=pymysql로 한 번 더 실행합니다.
+
+    python -m benchmarks.db --concurrency 8 --requests 500 --output bench/db_mysqlclient.json
+    DB_DRIVER=pymysql python -m benchmarks.db --output bench/db_pymysql.json --compare bench/db_mysqlclient.json
+"""
+import argparse, datetime, json, os, threading, time
+
+from pathlib import Path
+
+from benchmarks.load import format_delta, percentile
+
+SCENARIOS = {
+    'per_request' : {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'POOL': None},
+    'persistent'  : {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True, 'POOL': None},
+    'pool'        : {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True, 'POOL': {'MAX_SIZE': 4, 'TIMEOUT': 5}},
+}
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myview.settings')
+
+    import django
+    django.setup()
+
+def run_scenario(name, options):
+    """연결 방식 하나로 요청을 반복합니다."""
+    from django.core.signals import request_finished, request_started
+    from django.db           import connections
+
+    from core.db import pool
+
+    settings_dict = connections.settings[options.database]
+    overrides     = dict(SCENARIOS[name])
+
+    if overrides['POOL']:
+        overrides['POOL'] = {**overrides['POOL'], 'MAX_SIZE': options.pool_size}
+
+    settings_dict.update(overrides)
+    pool.pools.pop(options.database, None)
+
+    latencies = []
+    lock      = threading.Lock()
+
+    def worker(count):
+        connection = connections[options.database]
+
+        try:
+            for _ in range(count):
+                start = time.perf_counter()
+
+                request_started.send(sender=None)
+
+                with connection.cursor() as cursor:
+                    cursor.execute(options.query)
+                    cursor.fetchall()
+
+                request_finished.send(sender=None)
+
+                elapsed = time.perf_counter() - start
+
+                with lock:
+                    latencies.append(elapsed)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(options.requests,)) for _ in range(options.concurrency)]
+    started = time.perf_counter()
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    duration = time.perf_counter() - started
+
+    if options.database in pool.pools:
+        pool.pools.pop(options.database).close()
+
+    latencies.sort()
+
+    return {
+        'requests'   : len(latencies),
+        'throughput' : len(latencies) / duration,
+        'mean_ms'    : sum(latencies) / len(latencies) * 1000,
+        'p50_ms'     : percentile(latencies, 50) * 1000,
+        'p90_ms'     : percentile(latencies, 90) * 1000,
+        'p99_ms'     : percentile(latencies, 99) * 1000,
+    }
+
+def render_markdown(report, baseline=None):
+    baseline_results = baseline['results'] if baseline else {}
+    lines            = [
+        f"# DB benchmark {report['meta']['started_at']}",
+        '',
+        f"driver={report['meta']['driver']} engine={report['meta']['engine']} "
+        f"concurrency={report['meta']['concurrency']} requests={report['meta']['requests']} pool_size={report['meta']['pool_size']}",
+        '',
+        '| scenario | requests | rps | mean (ms) | p50 (ms) | p90 (ms) | p99 (ms) |',
+        '|---|---|---|---|---|---|---|',
+    ]
+
+    for name, result in report['results'].items():
+        before = baseline_results.get(name, {})
+        cells  = [name, str(result['requests'])]
+
+        for key in ['throughput', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms']:
+            cells.append(f'{result[key]:.2f}{format_delta(result[key], before.get(key))}')
+
+        lines.append('| ' + ' | '.join(cells) + ' |')
+
+    return '\n'.join(lines) + '\n'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=8, help='동시에 요청하는 스레드 수')
+    parser.add_argument('--requests', type=int, default=200, help='스레드별 요청 수')
+    parser.add_argument('--pool-size', type=int, default=4, help='pool 시나리오의 연결 풀 크기')
+    parser.add_argument('--query', default='SELECT 1', help='요청마다 실행할 쿼리')
+    parser.add_argument('--database', default='default', help='DB alias')
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help='실행할 시나리오 (여러 번 지정 가능, 기본값: 전체)')
+    parser.add_argument('--output', default='bench_db_output.json', help='결과 JSON 경로 (markdown은 .md로 함께 저장)')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON 경로')
+    options = parser.parse_args(argv)
+
+    setup_django()
+
+    from django.conf import settings
+
+    report = {
+        'meta'    : {
+            'started_at'  : datetime.datetime.now().isoformat(timespec='seconds'),
+            'driver'      : settings.DB_DRIVER,
+            'engine'      : settings.DATABASES[options.database]['ENGINE'],
+            'concurrency' : options.concurrency,
+            'requests'    : options.requests,
+            'pool_size'   : options.pool_size,
+        },
+        'results' : {},
+    }
+
+    for name in options.scenario or SCENARIOS:
+        report['results'][name] = run_scenario(name, options)
+
+        print(name, report['results'][name], flush=True)
+
+    baseline = json.loads(Path(options.compare).read_text()) if options.compare else None
+    output   = Path(options.output)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    output.with_suffix('.md').write_text(render_markdown(report, baseline))
+
+    print(render_markdown(report, baseline))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""엔드포인트 부하 벤치마크
+
+로컬 TMDB 대체 서버(benchmarks.stub_tmdb)를 띄우고 그 주소로 앱을 실행한 뒤,
+movie, review, user 경로를 지정한 동시성으로 호출해 처리량과 p50/p90/p99 응답 시간을 측정합니다.
+결과는 JSON과 markdown으로 저장하며, 이전 결과를 넘기면 변화량을 함께 기록합니다.
+
+    python -m benchmarks.load --concurrency 16 --duration 20 --output bench/after.json --compare bench/before.json
+
+--asgi를 지정하면 WSGI(gunicorn gthread) 대신 ASGI(gunicorn + uvicorn worker)로 앱을 실행합니다.
+워커 하나가 감당하는 동시 요청 수를 비교하려면 워커 수를 1로 고정하고 동시성을 높여 두 번 실행합니다.
+
+    python -m benchmarks.load --workers 1 --concurrency 64 --output bench/wsgi.json
+    python -m benchmarks.load --workers 1 --concurrency 64 --asgi --output bench/asgi.json --compare bench/wsgi.json
+
+네트워크 없이 실행되며, 벤치마크 사용자와 리뷰 등 필요한 데이터는 설정된 DB에 생성합니다.
+"""
+import argparse, datetime, json, os, random, socket, subprocess, sys, threading, time
+
+from pathlib import Path
+
+import requests
+
+from benchmarks import stub_tmdb
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+MOVIE_IDS = list(range(550, 570))
+ACTOR_IDS = list(range(819, 829))
+
+SCENARIOS = [
+    {'name': 'movie/detail',                  'path': '/movie/detail?movie_id={movie_id}'},
+    {'name': 'movie/<int:movie_id>/reviews',  'path': '/movie/{movie_id}/reviews'},
+    {'name': 'movie/popular',                 'path': '/movie/popular'},
+    {'name': 'movie/latest',                  'path': '/movie/latest'},
+    {'name': 'movie',                         'path': '/movie?q=movie'},
+    {'name': 'movie/actor',                   'path': '/movie/actor?q=actor'},
+    {'name': 'movie/actor/detail',            'path': '/movie/actor/detail?actor_id={actor_id}'},
+    {'name': 'movie/actor/detail (auth)',     'path': '/movie/actor/detail?actor_id={actor_id}', 'auth': True},
+    {'name': 'review/movie/<int:movie_id>',   'path': '/review/movie/550', 'auth': True},
+    {'name': 'review/list',                   'path': '/review/list', 'auth': True},
+    {'name': 'review/top3',                   'path': '/review/top3', 'auth': True},
+    {'name': 'user/info',                     'path': '/user/info', 'auth': True},
+    {'name': 'user/list',                     'path': '/user/list'},
+    {'name': 'user/login/background',         'path': '/user/login/background'},
+]
+
+def setup_django(tmdb_base_url):
+    os.environ['TMDB_BASE_URL'] = tmdb_base_url
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myview.settings')
+
+    import django
+    django.setup()
+
+def seed():
+    """벤치마크 사용자와 리뷰, 장르, 로그인 배경 이미지 풀을 준비하고 토큰을 반환합니다."""
+    import jwt
+
+    from adminpage.models  import Image
+    from movies.models     import Genre
+    from reviews.models    import Review
+    from users.backgrounds import refresh_login_backgrounds
+    from users.models      import Group, ProfileImage, SocialPlatform, User
+    from my_settings       import SECRET_KEY, ALGORITHM
+
+    for genre_id, name in [(18, '드라마'), (53, '스릴러')]:
+        Genre.objects.get_or_create(id=genre_id, defaults={'name': name, 'color_code': '#af4448'})
+
+    user, is_created = User.objects.get_or_create(
+        social_id = 'benchmark',
+        defaults  = {
+            'nickname'        : 'benchmark',
+            'group'           : Group.objects.get_or_create(id=2, defaults={'name': 'user'})[0],
+            'social_platform' : SocialPlatform.objects.get_or_create(name='naver')[0],
+        }
+    )
+
+    if is_created:
+        ProfileImage.objects.create(user=user, image=Image.objects.create(image_url='benchmark.png'))
+
+        for movie_id in MOVIE_IDS[:10]:
+            Review.objects.create(user=user, movie_id=str(movie_id), title='benchmark', content='benchmark', rating=4.5)
+
+    refresh_login_backgrounds(pages=1)
+
+    return jwt.encode({'id': user.id, 'exp': datetime.datetime.utcnow()+datetime.timedelta(hours=6)}, SECRET_KEY, ALGORITHM)
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def get_server_command(options, port):
+    if options.server_cmd:
+        return options.server_cmd.format(port=port).split()
+
+    if options.asgi:
+        return [
+            sys.executable, '-m', 'gunicorn', 'myview.asgi:application',
+            '--config', 'myview/gunicorn_asgi.py',
+            '--bind', f'127.0.0.1:{port}',
+            '--workers', str(options.workers),
+        ]
+
+    return [
+        sys.executable, '-m', 'gunicorn', 'myview.wsgi:application',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(options.workers),
+        '--threads', str(options.threads),
+    ]
+
+def start_app(options, tmdb_base_url):
+    port    = get_free_port()
+    env     = {**os.environ, 'TMDB_BASE_URL': tmdb_base_url, 'TMDB_RATE_LIMIT_RATE': str(options.tmdb_rate_limit)}
+    process = subprocess.Popen(get_server_command(options, port), cwd=BASE_DIR, env=env)
+    target  = f'http://127.0.0.1:{port}'
+
+    for _ in range(100):
+        try:
+            requests.get(target+'/movie/popular', timeout=1)
+            return process, target
+        except requests.ConnectionError:
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError('app server did not start')
+
+def percentile(values, p):
+    if not values:
+        return None
+
+    return values[min(len(values)-1, int(len(values)*p/100))]
+
+def run_scenario(target, scenario, token, options):
+    """시나리오 하나를 지정한 동시성과 시간 동안 호출합니다."""
+    headers   = {'Authorization': token, 'Accept-Encoding': 'gzip, br'} if scenario.get('auth') else {'Accept-Encoding': 'gzip, br'}
+    latencies = []
+    errors    = []
+    lock      = threading.Lock()
+
+    def get_url():
+        return target + scenario['path'].format(movie_id=random.choice(MOVIE_IDS), actor_id=random.choice(ACTOR_IDS))
+
+    def worker(deadline):
+        session = requests.Session()
+
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+
+            try:
+                status = session.get(get_url(), headers=headers, timeout=options.timeout).status_code
+            except requests.RequestException:
+                status = None
+
+            elapsed = time.perf_counter() - start
+
+            with lock:
+                latencies.append(elapsed)
+
+                if status is None or status >= 500:
+                    errors.append(status)
+
+    for _ in range(options.warmup):
+        requests.get(get_url(), headers=headers, timeout=options.timeout)
+
+    deadline = time.monotonic() + options.duration
+    threads  = [threading.Thread(target=worker, args=(deadline,)) for _ in range(options.concurrency)]
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+
+    return {
+        'requests'   : len(latencies),
+        'errors'     : len(errors),
+        'throughput' : len(latencies) / options.duration,
+        'mean_ms'    : sum(latencies) / len(latencies) * 1000 if latencies else None,
+        'p50_ms'     : percentile(latencies, 50) * 1000 if latencies else None,
+        'p90_ms'     : percentile(latencies, 90) * 1000 if latencies else None,
+        'p99_ms'     : percentile(latencies, 99) * 1000 if latencies else None,
+    }
+
+def format_delta(current, baseline):
+    if current is None or not baseline:
+        return ''
+
+    return f' ({(current-baseline)/baseline*100:+.0f}%)'
+
+def render_markdown(report, baseline=None):
+    baseline_results = baseline['results'] if baseline else {}
+    lines            = [
+        f"# Benchmark {report['meta']['started_at']}",
+        '',
+        f"concurrency={report['meta']['concurrency']} duration={report['meta']['duration']}s "
+        f"tmdb_latency={report['meta']['tmdb_latency']}ms error_rate={report['meta']['tmdb_error_rate']} server={report['meta']['server']}",
+        '',
+        '| scenario | requests | errors | rps | p50 (ms) | p90 (ms) | p99 (ms) |',
+        '|---|---|---|---|---|---|---|',
+    ]
+
+    for name, result in report['results'].items():
+        before = baseline_results.get(name, {})
+        cells  = [name, str(result['requests']), str(result['errors'])]
+
+        for key, digits in [('throughput', 1), ('p50_ms', 1), ('p90_ms', 1), ('p99_ms', 1)]:
+            value = result[key]
+            cells.append('-' if value is None else f'{value:.{digits}f}{format_delta(value, before.get(key))}')
+
+        lines.append('| ' + ' | '.join(cells) + ' |')
+
+    return '\n'.join(lines) + '\n'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help='시나리오별 측정 시간(초)')
+    parser.add_argument('--warmup', type=int, default=5, help='시나리오별 사전 요청 수')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--scenario', action='append', help='실행할 시나리오 이름 (여러 번 지정 가능, 기본값: 전체)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn 워커 수')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn 워커당 스레드 수')
+    parser.add_argument('--tmdb-rate-limit', type=int, default=0, help='앱의 초당 TMDB 요청 한도 (기본값 0: 제한 없음)')
+    parser.add_argument('--asgi', action='store_true', help='ASGI 서버(gunicorn + uvicorn worker)로 앱 실행')
+    parser.add_argument('--server-cmd', help='앱 실행 명령 ({port} 치환). 기본값은 gunicorn WSGI 서버입니다.')
+    parser.add_argument('--target', help='이미 실행 중인 앱 주소. 지정하면 앱을 새로 실행하지 않습니다.')
+    parser.add_argument('--output', default='bench_output.json', help='결과 JSON 경로 (markdown은 .md로 함께 저장)')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON 경로')
+    stub_tmdb.add_arguments(parser)
+    options = parser.parse_args(argv)
+
+    stub = stub_tmdb.create_server(options).start()
+
+    setup_django(stub.base_url)
+
+    token   = seed()
+    process = None
+
+    if options.target:
+        target = options.target
+    else:
+        process, target = start_app(options, stub.base_url)
+
+    scenarios = [scenario for scenario in SCENARIOS if not options.scenario or scenario['name'] in options.scenario]
+    report    = {
+        'meta'    : {
+            'started_at'      : datetime.datetime.now().isoformat(timespec='seconds'),
+            'concurrency'     : options.concurrency,
+            'duration'        : options.duration,
+            'tmdb_latency'    : options.latency,
+            'tmdb_error_rate' : options.error_rate,
+            'server'          : options.target or ' '.join(get_server_command(options, '{port}')[2:]),
+        },
+        'results' : {},
+    }
+
+    try:
+        for scenario in scenarios:
+            report['results'][scenario['name']] = run_scenario(target, scenario, token, options)
+
+            print(scenario['name'], report['results'][scenario['name']], flush=True)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+        stub.shutdown()
+
+    baseline = json.loads(Path(options.compare).read_text()) if options.compare else None
+    output   = Path(options.output)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    output.with_suffix('.md').write_text(render_markdown(report, baseline))
+
+    print(render_markdown(report, baseline))
+
+if __name__ == '__main__':
+    main()
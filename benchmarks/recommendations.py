@@ -0,0 +1,61 @@
+"""추천 계산 벤치마크
+
+인기 영화에 리뷰가 몰리는 분포(zipf)의 가상 평점으로 movies.recommendations의 계산 단계별 시간을 측정합니다.
+DB 읽기, 쓰기는 제외하며 nightly 작업의 CPU 시간과 최대 메모리를 확인하는 용도입니다.
+
+    python -m benchmarks.recommendations --reviews 3000000 --users 300000 --movies 30000
+"""
+import argparse, os, resource, time
+
+import numpy as np
+
+def generate(options):
+    rng    = np.random.default_rng(options.seed)
+    users  = rng.integers(1, options.users+1, options.reviews)
+    movies = np.minimum(rng.zipf(1.3, options.reviews), options.movies)
+    values = rng.integers(1, 11, options.reviews).astype(np.float32) / 2
+
+    return users, movies, values
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--reviews', type=int, default=1000000, help='리뷰 수')
+    parser.add_argument('--users', type=int, default=100000, help='사용자 수')
+    parser.add_argument('--movies', type=int, default=20000, help='영화 수')
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args(argv)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myview.settings')
+
+    import django
+    django.setup()
+
+    from movies import recommendations
+
+    timings = {}
+    start   = time.perf_counter()
+
+    def lap(name):
+        nonlocal start
+        timings[name] = time.perf_counter() - start
+        start         = time.perf_counter()
+
+    users, movies, values        = generate(options)
+    lap('generate')
+    ratings, user_ids, movie_ids = recommendations.build_matrix(users, movies, values)
+    centered, means              = recommendations.center(ratings)
+    lap('matrix')
+    neighbors                    = recommendations.build_neighbors(centered)
+    lap('neighbors')
+    recommended                  = sum(1 for _ in recommendations.recommend(ratings, centered, means, neighbors))
+    lap('recommend')
+
+    print(f'reviews={ratings.nnz} users={len(user_ids)} movies={len(movie_ids)} neighbors={neighbors.nnz} recommended_users={recommended}')
+
+    for name, seconds in timings.items():
+        print(f'{name:10} {seconds:8.2f}s')
+
+    print(f'max rss    {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:8.0f}MB')
+
+if __name__ == '__main__':
+    main()
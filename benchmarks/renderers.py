@@ -0,0 +1,56 @@
+"""JSON 렌더러 벤치마크
+
+기록해 둔 응답 payload(benchmarks/payloads)를 기존 렌더러와 orjson 렌더러로 직렬화해 비교합니다.
+
+    python -m benchmarks.renderers [--number 2000]
+"""
+import argparse, datetime, decimal, json, os, timeit
+
+from pathlib import Path
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myview.settings')
+django.setup()
+
+from django.http              import JsonResponse as DjangoJsonResponse
+from rest_framework.renderers import JSONRenderer
+
+from core.http      import JsonResponse
+from core.renderers import FastJSONRenderer
+
+PAYLOAD_DIR = Path(__file__).resolve().parent / 'payloads'
+
+def load_payloads():
+    """payload를 읽고 리뷰 목록은 실제 응답과 같은 Decimal, date, time 타입으로 변환합니다."""
+    payloads = {path.stem: json.loads(path.read_text()) for path in sorted(PAYLOAD_DIR.glob('*.json'))}
+
+    for review in payloads.get('review_list', {}).get('result', []):
+        review['rating']       = decimal.Decimal(review['rating'])
+        review['watched_date'] = datetime.date.fromisoformat(review['watched_date'])
+        review['watched_time'] = datetime.time.fromisoformat(review['watched_time'])
+
+    return payloads
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=2000)
+    options = parser.parse_args()
+
+    renderers = {
+        'JsonResponse' : (lambda data: DjangoJsonResponse(data).content, lambda data: JsonResponse(data).content),
+        'DRF'          : (JSONRenderer().render, FastJSONRenderer().render),
+    }
+
+    print('| payload | renderer | bytes | current (us) | fast (us) | speedup |')
+    print('|---|---|---|---|---|---|')
+
+    for name, data in load_payloads().items():
+        for renderer, (current, fast) in renderers.items():
+            current_time = min(timeit.repeat(lambda: current(data), number=options.number, repeat=3)) / options.number
+            fast_time    = min(timeit.repeat(lambda: fast(data), number=options.number, repeat=3)) / options.number
+
+            print(f'| {name} | {renderer} | {len(fast(data))} | {current_time*1e6:.1f} | {fast_time*1e6:.1f} | {current_time/fast_time:.1f}x |')
+
+if __name__ == '__main__':
+    main()
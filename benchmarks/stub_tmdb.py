@@ -0,0 +1,130 @@
+"""로컬 TMDB 대체 서버
+
+기록된 fixture(benchmarks/fixtures/tmdb.json)를 응답하는 HTTP 서버입니다.
+경로의 숫자 id는 `{id}`로 바꿔 조회하므로 어떤 영화/배우 id로 요청해도 같은 fixture를 응답합니다.
+--fixture-store를 지정하면 TMDB_TRANSPORT=record로 저장한 실제 응답을 먼저 찾아 응답합니다.
+응답 지연과 오류 비율을 지정해 TMDB 장애 상황을 재현할 수 있습니다.
+
+    python -m benchmarks.stub_tmdb --port 8001 --latency 80 --jitter 40 --error-rate 0.01
+
+앱은 TMDB_BASE_URL=http://127.0.0.1:8001/3 환경변수로 실행합니다.
+"""
+import argparse, json, random, re, threading, time
+
+from http.server  import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib      import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from core.tmdb_fixtures import FixtureStore, TMDBFixtureNotFound
+
+FIXTURE_FILE = Path(__file__).resolve().parent / 'fixtures' / 'tmdb.json'
+
+re_id = re.compile(r'/\d+(?=/|$)')
+
+class StubTMDBServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures, latency=0, jitter=0, error_rate=0.0, error_status=500, fixture_store=None):
+        """
+        Args:
+            address: (host, port) 입니다. port가 0이면 임의의 포트를 사용합니다.
+            fixtures: `{경로 템플릿: 응답}` dict입니다.
+            latency: 응답 지연(ms)입니다.
+            jitter: 응답 지연에 더해지는 0~jitter ms의 임의 지연입니다.
+            error_rate: 오류를 응답할 비율(0~1)입니다.
+            error_status: 오류 응답 상태 코드입니다. (500, 429 등)
+            fixture_store: 기록된 응답을 저장한 FixtureStore입니다.
+        """
+        super().__init__(address, StubTMDBHandler)
+
+        self.fixtures      = fixtures
+        self.latency       = latency
+        self.jitter        = jitter
+        self.error_rate    = error_rate
+        self.error_status  = error_status
+        self.fixture_store = fixture_store
+
+    @property
+    def base_url(self):
+        return f'http://{self.server_address[0]}:{self.server_address[1]}/3'
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+        return self
+
+class StubTMDBHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+
+        time.sleep((server.latency + random.uniform(0, server.jitter)) / 1000)
+
+        url    = urlsplit(self.path)
+        method = url.path[len('/3'):]
+        path   = re_id.sub('/{id}', method)
+
+        if random.random() < server.error_rate:
+            self.send_json(server.error_status, {'success': False, 'status_code': 25 if server.error_status == 429 else 11, 'status_message': 'Injected error.'})
+            return
+
+        if server.fixture_store is not None:
+            try:
+                self.send_json(200, server.fixture_store.load(method, dict(parse_qsl(url.query))))
+                return
+            except TMDBFixtureNotFound:
+                pass
+
+        if path in server.fixtures:
+            self.send_json(200, server.fixtures[path])
+        else:
+            self.send_json(404, {'success': False, 'status_code': 34, 'status_message': 'The resource you requested could not be found.'})
+
+    def send_json(self, status, data):
+        content = json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json;charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+def load_fixtures(path=FIXTURE_FILE):
+    return json.loads(Path(path).read_text())
+
+def add_arguments(parser):
+    parser.add_argument('--latency', type=float, default=50, help='TMDB 응답 지연(ms)')
+    parser.add_argument('--jitter', type=float, default=0, help='응답 지연에 더할 임의 지연 최대값(ms)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='오류 응답 비율(0~1)')
+    parser.add_argument('--error-status', type=int, default=500, help='오류 응답 상태 코드')
+    parser.add_argument('--fixtures', default=FIXTURE_FILE, help='fixture 파일 경로')
+    parser.add_argument('--fixture-store', help='TMDB_TRANSPORT=record로 기록한 fixture 디렉터리')
+
+def create_server(options, host='127.0.0.1', port=0):
+    return StubTMDBServer(
+        (host, port),
+        load_fixtures(options.fixtures),
+        latency       = options.latency,
+        jitter        = options.jitter,
+        error_rate    = options.error_rate,
+        error_status  = options.error_status,
+        fixture_store = FixtureStore(options.fixture_store) if options.fixture_store else None,
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    add_arguments(parser)
+    options = parser.parse_args()
+
+    server = create_server(options, options.host, options.port)
+
+    print(f'stub TMDB listening on {server.base_url}')
+
+    server.serve_forever()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+import asyncio, hashlib, json
+
+from django.core.cache            import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache           import get_conditional_response, patch_cache_control, patch_vary_headers, quote_etag
+
+from core.deadline import is_partial
+from core.metrics  import record_cache_hit
+
+PAYLOAD_CACHE_TIMEOUT         = 60*10
+PARTIAL_PAYLOAD_CACHE_TIMEOUT = 30
+
+def make_etag(payload):
+    """payload 내용으로 strong ETag를 생성합니다."""
+    content = json.dumps(payload, sort_keys=True, ensure_ascii=False, cls=DjangoJSONEncoder).encode('utf-8')
+
+    return quote_etag(hashlib.md5(content).hexdigest())
+
+def get_payload(key, builder, timeout=PAYLOAD_CACHE_TIMEOUT):
+    """캐시된 응답 payload를 조회하고, 없으면 builder로 구성해 저장합니다.
+
+    payload와 함께 ETag를 `{key}:etag`에 따로 저장해
+    payload를 읽지 않고도 클라이언트가 가진 버전을 확인할 수 있도록 합니다.
+    선택 항목이 생략된 payload는 PARTIAL_PAYLOAD_CACHE_TIMEOUT 동안만 저장합니다.
+
+    Args:
+        key: 캐시 키입니다.
+        builder: payload를 구성하는 함수입니다. None을 반환하면 캐시하지 않습니다.
+        timeout: 캐시 유지 시간(초)입니다.
+
+    Returns:
+        {'etag', 'payload'} dict, builder가 None을 반환하면 None을 반환합니다.
+    """
+    entry = cache.get(key)
+
+    if entry is not None:
+        record_cache_hit('payload')
+        return entry
+
+    payload = builder()
+
+    if payload is None:
+        return None
+
+    entry = {'etag': make_etag(payload), 'payload': payload}
+
+    cache.set_many({key: entry, f'{key}:etag': entry['etag']}, min(timeout, PARTIAL_PAYLOAD_CACHE_TIMEOUT) if is_partial() else timeout)
+
+    return entry
+
+async def aget_payload(key, builder, timeout=PAYLOAD_CACHE_TIMEOUT):
+    """get_payload의 비동기 버전입니다. builder는 코루틴 함수입니다."""
+    entry = await cache.aget(key)
+
+    if entry is not None:
+        record_cache_hit('payload')
+        return entry
+
+    payload = await builder()
+
+    if payload is None:
+        return None
+
+    entry = {'etag': make_etag(payload), 'payload': payload}
+
+    await cache.aset_many({key: entry, f'{key}:etag': entry['etag']}, min(timeout, PARTIAL_PAYLOAD_CACHE_TIMEOUT) if is_partial() else timeout)
+
+    return entry
+
+def get_payload_etag(key):
+    """캐시된 payload의 ETag만 조회합니다."""
+    return cache.get(f'{key}:etag')
+
+def patch_cache_headers(response, max_age, private=False, personalized=False):
+    if not 200 <= response.status_code < 400:
+        return response
+
+    if private:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+
+    if personalized:
+        patch_vary_headers(response, ['Authorization'])
+
+    return response
+
+def http_cache(max_age=0, personalized=False, payload_key=None):
+    """뷰 응답에 Cache-Control, Vary 헤더를 설정하는 데코레이터입니다.
+
+    ETag 비교와 304 응답은 ConditionalGetMiddleware가 처리합니다.
+
+    Args:
+        max_age: 공유 캐시에 저장할 수 있는 시간(초)입니다.
+        personalized: Authorization 헤더에 따라 응답이 달라지는 경로입니다.
+            로그인 요청은 private으로 응답하고 `Vary: Authorization`을 추가합니다.
+        payload_key: 요청으로부터 get_payload 캐시 키를 구하는 함수입니다.
+            캐시된 ETag가 If-None-Match와 같으면 payload를 구성하지 않고 304로 응답합니다.
+
+    async 뷰 메서드에도 사용할 수 있습니다.
+    """
+    def not_modified(request, etag, private):
+        if etag is None:
+            return None
+
+        response = get_conditional_response(request, etag=etag)
+
+        if response is None:
+            return None
+
+        record_cache_hit('etag')
+        response['ETag'] = etag
+
+        return patch_cache_headers(response, max_age, private, personalized)
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            async def async_wrapper(self, request, *args, **kwargs):
+                private = personalized and 'Authorization' in request.headers
+
+                if payload_key is not None and not private:
+                    response = not_modified(request, await cache.aget(f'{payload_key(request, *args, **kwargs)}:etag'), private)
+
+                    if response is not None:
+                        return response
+
+                response = await func(self, request, *args, **kwargs)
+
+                return patch_cache_headers(response, max_age, private, personalized)
+
+            return async_wrapper
+
+        def wrapper(self, request, *args, **kwargs):
+            private = personalized and 'Authorization' in request.headers
+
+            if payload_key is not None and not private:
+                response = not_modified(request, get_payload_etag(payload_key(request, *args, **kwargs)), private)
+
+                if response is not None:
+                    return response
+
+            response = func(self, request, *args, **kwargs)
+
+            return patch_cache_headers(response, max_age, private, personalized)
+
+        return wrapper
+    return decorator
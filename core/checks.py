@@ -0,0 +1,28 @@
+from django.conf        import settings
+from django.core.checks import Error, Warning, register
+
+LOCAL_CACHE_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """default 캐시가 워커 프로세스마다 따로 동작하는 백엔드인지 확인합니다.
+
+    TMDB 요청 한도, 워커 간 single-flight, 순위 갱신 락은 캐시로 워커 간 상태를 공유하므로
+    로컬 메모리 캐시에서는 워커마다 따로 동작합니다. (워커 수만큼 한도가 늘어납니다)
+    CACHE_ALLOW_LOCAL이 True(개발 환경)이면 경고로, 아니면 오류로 알립니다.
+    """
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+
+    if backend not in LOCAL_CACHE_BACKENDS:
+        return []
+
+    message = f'The default cache ({backend}) is local to each worker process; TMDB rate limits, shared single-flight and ranking refresh locks are not shared between workers.'
+    hint    = 'Set REDIS_URL to use a shared cache backend.'
+
+    if getattr(settings, 'CACHE_ALLOW_LOCAL', False):
+        return [Warning(message, hint=hint, id='core.W001')]
+
+    return [Error(message, hint=hint, id='core.E001')]
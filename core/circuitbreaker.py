@@ -0,0 +1,79 @@
+import threading, time
+
+from core.exceptions import TMDBCircuitOpen
+
+CLOSED    = 'closed'
+OPEN      = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """연속된 실패가 failure_threshold에 도달하면 호출을 차단합니다. (워커 프로세스 단위)
+
+    차단(open) 상태에서는 호출하지 않고 TMDBCircuitOpen을 발생시킵니다.
+    reset_timeout이 지나면 요청 하나만 시험 호출(half-open)하고, 성공하면 차단을 해제하고 실패하면 다시 차단합니다.
+    시험 호출이 진행 중인 동안 다른 요청은 계속 차단되며, 시험 호출이 결과 없이 끝나면 reset_timeout 후 다시 시험 호출합니다.
+
+    Attributes:
+        name: 경로 그룹 이름입니다. (movie, person, search 등)
+        failure_threshold: 차단할 연속 실패 횟수입니다.
+        reset_timeout: 차단 후 시험 호출까지의 시간(초)입니다.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name              = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout     = reset_timeout
+        self.state             = CLOSED
+        self.failures          = 0
+        self.opened_at         = None
+        self.lock              = threading.Lock()
+
+    def before_call(self):
+        """호출 가능 여부를 확인합니다.
+
+        Raises:
+            TMDBCircuitOpen: 차단 상태인 경우 발생합니다.
+        """
+        with self.lock:
+            if self.state == CLOSED:
+                return
+
+            if time.monotonic()-self.opened_at >= self.reset_timeout:
+                self.state     = HALF_OPEN
+                self.opened_at = time.monotonic()
+                return
+
+            raise TMDBCircuitOpen(f'circuit open : {self.name}')
+
+    def record_success(self):
+        with self.lock:
+            self.state    = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state     = OPEN
+                self.opened_at = time.monotonic()
+
+class CircuitBreakers:
+    """경로 그룹별 CircuitBreaker를 생성하고 보관합니다."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout     = reset_timeout
+        self.breakers          = {}
+        self.lock              = threading.Lock()
+
+    def get(self, name):
+        with self.lock:
+            if name not in self.breakers:
+                self.breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+
+            return self.breakers[name]
+
+    def reset(self):
+        with self.lock:
+            self.breakers.clear()
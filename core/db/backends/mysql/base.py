@@ -0,0 +1,90 @@
+"""연결 상태 확인과 연결 풀을 지원하는 MySQL backend
+
+DATABASES 설정에 다음 값을 추가로 사용합니다. (core.db.config.configure_databases 참고)
+
+- CONN_HEALTH_CHECKS: CONN_MAX_AGE로 유지한 연결을 요청에서 처음 사용할 때 ping으로 확인하고, 끊어졌으면 다시 연결합니다.
+- POOL: `{'MAX_SIZE': 10, 'TIMEOUT': 5, 'MAX_LIFETIME': 1800}` 형식의 워커 프로세스별 연결 풀 설정입니다.
+  풀에 남아 있던 연결은 CONN_HEALTH_CHECKS가 켜져 있으면 빌려주기 전에 확인합니다.
+"""
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from core.db.pool import get_pool
+
+def ping(connection):
+    try:
+        connection.ping()
+    except Exception:
+        return False
+
+    return True
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.health_check_done = False
+
+    def get_pool(self):
+        options = self.settings_dict.get('POOL')
+
+        if not options:
+            return None
+
+        return get_pool(
+            self.alias,
+            lambda: MySQLDatabaseWrapper.get_new_connection(self, self.get_connection_params()),
+            options,
+            validate = ping if self.settings_dict.get('CONN_HEALTH_CHECKS') else None,
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        return pool.checkout()
+
+    def connect(self):
+        # 새로 만들었거나 풀에서 확인하고 빌린 연결은 이번 요청에서 다시 확인하지 않습니다.
+        # (connect 안에서 호출하는 set_autocommit도 ensure_connection을 거칩니다)
+        self.health_check_done = True
+
+        super().connect()
+
+    def _close(self):
+        pool = self.get_pool()
+
+        if pool is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            pool.checkin(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        # 요청 시작, 종료 시점에 호출되므로 다음 요청에서 유지한 연결을 다시 확인하도록 합니다.
+        super().close_if_unusable_or_obsolete()
+
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        self.close_if_unhealthy()
+
+        super().ensure_connection()
+
+    def close_if_unhealthy(self):
+        """유지한 연결이 끊어졌으면 닫습니다. (Django 4.1의 CONN_HEALTH_CHECKS와 같은 방식)
+
+        요청마다 처음 사용할 때 한 번만 확인하고, 트랜잭션 중에는 확인하지 않습니다.
+        """
+        if self.connection is None or self.health_check_done or self.in_atomic_block:
+            return
+
+        if not self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            return
+
+        self.health_check_done = True
+
+        if not self.is_usable():
+            self.close()
@@ -0,0 +1,80 @@
+"""DB 드라이버와 연결 설정
+
+settings.py에서 Django 설정 전에 호출하므로 Django 설정(django.conf.settings)에 의존하지 않습니다.
+
+    DRIVER    = install_driver()
+    DATABASES = configure_databases(DATABASES)
+"""
+import copy, os
+
+MYSQL_ENGINES = ('django.db.backends.mysql', 'core.db.backends.mysql')
+
+def install_driver():
+    """MySQL 드라이버를 선택합니다.
+
+    C 확장 드라이버(mysqlclient)가 설치되어 있으면 사용하고,
+    없으면 순수 파이썬 드라이버(PyMySQL)를 MySQLdb로 등록합니다.
+    DB_DRIVER=pymysql 환경변수로 PyMySQL을 사용하도록 지정할 수 있습니다. (벤치마크 비교용)
+
+    Returns:
+        선택한 드라이버 이름(mysqlclient, pymysql)을 반환합니다.
+    """
+    if os.environ.get('DB_DRIVER') != 'pymysql':
+        try:
+            import MySQLdb
+
+            # 이미 install_as_MySQLdb로 등록된 경우 MySQLdb는 pymysql 모듈입니다.
+            if MySQLdb.__name__ == 'MySQLdb':
+                return 'mysqlclient'
+        except ImportError:
+            pass
+
+    import pymysql
+
+    pymysql.install_as_MySQLdb()
+
+    return 'pymysql'
+
+def get_env_int(name, default):
+    value = os.environ.get(name)
+
+    return default if value in (None, '') else int(value)
+
+def configure_databases(databases):
+    """MySQL DB 설정에 연결 재사용, 상태 확인, 연결 풀 설정을 추가합니다.
+
+    my_settings의 DATABASES에 이미 지정한 값은 바꾸지 않습니다.
+    DB_REPLICA_HOSTS(쉼표로 구분한 호스트 목록)를 지정하면 default와 같은 설정으로 replica1, replica2, ... alias를 추가합니다.
+    (테스트에서는 default를 mirror합니다)
+
+    - ATOMIC_REQUESTS: 요청 전체를 트랜잭션으로 감싸지 않습니다. (기본값 False)
+    - CONN_MAX_AGE: 요청이 끝나도 연결을 유지할 시간(초)입니다. (DB_CONN_MAX_AGE, 기본값 60)
+    - CONN_HEALTH_CHECKS: 유지한 연결을 요청에서 처음 사용할 때 ping으로 확인합니다. (DB_CONN_HEALTH_CHECKS, 기본값 1)
+    - POOL: 워커 프로세스별 연결 풀 설정입니다. DB_POOL_SIZE가 0이면 사용하지 않습니다.
+      풀을 사용하면 연결은 요청이 끝날 때 풀로 반환되므로 CONN_MAX_AGE 기본값은 0입니다.
+    """
+    pool_size     = get_env_int('DB_POOL_SIZE', 0)
+    replica_hosts = [host.strip() for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+
+    for index, host in enumerate(replica_hosts, 1):
+        databases.setdefault(f'replica{index}', {**copy.deepcopy(databases['default']), 'HOST': host, 'TEST': {'MIRROR': 'default'}})
+
+    for settings_dict in databases.values():
+        settings_dict.setdefault('ATOMIC_REQUESTS', False)
+
+        if settings_dict.get('ENGINE') not in MYSQL_ENGINES:
+            continue
+
+        settings_dict['ENGINE'] = 'core.db.backends.mysql'
+
+        if pool_size:
+            settings_dict.setdefault('POOL', {
+                'MAX_SIZE'     : pool_size,
+                'TIMEOUT'      : get_env_int('DB_POOL_TIMEOUT', 5),
+                'MAX_LIFETIME' : get_env_int('DB_POOL_MAX_LIFETIME', 60*30),
+            })
+
+        settings_dict.setdefault('CONN_MAX_AGE', 0 if settings_dict.get('POOL') else get_env_int('DB_CONN_MAX_AGE', 60))
+        settings_dict.setdefault('CONN_HEALTH_CHECKS', get_env_int('DB_CONN_HEALTH_CHECKS', 1) == 1)
+
+    return databases
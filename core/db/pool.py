@@ -0,0 +1,155 @@
+import os, threading, time
+
+from django.db.utils import OperationalError
+
+from core.metrics import registry
+
+class PoolTimeout(OperationalError):
+    """연결 풀의 모든 연결이 사용 중이고 TIMEOUT 동안 반환되지 않은 경우 발생합니다."""
+
+class ConnectionPool:
+    """워커 프로세스 안에서 DB 연결을 재사용하는 크기 제한 연결 풀입니다.
+
+    Django는 스레드마다 연결을 하나씩 만들기 때문에, 연결 풀은 스레드가 요청을 처리하는 동안에만 연결을 빌려주고
+    요청이 끝나면 돌려받아 다른 스레드가 다시 사용하도록 합니다.
+    빌린 횟수, 대기 시간, 대기 시간 초과는 /metrics에 alias별로 기록합니다.
+
+    Attributes:
+        alias: DB alias입니다. (메트릭 label)
+        connect: 새 연결을 만드는 함수입니다.
+        max_size: 동시에 열 수 있는 최대 연결 수입니다.
+        timeout: 연결이 반환되기를 기다리는 최대 시간(초)입니다.
+        max_lifetime: 연결을 만든 뒤 이 시간(초)이 지나면 풀로 반환될 때 닫습니다. None이면 계속 사용합니다.
+        validate: 남은 연결을 빌려주기 전에 상태를 확인하는 함수입니다. False를 반환하면 닫습니다.
+    """
+
+    def __init__(self, alias, connect, max_size=10, timeout=5, max_lifetime=None, validate=None):
+        self.alias        = alias
+        self.connect      = connect
+        self.max_size     = max_size
+        self.timeout      = timeout
+        self.max_lifetime = max_lifetime
+        self.validate     = validate
+        self.condition    = threading.Condition()
+        self.idle         = []
+        self.created_at   = {}
+        self.size         = 0
+
+    def checkout(self):
+        """풀에서 연결을 빌립니다. 남은 연결이 없고 최대 연결 수보다 적게 열려 있으면 새로 연결합니다.
+
+        validate가 있으면 남은 연결을 빌려주기 전에 확인하고, 끊어진 연결은 닫고 다른 연결을 빌려줍니다.
+
+        Raises:
+            PoolTimeout: timeout 동안 연결을 빌리지 못한 경우 발생합니다.
+        """
+        start    = time.monotonic()
+        deadline = start + self.timeout
+        labels   = {'alias': self.alias}
+
+        while True:
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+
+                    if remaining <= 0:
+                        registry.increment('myview_db_pool_timeouts_total', labels)
+                        raise PoolTimeout(f'connection pool "{self.alias}" exhausted ({self.max_size} connections)')
+
+                    self.condition.wait(remaining)
+
+                connection = self.idle.pop() if self.idle else None
+
+                if connection is None:
+                    self.size += 1
+
+            if connection is None or self.validate is None or self.validate(connection):
+                break
+
+            self.discard(connection)
+
+        registry.observe('myview_db_pool_wait_seconds', labels, time.monotonic()-start)
+        registry.increment('myview_db_pool_checkouts_total', labels)
+
+        if connection is not None:
+            return connection
+
+        try:
+            connection = self.connect()
+        except Exception:
+            self.discard(None)
+            raise
+
+        self.created_at[id(connection)] = time.monotonic()
+
+        return connection
+
+    def checkin(self, connection):
+        """빌린 연결을 돌려받습니다.
+
+        진행 중인 트랜잭션은 rollback하고, 실패하거나 max_lifetime이 지난 연결은 닫습니다.
+        """
+        created_at = self.created_at.get(id(connection), 0)
+
+        if self.max_lifetime is not None and time.monotonic()-created_at > self.max_lifetime:
+            self.discard(connection)
+            return
+
+        try:
+            connection.rollback()
+        except Exception:
+            self.discard(connection)
+            return
+
+        with self.condition:
+            self.idle.append(connection)
+            self.condition.notify()
+
+    def discard(self, connection):
+        """연결을 닫고 풀에서 제외합니다."""
+        if connection is not None:
+            self.created_at.pop(id(connection), None)
+
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def close(self):
+        """사용하지 않는 연결을 모두 닫습니다."""
+        with self.condition:
+            idle, self.idle = self.idle, []
+
+        for connection in idle:
+            self.discard(connection)
+
+pools      = {}
+pools_lock = threading.Lock()
+pools_pid  = os.getpid()
+
+def get_pool(alias, connect, options, validate=None):
+    """alias의 연결 풀을 반환합니다. 없으면 options(DATABASES[alias]['POOL'])로 만듭니다.
+
+    gunicorn이 워커를 fork하면 부모 프로세스의 연결을 공유하지 않도록 풀을 새로 만듭니다.
+    """
+    global pools, pools_pid
+
+    with pools_lock:
+        if pools_pid != os.getpid():
+            pools, pools_pid = {}, os.getpid()
+
+        if alias not in pools:
+            pools[alias] = ConnectionPool(
+                alias,
+                connect,
+                max_size     = options.get('MAX_SIZE', 10),
+                timeout      = options.get('TIMEOUT', 5),
+                max_lifetime = options.get('MAX_LIFETIME'),
+                validate     = validate,
+            )
+
+        return pools[alias]
@@ -0,0 +1,93 @@
+import contextvars, time
+
+from django.conf import settings
+
+from core.exceptions import DeadlineExceeded, TMDBRateLimited, TMDBTimeout
+
+current_deadline = contextvars.ContextVar('current_deadline', default=None)
+
+class Deadline:
+    """요청 하나의 처리 제한 시각과 선택 항목 생략 여부를 저장합니다.
+
+    Attributes:
+        expires_at: 제한 시각입니다. (time.monotonic 기준, None이면 제한 없음)
+        partial: 선택 항목을 하나라도 생략했는지 여부입니다.
+    """
+
+    def __init__(self, seconds=None):
+        self.expires_at = None
+        self.partial    = False
+
+        if seconds:
+            self.start(seconds)
+
+    def start(self, seconds):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return None if self.expires_at is None else self.expires_at - time.monotonic()
+
+def remaining():
+    """현재 요청의 남은 시간(초)을 반환합니다. 제한 시간이 없으면 None을 반환합니다."""
+    deadline = current_deadline.get()
+
+    return None if deadline is None else deadline.remaining()
+
+def check_deadline():
+    """제한 시간이 지났으면 DeadlineExceeded를 발생시킵니다. TMDB 호출 전에 확인합니다."""
+    if (remaining() or 0) < 0:
+        raise DeadlineExceeded('request deadline exceeded')
+
+def bound_timeout(timeout):
+    """timeout을 남은 시간 이하로 줄여 반환합니다. (0 이하의 timeout은 허용되지 않으므로 최소 0.01초)"""
+    left = remaining()
+
+    return timeout if left is None else max(0.01, min(timeout, left))
+
+def optional(fetch, default):
+    """응답에서 빠져도 되는 항목(이미지, 영상, 플랫폼 로고, 배경 이미지)을 조회합니다.
+
+    남은 시간이 REQUEST_DEADLINE_OPTIONAL_RESERVE보다 적거나 조회가 시간 초과, 요청 한도 초과로 실패하면
+    default를 반환하고 요청을 partial로 표시합니다.
+
+    Args:
+        fetch: 항목을 조회하는 함수입니다.
+        default: 항목을 생략할 때 사용할 값입니다.
+    """
+    deadline = current_deadline.get()
+
+    if deadline is None:
+        return fetch()
+
+    if (deadline.remaining() or float('inf')) < settings.REQUEST_DEADLINE_OPTIONAL_RESERVE:
+        deadline.partial = True
+        return default
+
+    try:
+        return fetch()
+    except (TMDBTimeout, TMDBRateLimited):
+        deadline.partial = True
+        return default
+
+async def aoptional(fetch, default):
+    """optional의 비동기 버전입니다. fetch는 코루틴 함수입니다."""
+    deadline = current_deadline.get()
+
+    if deadline is None:
+        return await fetch()
+
+    if (deadline.remaining() or float('inf')) < settings.REQUEST_DEADLINE_OPTIONAL_RESERVE:
+        deadline.partial = True
+        return default
+
+    try:
+        return await fetch()
+    except (TMDBTimeout, TMDBRateLimited):
+        deadline.partial = True
+        return default
+
+def is_partial():
+    """현재 요청에서 생략된 선택 항목이 있는지 반환합니다."""
+    deadline = current_deadline.get()
+
+    return deadline is not None and deadline.partial
@@ -0,0 +1,34 @@
+class TMDBError(Exception):
+    """TMDB 요청 실패를 나타내는 기본 예외입니다.
+
+    뷰에서 처리하지 않은 예외는 TMDBErrorMiddleware가 status, message로 응답합니다.
+    """
+    status  = 502
+    message = 'TMDB_ERROR'
+
+class TMDBTimeout(TMDBError):
+    status  = 504
+    message = 'TMDB_TIMEOUT'
+
+class TMDBRateLimited(TMDBError):
+    """TMDB 요청 한도를 초과한 경우 발생합니다.
+
+    Attributes:
+        retry_after: 다시 요청할 수 있을 때까지의 시간(초)입니다.
+    """
+    status  = 503
+    message = 'TMDB_RATE_LIMITED'
+
+    def __init__(self, message='TMDB rate limit exceeded', retry_after=1):
+        super().__init__(message)
+
+        self.retry_after = retry_after
+
+class DeadlineExceeded(TMDBTimeout):
+    """요청 처리 제한 시간이 지난 뒤 TMDB를 호출하려는 경우 발생합니다."""
+    message = 'DEADLINE_EXCEEDED'
+
+class TMDBCircuitOpen(TMDBError):
+    """연속된 실패로 차단된 TMDB 경로를 호출하려는 경우 발생합니다."""
+    status  = 503
+    message = 'TMDB_UNAVAILABLE'
@@ -0,0 +1,29 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http                  import HttpResponse
+
+from core.renderers import dumps
+
+class JsonResponse(HttpResponse):
+    """django.http.JsonResponse를 대체하는 응답 클래스입니다.
+
+    사용법은 django.http.JsonResponse와 같고, 직렬화는 core.renderers.dumps로 처리합니다.
+    json_dumps_params를 넘기면 표준 json 모듈로 직렬화합니다.
+    """
+
+    def __init__(self, data, encoder=DjangoJSONEncoder, safe=True, json_dumps_params=None, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                'In order to allow non-dict objects to be serialized set the '
+                'safe parameter to False.'
+            )
+        
+        kwargs.setdefault('content_type', 'application/json')
+        
+        if json_dumps_params is not None:
+            content = json.dumps(data, cls=encoder, **json_dumps_params)
+        else:
+            content = dumps(data, encoder=encoder)
+        
+        super().__init__(content=content, **kwargs)
@@ -0,0 +1,234 @@
+import atexit, contextvars, json, os, tempfile, threading, time
+
+from collections import defaultdict
+
+from django.conf import settings
+
+METRICS_DIR            = getattr(settings, 'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'myview-metrics'))
+METRICS_FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+METRICS_FILE_TTL       = getattr(settings, 'METRICS_FILE_TTL', 60*60*24)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS    = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+HISTOGRAMS = {
+    'myview_request_duration_seconds' : ('요청 처리 시간', DURATION_BUCKETS),
+    'myview_db_queries'               : ('요청당 DB 쿼리 수', COUNT_BUCKETS),
+    'myview_db_duration_seconds'      : ('요청당 DB 쿼리 시간', DURATION_BUCKETS),
+    'myview_tmdb_calls'               : ('요청당 TMDB 호출 수', COUNT_BUCKETS),
+    'myview_tmdb_duration_seconds'    : ('요청당 TMDB 호출 시간', DURATION_BUCKETS),
+    'myview_db_pool_wait_seconds'     : ('DB 연결 풀 대기 시간', DURATION_BUCKETS),
+}
+
+COUNTERS = {
+    'myview_cache_hits_total'        : '캐시 적중 수',
+    'myview_db_pool_checkouts_total' : 'DB 연결 풀에서 빌린 연결 수',
+    'myview_db_pool_timeouts_total'  : 'DB 연결 풀 대기 시간 초과 수',
+}
+
+class RequestMetrics:
+    """요청 하나에서 발생한 DB 쿼리, TMDB 호출, 캐시 적중을 기록합니다."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time    = 0.0
+        self.tmdb_calls = 0
+        self.tmdb_time  = 0.0
+        self.cache_hits = defaultdict(int)
+
+current_metrics = contextvars.ContextVar('current_metrics', default=None)
+
+def record_tmdb_call(duration):
+    metrics = current_metrics.get()
+
+    if metrics is not None:
+        metrics.tmdb_calls += 1
+        metrics.tmdb_time  += duration
+
+def record_db_query(duration):
+    metrics = current_metrics.get()
+
+    if metrics is not None:
+        metrics.db_queries += 1
+        metrics.db_time    += duration
+
+def record_cache_hit(cache_name):
+    metrics = current_metrics.get()
+
+    if metrics is not None:
+        metrics.cache_hits[cache_name] += 1
+
+class Registry:
+    """워커 프로세스 안에서 메트릭을 집계합니다.
+
+    gunicorn 워커끼리 메모리를 공유하지 않으므로 각 워커는 집계 결과를
+    METRICS_DIR/{pid}.json에 주기적으로 기록하고, /metrics는 모든 워커의 파일을 합산합니다.
+    워커가 종료되면 파일을 삭제하고, 삭제하지 못하고 남은 파일(종료된 pid, METRICS_FILE_TTL보다 오래된 파일)은
+    합산할 때 삭제합니다.
+    """
+
+    def __init__(self):
+        self.lock       = threading.Lock()
+        self.histograms = {}
+        self.counters   = {}
+        self.flushed_at = 0.0
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        key     = json.dumps([name, labels], sort_keys=True)
+
+        with self.lock:
+            histogram = self.histograms.setdefault(key, {'buckets': [0]*len(buckets), 'sum': 0.0, 'count': 0})
+
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['buckets'][index] += 1
+
+            histogram['sum']   += value
+            histogram['count'] += 1
+
+    def increment(self, name, labels, value=1):
+        key = json.dumps([name, labels], sort_keys=True)
+
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def record_request(self, route, metrics, duration):
+        labels = {'route': route}
+
+        self.observe('myview_request_duration_seconds', labels, duration)
+        self.observe('myview_db_queries', labels, metrics.db_queries)
+        self.observe('myview_db_duration_seconds', labels, metrics.db_time)
+        self.observe('myview_tmdb_calls', labels, metrics.tmdb_calls)
+        self.observe('myview_tmdb_duration_seconds', labels, metrics.tmdb_time)
+
+        for cache_name, hits in metrics.cache_hits.items():
+            self.increment('myview_cache_hits_total', {'route': route, 'cache': cache_name}, hits)
+
+        if time.monotonic() - self.flushed_at > METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps({'histograms': self.histograms, 'counters': self.counters}))
+
+    def flush(self):
+        """현재 워커의 집계 결과를 파일로 기록합니다."""
+        self.flushed_at = time.monotonic()
+
+        os.makedirs(METRICS_DIR, exist_ok=True)
+
+        path = os.path.join(METRICS_DIR, f'{os.getpid()}.json')
+
+        with open(path+'.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+
+        os.replace(path+'.tmp', path)
+
+    def remove(self):
+        """현재 워커의 파일을 삭제합니다. (워커 종료 시)"""
+        try:
+            os.remove(os.path.join(METRICS_DIR, f'{os.getpid()}.json'))
+        except OSError:
+            pass
+
+registry = Registry()
+
+atexit.register(registry.remove)
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+def is_stale(path, pid, now):
+    """종료된 워커의 파일이거나 METRICS_FILE_TTL 동안 갱신되지 않은 파일(재사용된 pid 등)이면 True를 반환합니다."""
+    try:
+        return pid != os.getpid() and (not is_alive(pid) or now - os.path.getmtime(path) > METRICS_FILE_TTL)
+    except OSError:
+        return True
+
+def collect():
+    """모든 워커의 집계 결과를 합산합니다."""
+    registry.flush()
+
+    histograms = {}
+    counters   = defaultdict(float)
+    now        = time.time()
+
+    for file_name in os.listdir(METRICS_DIR):
+        pid, extension = os.path.splitext(file_name)
+        path           = os.path.join(METRICS_DIR, file_name)
+
+        if extension != '.json' or not pid.isdigit():
+            continue
+
+        if is_stale(path, int(pid), now):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+            continue
+
+        try:
+            with open(path) as f:
+                worker = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        for key, histogram in worker['histograms'].items():
+            total = histograms.setdefault(key, {'buckets': [0]*len(histogram['buckets']), 'sum': 0.0, 'count': 0})
+
+            total['buckets'] = [a+b for a, b in zip(total['buckets'], histogram['buckets'])]
+            total['sum']    += histogram['sum']
+            total['count']  += histogram['count']
+
+        for key, value in worker['counters'].items():
+            counters[key] += value
+
+    return histograms, counters
+
+def format_labels(labels, **extra):
+    labels = {**labels, **extra}
+
+    return '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
+
+def render_prometheus():
+    """Prometheus text exposition format으로 메트릭을 출력합니다."""
+    histograms, counters = collect()
+    lines                = []
+
+    for name, (description, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+
+        for key in sorted(histograms):
+            metric, labels = json.loads(key)
+
+            if metric != name:
+                continue
+
+            histogram = histograms[key]
+
+            for bound, value in zip(buckets, histogram['buckets']):
+                lines.append(f'{name}_bucket{format_labels(labels, le=bound)} {value}')
+
+            lines.append(f'{name}_bucket{format_labels(labels, le="+Inf")} {histogram["count"]}')
+            lines.append(f'{name}_sum{format_labels(labels)} {histogram["sum"]}')
+            lines.append(f'{name}_count{format_labels(labels)} {histogram["count"]}')
+
+    for name, description in COUNTERS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} counter']
+
+        for key in sorted(counters):
+            metric, labels = json.loads(key)
+
+            if metric == name:
+                lines.append(f'{name}{format_labels(labels)} {counters[key]}')
+
+    return '\n'.join(lines) + '\n'
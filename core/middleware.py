@@ -0,0 +1,303 @@
+import asyncio, contextlib, gzip, math, re, time
+
+from asgiref.sync       import sync_to_async
+from django.conf        import settings
+from django.core.cache  import cache
+from django.db          import connections
+from django.utils.cache import cc_delim_re, patch_vary_headers
+
+from core.cache      import PAYLOAD_CACHE_TIMEOUT
+from core.deadline   import Deadline, current_deadline
+from core.exceptions import TMDBError, TMDBRateLimited
+from core.http       import JsonResponse
+from core.metrics    import RequestMetrics, current_metrics, record_db_query, registry
+from core.routers    import Routing, current_routing
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+
+re_accept_encoding = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q=([0-9.]+))?')
+
+def get_accepted_encodings(request):
+    encodings = {}
+
+    for encoding, q in re_accept_encoding.findall(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        try:
+            encodings[encoding.lower()] = float(q) if q else 1.0
+        except ValueError:
+            continue
+
+    return {encoding for encoding, q in encodings.items() if q > 0}
+
+def compress(content, encoding, stored=False):
+    """content를 압축합니다.
+
+    캐시에 저장할 때는 한 번만 압축하므로 압축률이 높은 설정을 사용합니다.
+    """
+    if encoding == 'br':
+        return brotli.compress(content, quality=11 if stored else 5)
+
+    return gzip.compress(content, compresslevel=9 if stored else 6, mtime=0)
+
+class DualModeMiddleware:
+    """WSGI(동기), ASGI(비동기) 요청을 모두 처리하는 미들웨어
+
+    get_response가 코루틴 함수면(ASGI) __call__이 acall의 코루틴을 반환하므로 Django가 미들웨어 체인을
+    sync_to_async로 감싸지 않고, 요청마다 스레드를 점유하지 않습니다. 하위 클래스는 call, acall을 구현합니다.
+    process_view는 I/O 없이 요청 객체만 변경하므로 ASGI에서도 스레드를 거치지 않고 이벤트 루프에서 실행합니다.
+    """
+    sync_capable  = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode   = asyncio.iscoroutinefunction(get_response)
+
+        if self.async_mode:
+            # Django가 미들웨어 객체를 코루틴 함수로 인식하도록 표시합니다. (django.utils.deprecation.MiddlewareMixin과 같은 방식)
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+            if hasattr(self, 'process_view'):
+                process_view = self.process_view
+
+                async def aprocess_view(request, view_func, view_args, view_kwargs):
+                    return process_view(request, view_func, view_args, view_kwargs)
+
+                self.process_view = aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.acall(request)
+
+        return self.call(request)
+
+    def call(self, request):
+        return self.get_response(request)
+
+    async def acall(self, request):
+        return await self.get_response(request)
+
+class CompressionMiddleware(DualModeMiddleware):
+    """Accept-Encoding에 따라 응답을 brotli 또는 gzip으로 압축합니다.
+
+    ETag가 있는 공개 응답은 압축 결과를 `compressed:{encoding}:{etag}`에 저장해
+    같은 payload는 다시 압축하지 않고 저장된 bytes를 그대로 내려줍니다.
+    ETag가 없거나 private 응답은 COMPRESSION_MIN_SIZE 이상일 때 요청마다 압축합니다.
+    ASGI에서는 캐시를 비동기로 조회하고, 압축은 이벤트 루프를 막지 않도록 스레드 풀에서 실행합니다.
+    """
+
+    def call(self, request):
+        response      = self.get_response(request)
+        encoding, key = self.negotiate(request, response)
+
+        if encoding is None:
+            return response
+
+        content = cache.get(key) if key else None
+
+        if content is None:
+            content = compress(response.content, encoding, stored=bool(key))
+
+            if key:
+                cache.set(key, content, PAYLOAD_CACHE_TIMEOUT)
+
+        return self.apply(response, encoding, content)
+
+    async def acall(self, request):
+        response      = await self.get_response(request)
+        encoding, key = self.negotiate(request, response)
+
+        if encoding is None:
+            return response
+
+        content = await cache.aget(key) if key else None
+
+        if content is None:
+            content = await sync_to_async(compress, thread_sensitive=False)(response.content, encoding, stored=bool(key))
+
+            if key:
+                await cache.aset(key, content, PAYLOAD_CACHE_TIMEOUT)
+
+        return self.apply(response, encoding, content)
+
+    def negotiate(self, request, response):
+        """응답에 사용할 (encoding, 압축 결과를 저장할 캐시 키)를 반환합니다. 압축하지 않으면 encoding은 None, 저장하지 않으면 키는 None입니다."""
+        if response.streaming or response.status_code != 200 or response.has_header('Content-Encoding'):
+            return None, None
+
+        if len(response.content) < COMPRESSION_MIN_SIZE:
+            return None, None
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        accepted = get_accepted_encodings(request)
+
+        if brotli is not None and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return None, None
+
+        etag    = response.get('ETag')
+        private = 'private' in (value.lower() for value in cc_delim_re.split(response.get('Cache-Control', '')))
+
+        return encoding, (f'compressed:{encoding}:{etag}' if etag and not private else None)
+
+    def apply(self, response, encoding, content):
+        if len(content) >= len(response.content):
+            return response
+
+        etag = response.get('ETag')
+
+        if etag and not etag.startswith('W/'):
+            response['ETag'] = 'W/' + etag
+
+        response.content             = content
+        response['Content-Length']   = str(len(content))
+        response['Content-Encoding'] = encoding
+
+        return response
+
+def query_timer(execute, sql, params, many, context):
+    start = time.perf_counter()
+    
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_db_query(time.perf_counter()-start)
+
+class MetricsMiddleware(DualModeMiddleware):
+    """요청별 처리 시간, DB 쿼리, TMDB 호출, 캐시 적중을 URL 패턴 단위로 집계합니다.
+
+    집계 결과는 /metrics에서 Prometheus 형식으로 조회합니다.
+    """
+
+    def call(self, request):
+        metrics, token, start = self.start(request)
+
+        try:
+            with self.timed_queries():
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        self.finish(request, metrics, start)
+
+        return response
+
+    async def acall(self, request):
+        metrics, token, start = self.start(request)
+
+        try:
+            with self.timed_queries():
+                response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        self.finish(request, metrics, start)
+
+        return response
+
+    def start(self, request):
+        request.metrics = RequestMetrics()
+
+        return request.metrics, current_metrics.set(request.metrics), time.perf_counter()
+
+    def timed_queries(self):
+        stack = contextlib.ExitStack()
+
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(query_timer))
+
+        return stack
+
+    def finish(self, request, metrics, start):
+        route = request.resolver_match.route if getattr(request, 'resolver_match', None) else 'unmatched'
+
+        registry.record_request(route, metrics, time.perf_counter()-start)
+
+class TMDBErrorMiddleware(DualModeMiddleware):
+    """뷰에서 처리하지 않은 TMDB 예외를 오류 응답으로 바꿉니다.
+
+    요청 한도 초과는 503과 Retry-After 헤더로 응답해 클라이언트가 잠시 후 다시 요청하도록 합니다.
+    """
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, TMDBError):
+            return None
+
+        response = JsonResponse({'message': exception.message}, status=exception.status)
+
+        if isinstance(exception, TMDBRateLimited):
+            response['Retry-After'] = max(1, math.ceil(exception.retry_after))
+
+        return response
+
+class DeadlineMiddleware(DualModeMiddleware):
+    """경로별 요청 처리 제한 시간을 설정합니다.
+
+    제한 시간은 REQUEST_DEADLINES에서 URL 패턴으로 찾고, 없으면 REQUEST_DEADLINE_DEFAULT를 사용합니다.
+    TMDB 호출은 남은 시간을 확인해 시간이 지났으면 호출하지 않고, 남은 시간보다 오래 기다리지 않습니다.
+    """
+
+    def call(self, request):
+        request.deadline = Deadline()
+        token            = current_deadline.set(request.deadline)
+
+        try:
+            return self.get_response(request)
+        finally:
+            current_deadline.reset(token)
+
+    async def acall(self, request):
+        request.deadline = Deadline()
+        token            = current_deadline.set(request.deadline)
+
+        try:
+            return await self.get_response(request)
+        finally:
+            current_deadline.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # ASGI에서는 process_view가 __call__과 다른 context에서 실행될 수 있으므로 __call__에서 설정한 객체의 시각만 변경합니다.
+        seconds = settings.REQUEST_DEADLINES.get(request.resolver_match.route, settings.REQUEST_DEADLINE_DEFAULT)
+
+        if seconds:
+            request.deadline.start(seconds)
+
+class DatabaseRoutingMiddleware(DualModeMiddleware):
+    """요청별 DB 라우팅 상태를 설정합니다. (core.routers.ReplicaRouter)
+
+    읽기 요청(GET, HEAD, OPTIONS)의 읽기 쿼리는 replica로 보내고, 요청에서 쓰기가 발생하면 이후 쿼리는 primary로 보냅니다.
+    쓰기 요청과 DATABASE_PRIMARY_ROUTES의 경로, use_primary_db = True인 뷰는 처음부터 primary에서 읽습니다.
+    """
+
+    def call(self, request):
+        request.routing = Routing(pinned=request.method not in ('GET', 'HEAD', 'OPTIONS'))
+        token           = current_routing.set(request.routing)
+
+        try:
+            return self.get_response(request)
+        finally:
+            current_routing.reset(token)
+
+    async def acall(self, request):
+        request.routing = Routing(pinned=request.method not in ('GET', 'HEAD', 'OPTIONS'))
+        token           = current_routing.set(request.routing)
+
+        try:
+            return await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # ASGI에서는 process_view가 __call__과 다른 context에서 실행될 수 있으므로 __call__에서 설정한 객체를 변경합니다.
+        view_class = getattr(view_func, 'view_class', view_func)
+
+        if getattr(view_class, 'use_primary_db', False) or request.resolver_match.route in settings.DATABASE_PRIMARY_ROUTES:
+            request.routing.pinned = True
@@ -0,0 +1,130 @@
+import asyncio, contextlib, contextvars, time
+
+from asgiref.sync      import sync_to_async
+from django.core.cache import cache
+
+from core.deadline   import bound_timeout
+from core.exceptions import TMDBRateLimited
+
+INTERACTIVE = 'interactive'
+BACKGROUND  = 'background'
+
+current_priority = contextvars.ContextVar('current_priority', default=INTERACTIVE)
+
+@contextlib.contextmanager
+def priority(value):
+    """블록 안의 TMDB 호출 우선순위를 지정합니다. (interactive, background)
+
+        with priority(BACKGROUND):
+            refresh_ranking('popular')
+    """
+    token = current_priority.set(value)
+
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+def background(func):
+    """함수 안의 TMDB 호출을 background 우선순위로 실행하는 데코레이터입니다. (관리 명령, 백그라운드 스레드용)"""
+    def wrapper(*args, **kwargs):
+        with priority(BACKGROUND):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+class TokenBucket:
+    """캐시 백엔드에 상태를 저장하는 토큰 버킷입니다. 같은 캐시를 쓰는 워커들이 한도를 공유합니다.
+
+    로컬 메모리 캐시(REDIS_URL 미지정)에서는 워커마다 따로 버킷을 가지므로 한도가 워커 수만큼 늘어납니다. (core.checks 참고)
+
+    토큰은 초당 rate개씩 capacity까지 채워집니다.
+    interactive 요청은 모든 토큰을 사용할 수 있고, background 요청은 reserve 비율만큼의 토큰을 남겨 둡니다.
+    interactive 요청은 max_wait 동안만 토큰을 기다리고, background 요청은 background_max_wait 동안 기다립니다.
+    기다려도 토큰을 얻지 못하면 TMDBRateLimited가 발생합니다.
+
+    Attributes:
+        key: 버킷 상태를 저장할 캐시 키입니다.
+        rate: 초당 채워지는 토큰 수입니다.
+        capacity: 최대 토큰 수입니다. (순간 최대 요청 수)
+        reserve: background 요청이 사용하지 않고 남겨 둘 토큰 비율(0~1)입니다.
+    """
+
+    def __init__(self, key, rate, capacity, reserve=0.3, max_wait=0.2, background_max_wait=30):
+        self.key                 = key
+        self.rate                = rate
+        self.capacity            = capacity
+        self.reserve             = reserve
+        self.max_wait            = max_wait
+        self.background_max_wait = background_max_wait
+
+    def take(self, now):
+        """토큰 하나를 가져옵니다.
+
+        Returns:
+            토큰을 얻으면 0을, 얻지 못하면 다음 토큰까지 기다려야 하는 시간(초)을 반환합니다.
+            다른 워커가 버킷을 갱신 중이면 None을 반환합니다.
+        """
+        lock_key = f'{self.key}:lock'
+
+        if not cache.add(lock_key, True, 1):
+            return None
+
+        try:
+            state   = cache.get(self.key) or {'tokens': self.capacity, 'updated': now}
+            tokens  = min(self.capacity, state['tokens'] + max(0, now-state['updated'])*self.rate)
+            minimum = 1 + (self.capacity*self.reserve if current_priority.get() == BACKGROUND else 0)
+
+            if tokens >= minimum:
+                tokens -= 1
+                wait    = 0
+            else:
+                wait    = (minimum-tokens) / self.rate
+
+            cache.set(self.key, {'tokens': tokens, 'updated': now}, 60)
+
+            return wait
+        finally:
+            cache.delete(lock_key)
+
+    def acquire(self):
+        """토큰을 얻을 때까지 기다립니다. (요청의 남은 처리 시간을 넘겨 기다리지 않습니다)
+
+        Raises:
+            TMDBRateLimited: 우선순위별 최대 대기 시간 안에 토큰을 얻지 못한 경우 발생합니다.
+        """
+        max_wait = self.background_max_wait if current_priority.get() == BACKGROUND else self.max_wait
+        deadline = time.time() + bound_timeout(max_wait)
+
+        while True:
+            now  = time.time()
+            wait = self.take(now)
+
+            if wait == 0:
+                return
+
+            wait = 0.005 if wait is None else wait
+
+            if now + wait > deadline:
+                raise TMDBRateLimited(retry_after=wait)
+
+            time.sleep(wait)
+
+    async def aacquire(self):
+        """acquire의 비동기 버전입니다. 토큰을 기다리는 동안 이벤트 루프를 막지 않습니다."""
+        max_wait = self.background_max_wait if current_priority.get() == BACKGROUND else self.max_wait
+        deadline = time.time() + bound_timeout(max_wait)
+
+        while True:
+            now  = time.time()
+            wait = await sync_to_async(self.take)(now)
+
+            if wait == 0:
+                return
+
+            wait = 0.005 if wait is None else wait
+
+            if now + wait > deadline:
+                raise TMDBRateLimited(retry_after=wait)
+
+            await asyncio.sleep(wait)
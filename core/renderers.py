@@ -0,0 +1,45 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers     import JSONRenderer
+from rest_framework.utils         import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# datetime, date, time은 encoder.default로 넘겨 기존 형식을 유지합니다. (DjangoJSONEncoder는 밀리초까지, orjson은 마이크로초까지 출력)
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+def dumps(data, encoder=DjangoJSONEncoder, indent=None):
+    """data를 UTF-8 JSON bytes로 직렬화합니다.
+
+    orjson이 설치되어 있으면 orjson으로 직렬화합니다.
+    str, int, float, dict, list는 orjson이 직접 처리하고,
+    datetime, date, time, Decimal 등 나머지 타입은 encoder.default로 변환하므로 기존 응답 형식이 유지됩니다.
+    (JsonResponse는 Decimal을 문자열로, DRF Response는 숫자로 내려줍니다.)
+
+    Args:
+        data: 직렬화할 객체입니다.
+        encoder: orjson이 처리하지 못하는 타입에 사용할 json.JSONEncoder 클래스입니다.
+        indent: 들여쓰기 여부입니다. orjson은 2칸 들여쓰기만 지원합니다.
+    """
+    if orjson is None:
+        return json.dumps(data, cls=encoder, ensure_ascii=False, indent=indent, separators=None if indent else (',', ':')).encode('utf-8')
+
+    option = ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else ORJSON_OPTIONS
+
+    return orjson.dumps(data, default=encoder().default, option=option)
+
+class FastJSONRenderer(JSONRenderer):
+    """orjson 기반 DRF JSON 렌더러입니다."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent           = self.get_indent(accepted_media_type, renderer_context)
+
+        return dumps(data, encoder=encoders.JSONEncoder, indent=indent)
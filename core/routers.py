@@ -0,0 +1,83 @@
+import contextlib, contextvars, random
+
+from django.conf import settings
+from django.db   import DEFAULT_DB_ALIAS, connections
+
+current_routing = contextvars.ContextVar('current_routing', default=None)
+
+class Routing:
+    """요청 하나의 DB 라우팅 상태를 저장합니다.
+
+    Attributes:
+        pinned: True이면 읽기도 primary로 보냅니다. 요청에서 쓰기가 발생하면 True가 됩니다.
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+
+@contextlib.contextmanager
+def routing(pinned=False):
+    """블록 안의 읽기 쿼리를 replica로 보냅니다. (요청은 DatabaseRoutingMiddleware가 설정합니다)
+
+        with routing():
+            Review.objects.filter(movie_id=movie_id)   # replica
+            review.save()                              # primary, 이후 읽기도 primary
+    """
+    token = current_routing.set(Routing(pinned))
+
+    try:
+        yield current_routing.get()
+    finally:
+        current_routing.reset(token)
+
+def pin_to_primary():
+    """현재 요청의 남은 읽기를 primary로 보냅니다."""
+    state = current_routing.get()
+
+    if state is not None:
+        state.pinned = True
+
+def get_replicas():
+    return [alias for alias in settings.DATABASE_REPLICAS if alias in connections.settings]
+
+class ReplicaRouter:
+    """읽기는 replica(DATABASE_REPLICAS)로, 쓰기는 primary(default)로 보내는 DB router입니다.
+
+    다음의 경우에는 읽기도 primary로 보냅니다.
+
+    - 요청 밖(관리 명령, 백그라운드 스레드)의 쿼리
+    - 쓰기가 발생한 요청의 이후 쿼리 (read-your-writes)
+    - primary의 트랜잭션 안의 쿼리
+    - DATABASE_PRIMARY_ROUTES의 경로나 use_primary_db = True인 뷰 (DatabaseRoutingMiddleware)
+    """
+
+    def db_for_read(self, model, **hints):
+        state = current_routing.get()
+
+        if state is None or state.pinned or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        replicas = get_replicas()
+
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replica는 primary와 같은 데이터이므로 어느 DB에서 읽은 객체끼리도 관계를 허용합니다.
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # replica는 primary의 복제로 스키마를 받습니다.
+        if db in get_replicas():
+            return False
+
+        return None
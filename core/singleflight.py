@@ -0,0 +1,206 @@
+import asyncio, pickle, threading, time, weakref
+
+from django.core.cache import cache
+
+from core.deadline   import bound_timeout
+from core.exceptions import TMDBError, TMDBTimeout
+
+def get_shared_error(error):
+    """다른 워커에 캐시로 전달할 예외를 반환합니다.
+
+    기다리던 워커가 같은 예외 클래스(같은 status, message, retry_after)를 다시 발생시키도록 예외 객체를 그대로 저장합니다.
+    pickle할 수 없는 예외는 메시지만 담은 TMDBError로 바꿉니다.
+    """
+    try:
+        pickle.dumps(error)
+    except Exception:
+        return TMDBError(str(error))
+
+    return error
+
+class Call:
+    def __init__(self):
+        self.event  = threading.Event()
+        self.result = None
+        self.error  = None
+
+class SingleFlight:
+    """같은 키에 대한 동시 요청을 하나의 호출로 합칩니다.
+
+    먼저 도착한 요청(leader)만 호출하고 나머지 요청은 결과를 기다려 같은 결과를 받습니다.
+    호출이 실패하면 기다리던 요청 모두에 같은 예외가 전달됩니다.
+    결과 객체는 요청 간에 공유되므로 수정하지 않아야 합니다.
+
+    shared=True이면 캐시 락으로 워커 프로세스 간에도 호출을 합칩니다.
+    다른 워커가 호출 중이면 결과가 캐시에 기록될 때까지 기다리고,
+    그 워커가 락을 남긴 채 사라지면 락 만료 후 직접 호출합니다.
+
+    Attributes:
+        timeout: 결과를 기다리는 최대 시간(초)입니다. 요청의 남은 처리 시간이 더 짧으면 그 시간까지만 기다립니다.
+            초과하면 TMDBTimeout이 발생합니다.
+        shared: 워커 간 호출 합치기 사용 여부입니다.
+        result_timeout: 다른 워커에 결과를 전달하기 위해 캐시에 보관하는 시간(초)입니다.
+        poll_interval: 다른 워커의 결과를 확인하는 간격(초)입니다.
+    """
+
+    def __init__(self, timeout=15, shared=False, result_timeout=5, poll_interval=0.05):
+        self.timeout        = timeout
+        self.shared         = shared
+        self.result_timeout = result_timeout
+        self.poll_interval  = poll_interval
+        self.lock           = threading.Lock()
+        self.calls          = {}
+
+    def do(self, key, fn):
+        """key에 대한 호출이 진행 중이면 그 결과를, 아니면 fn()을 호출한 결과를 반환합니다.
+
+        Returns:
+            (결과, leader 여부) 튜플을 반환합니다.
+        """
+        with self.lock:
+            call   = self.calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self.calls[key] = Call()
+
+        if not leader:
+            if not call.event.wait(bound_timeout(self.timeout)):
+                raise TMDBTimeout(f'timed out waiting for in-flight request : {key}')
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result, False
+
+        try:
+            call.result, leader = self.do_shared(key, fn) if self.shared else (fn(), True)
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+            call.event.set()
+
+        return call.result, leader
+
+    def do_shared(self, key, fn):
+        lock_key   = f'single_flight_lock:{key}'
+        result_key = f'single_flight_result:{key}'
+
+        if cache.add(lock_key, True, self.timeout):
+            try:
+                result = fn()
+            except Exception as error:
+                cache.set(result_key, {'error': get_shared_error(error)}, self.result_timeout)
+                raise
+            else:
+                cache.set(result_key, {'result': result}, self.result_timeout)
+            finally:
+                cache.delete(lock_key)
+
+            return result, True
+
+        deadline = time.monotonic() + bound_timeout(self.timeout)
+
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+
+            entry = cache.get(result_key)
+
+            if entry is not None:
+                if 'error' in entry:
+                    raise entry['error']
+
+                return entry['result'], False
+
+            if cache.get(lock_key) is None:
+                return fn(), True
+
+        raise TMDBTimeout(f'timed out waiting for in-flight request : {key}')
+
+class AsyncSingleFlight:
+    """SingleFlight의 비동기 버전입니다.
+
+    이벤트 루프 안에서 같은 키에 대한 동시 호출을 하나로 합칩니다.
+    shared=True이면 SingleFlight와 같은 캐시 락으로 워커 간에도 호출을 합칩니다.
+    """
+
+    def __init__(self, timeout=15, shared=False, result_timeout=5, poll_interval=0.05):
+        self.timeout        = timeout
+        self.shared         = shared
+        self.result_timeout = result_timeout
+        self.poll_interval  = poll_interval
+        self.calls          = weakref.WeakKeyDictionary()
+
+    async def do(self, key, fn):
+        """key에 대한 호출이 진행 중이면 그 결과를, 아니면 await fn()의 결과를 반환합니다.
+
+        Returns:
+            (결과, leader 여부) 튜플을 반환합니다.
+        """
+        loop   = asyncio.get_running_loop()
+        calls  = self.calls.setdefault(loop, {})
+        future = calls.get(key)
+
+        if future is not None:
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), bound_timeout(self.timeout)), False
+            except asyncio.TimeoutError:
+                raise TMDBTimeout(f'timed out waiting for in-flight request : {key}')
+
+        future = calls[key] = loop.create_future()
+
+        try:
+            result, leader = await self.do_shared(key, fn) if self.shared else (await fn(), True)
+        except asyncio.CancelledError:
+            future.set_exception(TMDBError(f'in-flight request cancelled : {key}'))
+            future.exception()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del calls[key]
+
+        return result, leader
+
+    async def do_shared(self, key, fn):
+        lock_key   = f'single_flight_lock:{key}'
+        result_key = f'single_flight_result:{key}'
+
+        if await cache.aadd(lock_key, True, self.timeout):
+            try:
+                result = await fn()
+            except Exception as error:
+                await cache.aset(result_key, {'error': get_shared_error(error)}, self.result_timeout)
+                raise
+            else:
+                await cache.aset(result_key, {'result': result}, self.result_timeout)
+            finally:
+                await cache.adelete(lock_key)
+
+            return result, True
+
+        deadline = time.monotonic() + bound_timeout(self.timeout)
+
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+
+            entry = await cache.aget(result_key)
+
+            if entry is not None:
+                if 'error' in entry:
+                    raise entry['error']
+
+                return entry['result'], False
+
+            if await cache.aget(lock_key) is None:
+                return await fn(), True
+
+        raise TMDBTimeout(f'timed out waiting for in-flight request : {key}')
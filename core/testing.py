@@ -0,0 +1,85 @@
+import json, os
+
+from django.conf   import settings
+from django.db     import connections
+from unittest.mock import patch
+
+from core.tmdb          import ReplayTransport, tmdb_helper
+from core.tmdb_fixtures import FixtureStore
+
+PERF_BUDGET_FILE = os.path.join(settings.BASE_DIR, 'perf_budgets.json')
+
+UPDATE_PERF_BUDGETS = os.environ.get('UPDATE_PERF_BUDGETS') == '1'
+
+def replay_tmdb(directory=settings.TMDB_FIXTURE_DIR):
+    """TMDB 호출을 기록된 fixture로 대체합니다. (데코레이터, 컨텍스트 매니저로 사용)
+
+    기록되지 않은 호출은 TMDBFixtureNotFound를 발생시키므로 테스트 중 네트워크에 접근하지 않습니다.
+    """
+    return patch.object(tmdb_helper, 'transport', ReplayTransport(FixtureStore(directory)))
+
+def outside_transaction(test, side_effect=None, return_value=None):
+    """외부 HTTP 호출(TMDB, S3, 소셜 로그인) mock의 side_effect로 사용합니다.
+
+    호출 시점에 열린 트랜잭션이 있으면 테스트를 실패시킵니다.
+    TestCase는 테스트 전체를 트랜잭션으로 감싸므로 TransactionTestCase에서 사용합니다.
+
+        @patch('core.tmdb.requests.get')
+        def test_...(self, mocked_requests):
+            mocked_requests.side_effect = outside_transaction(self, return_value=MockMovieResponse)
+    """
+    def call(*args, **kwargs):
+        aliases = [connection.alias for connection in connections.all() if connection.in_atomic_block]
+
+        test.assertEqual(aliases, [], 'outbound HTTP call made while a transaction is open')
+
+        return side_effect(*args, **kwargs) if side_effect else return_value
+
+    return call
+
+def load_budgets():
+    if not os.path.exists(PERF_BUDGET_FILE):
+        return {}
+
+    with open(PERF_BUDGET_FILE) as f:
+        return json.load(f)
+
+def save_budget(name, usage):
+    budgets       = load_budgets()
+    budgets[name] = usage
+
+    with open(PERF_BUDGET_FILE, 'w') as f:
+        json.dump(budgets, f, ensure_ascii=False, indent=4, sort_keys=True)
+        f.write('\n')
+
+class PerformanceBudgetMixin:
+    """요청당 TMDB 호출 수와 DB 쿼리 수를 perf_budgets.json의 기준값과 비교합니다.
+
+    기준값은 `{METHOD} {URL 패턴}[ {scenario}]` 키로 저장되며,
+    UPDATE_PERF_BUDGETS=1 환경변수로 테스트를 실행하면 측정값으로 다시 기록합니다.
+
+        UPDATE_PERF_BUDGETS=1 python manage.py test
+    """
+
+    def assertWithinBudget(self, response, scenario=None):
+        request = response.wsgi_request
+        usage   = {
+            'tmdb_calls' : request.metrics.tmdb_calls,
+            'db_queries' : request.metrics.db_queries,
+        }
+        name    = f'{request.method} {request.resolver_match.route}'
+
+        if scenario:
+            name += f' {scenario}'
+
+        if UPDATE_PERF_BUDGETS:
+            save_budget(name, usage)
+            return
+
+        budget = load_budgets().get(name)
+
+        if budget is None:
+            self.fail(f'No performance budget for "{name}". Run the tests with UPDATE_PERF_BUDGETS=1 to record it.')
+
+        for key, value in usage.items():
+            self.assertLessEqual(value, budget[key], f'"{name}" exceeded its {key} budget ({value} > {budget[key]})')
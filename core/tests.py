@@ -1,3 +1,757 @@
-from django.test import TestCase
+import asyncio, datetime, decimal, gzip, json, multiprocessing, os, requests, sys, tempfile, threading, time, unittest
 
-# Create your tests here.
+from django.core.cache         import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.db                 import connections
+from django.test               import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils         import CaptureQueriesContext
+from rest_framework.renderers  import JSONRenderer
+from unittest.mock     import AsyncMock, MagicMock, patch
+
+from core.checks         import check_shared_cache
+from core.circuitbreaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers
+from core.db.config      import configure_databases
+from core.db.pool        import ConnectionPool, PoolTimeout
+from core.deadline       import current_deadline
+from core.exceptions     import TMDBCircuitOpen, TMDBError, TMDBRateLimited, TMDBTimeout
+from core.http           import JsonResponse
+from core.metrics        import collect
+from core.middleware     import CompressionMiddleware, DatabaseRoutingMiddleware, DeadlineMiddleware, TMDBErrorMiddleware
+from core.ratelimit      import BACKGROUND, TokenBucket, priority
+from core.renderers      import FastJSONRenderer
+from core.routers        import ReplicaRouter, current_routing, get_replicas, routing
+from core.singleflight   import AsyncSingleFlight, SingleFlight
+from core.testing        import replay_tmdb
+from core.tmdb           import RecordTransport, tmdb_helper
+from core.tmdb_fixtures  import FixtureStore, TMDBFixtureNotFound
+from movies.models       import Genre, RankingSnapshot
+
+class RendererTest(SimpleTestCase):
+    data = {
+        'rating'       : decimal.Decimal('4.5'),
+        'watched_date' : datetime.date(2022, 10, 26),
+        'watched_time' : datetime.time(19, 43, 14),
+        'title'        : '리뷰',
+    }
+    
+    def test_json_response(self):
+        
+        response = JsonResponse(self.data)
+        
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), {
+            'rating'       : '4.5',
+            'watched_date' : '2022-10-26',
+            'watched_time' : '19:43:14',
+            'title'        : '리뷰',
+        })
+    
+    def test_json_response_safe(self):
+        
+        with self.assertRaises(TypeError):
+            JsonResponse([1, 2])
+    
+    def test_fast_json_renderer(self):
+        
+        content = FastJSONRenderer().render(self.data)
+        
+        self.assertEqual(json.loads(content)['rating'], 4.5)
+        self.assertEqual(json.loads(content)['watched_time'], '19:43:14')
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+    
+    def test_datetime_milliseconds(self):
+        data = {
+            'created_at'   : datetime.datetime(2022, 10, 26, 19, 43, 14, 123456, tzinfo=datetime.timezone.utc),
+            'watched_time' : datetime.time(19, 43, 14, 123456),
+        }
+        
+        self.assertEqual(json.loads(JsonResponse(data).content), {'created_at': '2022-10-26T19:43:14.123Z', 'watched_time': '19:43:14.123'})
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+class CompressionMiddlewareTest(SimpleTestCase):
+    data = {'result': [{'title': '파이트 클럽', 'poster': '/fCayJrkfRaCRCTh8GqN30f8oyQF.jpg'}] * 100}
+    
+    def setUp(self):
+        cache.clear()
+    
+    def get_response(self, etag=None, cache_control=None, **headers):
+        def view(request):
+            response = JsonResponse(self.data)
+            
+            if etag:
+                response['ETag'] = etag
+            if cache_control:
+                response['Cache-Control'] = cache_control
+            
+            return response
+        
+        return CompressionMiddleware(view)(RequestFactory().get('/', **headers))
+    
+    def test_gzip_on_the_fly(self):
+        
+        response = self.get_response(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), self.data)
+    
+    def test_precompressed_payload_served(self):
+        
+        response = self.get_response(etag='"etag"', HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertEqual(response['ETag'], 'W/"etag"')
+        self.assertEqual(cache.get('compressed:gzip:"etag"'), response.content)
+        
+        cache.set('compressed:gzip:"etag"', gzip.compress(b'{}'))
+        response = self.get_response(etag='"etag"', HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertEqual(gzip.decompress(response.content), b'{}')
+    
+    def test_private_response_not_stored(self):
+        
+        response = self.get_response(etag='"etag"', cache_control='private', HTTP_ACCEPT_ENCODING='gzip')
+        
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIsNone(cache.get('compressed:gzip:"etag"'))
+    
+    def test_identity(self):
+        
+        response = self.get_response(HTTP_ACCEPT_ENCODING='gzip;q=0')
+        
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(json.loads(response.content), self.data)
+
+class DualModeMiddlewareTest(SimpleTestCase):
+    
+    def test_asgi_chain_not_adapted(self):
+        
+        with override_settings(DEBUG=True), patch('django.core.handlers.base.logger') as mocked_logger:
+            handler = ASGIHandler()
+        
+        self.assertTrue(asyncio.iscoroutinefunction(handler._middleware_chain))
+        self.assertEqual([call.args for call in mocked_logger.debug.call_args_list if 'adapted' in call.args[0]], [])
+        self.assertTrue(all(asyncio.iscoroutinefunction(method) for method in handler._view_middleware))
+    
+    def test_async_compression(self):
+        cache.clear()
+        
+        async def view(request):
+            response         = JsonResponse(CompressionMiddlewareTest.data)
+            response['ETag'] = '"etag"'
+            
+            return response
+        
+        middleware = CompressionMiddleware(view)
+        response   = asyncio.run(middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')))
+        
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual(json.loads(gzip.decompress(response.content)), CompressionMiddlewareTest.data)
+        self.assertEqual(cache.get('compressed:gzip:"etag"'), response.content)
+    
+    def test_async_routing_and_deadline(self):
+        request                = RequestFactory().post('/user/list')
+        request.resolver_match = MagicMock(route='user/list')
+        
+        async def view(request):
+            await routing_middleware.process_view(request, MagicMock(view_class=type('View', (), {})), (), {})
+            await deadline_middleware.process_view(request, MagicMock(), (), {})
+            
+            return current_routing.get().pinned, current_deadline.get() is request.deadline
+        
+        routing_middleware  = DatabaseRoutingMiddleware(view)
+        deadline_middleware = DeadlineMiddleware(routing_middleware)
+        
+        self.assertEqual(asyncio.run(deadline_middleware(request)), (True, True))
+        self.assertIsNone(current_routing.get(None))
+
+class MetricsTest(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        RankingSnapshot.objects.create(name='popular', payload=[])
+    
+    def test_metrics_by_route(self):
+        
+        self.client.get('/movie/popular')
+        
+        response = self.client.get('/metrics')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE myview_request_duration_seconds histogram', response.content.decode())
+        self.assertIn('myview_db_queries_bucket{le="1",route="movie/popular"}', response.content.decode())
+        self.assertIn('myview_tmdb_calls_count{route="movie/popular"}', response.content.decode())
+    
+    def test_stale_worker_files_ignored(self):
+        directory = tempfile.mkdtemp()
+        key       = json.dumps(['myview_cache_hits_total', {'cache': 'tmdb', 'route': 'stale-worker'}], sort_keys=True)
+        worker    = {'histograms': {}, 'counters': {key: 1}}
+        
+        for pid in [2**22+1, os.getppid()]:
+            with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+                json.dump(worker, f)
+        
+        os.utime(os.path.join(directory, f'{os.getppid()}.json'), (0, 0))
+        
+        with patch('core.metrics.METRICS_DIR', directory):
+            histograms, counters = collect()
+        
+        self.assertNotIn(key, counters)
+        self.assertEqual(os.listdir(directory), [f'{os.getpid()}.json'])
+    
+    def test_metrics_internal_only(self):
+        
+        response = self.client.get('/metrics', REMOTE_ADDR='10.0.0.1')
+        
+        self.assertEqual(response.status_code, 404)
+
+class TMDBFixtureTest(SimpleTestCase):
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+    
+    @patch('core.tmdb.requests.get')
+    def test_record_and_replay(self, mocked_requests):
+        mocked_requests.return_value.json.return_value = {'id': 550, 'title': '파이트 클럽'}
+        
+        with patch.object(tmdb_helper, 'transport', RecordTransport(FixtureStore(self.directory))):
+            tmdb_helper.get('/movie/550', language='ko-KR')
+        
+        mocked_requests.reset_mock()
+        
+        with replay_tmdb(self.directory):
+            self.assertEqual(tmdb_helper.get('/movie/550', language='ko-KR'), {'id': 550, 'title': '파이트 클럽'})
+            
+            with self.assertRaises(TMDBFixtureNotFound):
+                tmdb_helper.get('/movie/550', language='en-US')
+        
+        mocked_requests.assert_not_called()
+    
+    def test_missing_fixture_error_response(self):
+        cache.clear()
+        
+        with replay_tmdb(self.directory), patch.object(tmdb_helper, 'breakers', CircuitBreakers(failure_threshold=1, reset_timeout=60)):
+            for _ in range(2):
+                with self.assertRaises(TMDBFixtureNotFound) as context:
+                    tmdb_helper.get('/movie/550')
+            
+            self.assertEqual(tmdb_helper.breakers.get('movie').state, CLOSED)
+        
+        response = TMDBErrorMiddleware(None).process_exception(RequestFactory().get('/movie/550'), context.exception)
+        
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(json.loads(response.content), {'message': 'TMDB_FIXTURE_NOT_FOUND'})
+    
+    def test_api_key_not_stored(self):
+        store = FixtureStore(self.directory)
+        
+        store.save('/movie/550', {'api_key': 'secret', 'language': 'ko'}, {'id': 550})
+        
+        self.assertEqual(store.load('/movie/550', {'language': 'ko'}), {'id': 550})
+        
+        with gzip.open(store.get_path('/movie/550', {'language': 'ko'}), 'rt') as f:
+            self.assertNotIn('secret', f.read())
+
+class SingleFlightTest(SimpleTestCase):
+    
+    def setUp(self):
+        cache.clear()
+        
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls   = 0
+    
+    def fetch(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        return {'id': 550}
+    
+    def fetch_error(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(5)
+        raise TMDBError('upstream error')
+    
+    def run_concurrently(self, single_flight, fn, count=5):
+        results = []
+        
+        def call():
+            try:
+                results.append(single_flight.do('/movie/550?', fn))
+            except Exception as error:
+                results.append(error)
+        
+        leader = threading.Thread(target=call)
+        leader.start()
+        self.started.wait(5)
+        
+        followers = [threading.Thread(target=call) for _ in range(count-1)]
+        
+        for thread in followers:
+            thread.start()
+        
+        time.sleep(0.1)
+        
+        self.release.set()
+        
+        for thread in [leader, *followers]:
+            thread.join()
+        
+        return results
+    
+    def test_concurrent_calls_coalesced(self):
+        
+        results = self.run_concurrently(SingleFlight(), self.fetch)
+        
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([body for body, _ in results], [{'id': 550}]*5)
+        self.assertEqual(sorted(leader for _, leader in results), [False]*4+[True])
+    
+    def test_error_propagated_to_waiters(self):
+        
+        results = self.run_concurrently(SingleFlight(), self.fetch_error)
+        
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(isinstance(result, TMDBError) for result in results))
+    
+    def test_waiter_timeout(self):
+        single_flight = SingleFlight(timeout=0.05)
+        
+        leader = threading.Thread(target=single_flight.do, args=('/movie/550?', self.fetch))
+        leader.start()
+        self.started.wait(5)
+        
+        with self.assertRaises(TMDBTimeout):
+            single_flight.do('/movie/550?', self.fetch)
+        
+        self.release.set()
+        leader.join()
+        
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(single_flight.calls, {})
+    
+    def test_shared_waits_for_other_worker(self):
+        single_flight = SingleFlight(timeout=1, shared=True, poll_interval=0.01)
+        
+        cache.add('single_flight_lock:/movie/550?', True)
+        threading.Timer(0.05, cache.set, args=('single_flight_result:/movie/550?', {'result': {'id': 550}})).start()
+        
+        self.assertEqual(single_flight.do('/movie/550?', self.fetch), ({'id': 550}, False))
+        self.assertEqual(self.calls, 0)
+    
+    def test_shared_error_from_other_worker(self):
+        single_flight = SingleFlight(timeout=1, shared=True, poll_interval=0.01)
+        
+        def fetch_rate_limited():
+            raise TMDBRateLimited(retry_after=3)
+        
+        with self.assertRaises(TMDBRateLimited):
+            single_flight.do('/movie/550?', fetch_rate_limited)
+        
+        cache.add('single_flight_lock:/movie/550?', True)
+        
+        with self.assertRaises(TMDBRateLimited) as context:
+            single_flight.do('/movie/550?', self.fetch)
+        
+        self.assertEqual((context.exception.status, context.exception.retry_after), (503, 3))
+        self.assertEqual(self.calls, 0)
+    
+    def test_async_shared_error_from_other_worker(self):
+        single_flight = AsyncSingleFlight(timeout=1, shared=True, poll_interval=0.01)
+        
+        cache.add('single_flight_lock:/movie/550?', True)
+        cache.set('single_flight_result:/movie/550?', {'error': TMDBTimeout('upstream timeout')})
+        
+        async def fetch():
+            return {'id': 550}
+        
+        with self.assertRaises(TMDBTimeout) as context:
+            asyncio.run(single_flight.do('/movie/550?', fetch))
+        
+        self.assertEqual(context.exception.status, 504)
+    
+    def test_shared_lock_released(self):
+        single_flight = SingleFlight(timeout=1, shared=True)
+        self.release.set()
+        
+        self.assertEqual(single_flight.do('/movie/550?', self.fetch), ({'id': 550}, True))
+        self.assertIsNone(cache.get('single_flight_lock:/movie/550?'))
+    
+    def test_async_concurrent_calls_coalesced(self):
+        calls = []
+        
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'id': 550}
+        
+        async def run():
+            single_flight = AsyncSingleFlight()
+            
+            return await asyncio.gather(*[single_flight.do('/movie/550?', fetch) for _ in range(5)])
+        
+        results = asyncio.run(run())
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([body for body, _ in results], [{'id': 550}]*5)
+        self.assertEqual(sorted(leader for _, leader in results), [False]*4+[True])
+    
+    def test_async_error_propagated_to_waiters(self):
+        
+        async def fetch():
+            await asyncio.sleep(0.05)
+            raise TMDBError('upstream error')
+        
+        async def run():
+            single_flight = AsyncSingleFlight()
+            
+            return await asyncio.gather(*[single_flight.do('/movie/550?', fetch) for _ in range(3)], return_exceptions=True)
+        
+        self.assertTrue(all(isinstance(result, TMDBError) for result in asyncio.run(run())))
+    
+    def test_request_key(self):
+        
+        self.assertEqual(
+            tmdb_helper.get_request_key('/movie/550', language='ko-KR', page=1),
+            tmdb_helper.get_request_key('/movie/550', page=1, language='ko-KR'),
+        )
+
+class RateLimitTest(TestCase):
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_fail_fast_when_exhausted(self):
+        bucket = TokenBucket('test_bucket', rate=1, capacity=2, max_wait=0)
+        
+        bucket.acquire()
+        bucket.acquire()
+        
+        with self.assertRaises(TMDBRateLimited) as context:
+            bucket.acquire()
+        
+        self.assertGreater(context.exception.retry_after, 0)
+    
+    def test_background_keeps_reserve(self):
+        bucket = TokenBucket('test_bucket', rate=0.01, capacity=10, reserve=0.5, background_max_wait=0)
+        
+        with priority(BACKGROUND):
+            for _ in range(5):
+                bucket.acquire()
+            
+            with self.assertRaises(TMDBRateLimited):
+                bucket.acquire()
+        
+        for _ in range(5):
+            bucket.acquire()
+    
+    @patch('core.tmdb.requests.get')
+    def test_upstream_rate_limit(self, mocked_requests):
+        mocked_requests.return_value.json.return_value = {'success': False, 'status_code': 25, 'status_message': 'Your request count is over the allowed limit.'}
+        
+        with self.assertRaises(TMDBRateLimited):
+            tmdb_helper.get('/movie/550')
+    
+    @patch('core.tmdb.httpx.AsyncClient.get')
+    def test_degraded_response(self, mocked_requests):
+        rate_limiter = MagicMock(aacquire=AsyncMock(side_effect=TMDBRateLimited(retry_after=2.5)))
+        
+        with patch.object(tmdb_helper, 'rate_limiter', rate_limiter):
+            response = self.client.get('/movie', {'q': 'fight'})
+        
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'message': 'TMDB_RATE_LIMITED'})
+        self.assertEqual(response['Retry-After'], '3')
+        mocked_requests.assert_not_called()
+
+def drain_bucket(bucket, now, count):
+    """프로세스 하나에서 토큰을 count번 요청하고, 얻은 토큰 수를 종료 코드로 반환합니다."""
+    sys.exit(sum(1 for _ in range(count) if bucket.take(now) == 0))
+
+class SharedRateLimitTest(SimpleTestCase):
+    
+    def get_shared_cache(self):
+        if os.environ.get('REDIS_URL'):
+            return {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': os.environ['REDIS_URL']}
+        
+        return {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()}
+    
+    @unittest.skipUnless(hasattr(os, 'fork'), 'fork is not available')
+    def test_bucket_shared_between_processes(self):
+        bucket  = TokenBucket('test_shared_bucket', rate=0.001, capacity=5)
+        now     = time.time()
+        context = multiprocessing.get_context('fork')
+        taken   = []
+        
+        with override_settings(CACHES={'default': self.get_shared_cache()}):
+            cache.delete('test_shared_bucket')
+            
+            for _ in range(2):
+                process = context.Process(target=drain_bucket, args=(bucket, now, 5))
+                process.start()
+                process.join()
+                
+                taken.append(process.exitcode)
+        
+        self.assertEqual(taken, [5, 0])
+    
+    def test_local_cache_rejected(self):
+        
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}, CACHE_ALLOW_LOCAL=False):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['core.E001'])
+        
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}, CACHE_ALLOW_LOCAL=True):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['core.W001'])
+        
+        with override_settings(CACHES={'default': self.get_shared_cache()}):
+            self.assertEqual(check_shared_cache(None), [])
+
+class CircuitBreakerTest(SimpleTestCase):
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_open_after_consecutive_failures(self):
+        breaker = CircuitBreaker('movie', failure_threshold=2, reset_timeout=60)
+        
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        
+        self.assertEqual(breaker.state, OPEN)
+        
+        with self.assertRaises(TMDBCircuitOpen):
+            breaker.before_call()
+    
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker('movie', failure_threshold=1, reset_timeout=0)
+        
+        breaker.record_failure()
+        breaker.before_call()
+        
+        self.assertEqual(breaker.state, HALF_OPEN)
+        
+        breaker.record_failure()
+        
+        self.assertEqual(breaker.state, OPEN)
+        
+        breaker.before_call()
+        breaker.record_success()
+        
+        self.assertEqual(breaker.state, CLOSED)
+    
+    @patch('core.tmdb.requests.get')
+    def test_stale_served_while_open(self, mocked_requests):
+        mocked_requests.return_value.json.return_value = {'id': 550, 'title': '파이트 클럽'}
+        
+        with patch.object(tmdb_helper, 'breakers', CircuitBreakers(failure_threshold=2, reset_timeout=60)):
+            tmdb_helper.get('/movie/550')
+            
+            mocked_requests.side_effect = requests.ConnectionError('connection refused')
+            
+            for _ in range(3):
+                self.assertEqual(tmdb_helper.get('/movie/550'), {'id': 550, 'title': '파이트 클럽'})
+            
+            self.assertEqual(mocked_requests.call_count, 3)
+            
+            with self.assertRaises(TMDBCircuitOpen):
+                tmdb_helper.get('/movie/551')
+            
+            self.assertEqual(mocked_requests.call_count, 3)
+    
+    @patch('core.tmdb.requests.get')
+    def test_server_error_payload(self, mocked_requests):
+        mocked_requests.return_value.json.return_value = {'success': False, 'status_code': 11, 'status_message': 'Internal error.'}
+        
+        with self.assertRaises(TMDBError):
+            tmdb_helper.get('/movie/550')
+
+class DatabasePoolTest(SimpleTestCase):
+    
+    def test_connection_reused(self):
+        connect = MagicMock(side_effect=lambda: MagicMock())
+        pool    = ConnectionPool('test', connect, max_size=2)
+        
+        connection = pool.checkout()
+        pool.checkin(connection)
+        
+        self.assertIs(pool.checkout(), connection)
+        self.assertEqual(connect.call_count, 1)
+        connection.rollback.assert_called_once()
+    
+    def test_timeout_when_exhausted(self):
+        pool = ConnectionPool('test', MagicMock, max_size=1, timeout=0.05)
+        
+        connection = pool.checkout()
+        
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+        
+        threading.Timer(0.01, pool.checkin, args=(connection,)).start()
+        pool.timeout = 1
+        
+        self.assertIs(pool.checkout(), connection)
+    
+    def test_unusable_connection_discarded(self):
+        connect = MagicMock(side_effect=lambda: MagicMock())
+        pool    = ConnectionPool('test', connect, max_size=1, validate=lambda connection: False)
+        
+        connection = pool.checkout()
+        pool.checkin(connection)
+        
+        self.assertIsNot(pool.checkout(), connection)
+        connection.close.assert_called_once()
+        self.assertEqual(pool.size, 1)
+    
+    def test_failed_rollback_discarded(self):
+        pool       = ConnectionPool('test', MagicMock, max_size=1)
+        connection = pool.checkout()
+        
+        connection.rollback.side_effect = Exception('server has gone away')
+        pool.checkin(connection)
+        
+        self.assertEqual(pool.idle, [])
+        self.assertEqual(pool.size, 0)
+    
+    @patch.dict('os.environ', {'DB_POOL_SIZE': '4', 'DB_CONN_MAX_AGE': '120'})
+    def test_configure_databases(self):
+        databases = configure_databases({
+            'default' : {'ENGINE': 'django.db.backends.mysql', 'NAME': 'myview'},
+            'other'   : {'ENGINE': 'django.db.backends.mysql', 'NAME': 'myview', 'POOL': None},
+            'sqlite'  : {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'myview'},
+        })
+        
+        self.assertEqual(databases['default']['ENGINE'], 'core.db.backends.mysql')
+        self.assertEqual(databases['default']['POOL']['MAX_SIZE'], 4)
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 0)
+        self.assertTrue(databases['default']['CONN_HEALTH_CHECKS'])
+        self.assertEqual(databases['other']['CONN_MAX_AGE'], 120)
+        self.assertFalse(databases['default']['ATOMIC_REQUESTS'])
+        self.assertEqual(databases['sqlite'], {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'myview', 'ATOMIC_REQUESTS': False})
+
+class DatabaseHealthCheckTest(SimpleTestCase):
+    
+    def get_wrapper(self, **settings_dict):
+        from core.db.backends.mysql.base import DatabaseWrapper
+        
+        wrapper = DatabaseWrapper({
+            'ENGINE'             : 'core.db.backends.mysql',
+            'NAME'               : 'myview',
+            'USER'               : '',
+            'PASSWORD'           : '',
+            'HOST'               : '',
+            'PORT'               : '',
+            'OPTIONS'            : {},
+            'TIME_ZONE'          : None,
+            'AUTOCOMMIT'         : True,
+            'ATOMIC_REQUESTS'    : False,
+            'CONN_MAX_AGE'       : 60,
+            'CONN_HEALTH_CHECKS' : True,
+            **settings_dict,
+        }, alias='health_check_test')
+        
+        wrapper.connection = MagicMock()
+        wrapper.autocommit = True
+        
+        return wrapper
+    
+    def test_dead_connection_replaced_once_per_request(self):
+        wrapper    = self.get_wrapper()
+        connection = wrapper.connection
+        
+        with patch.object(wrapper, 'is_usable', return_value=False) as mocked_usable, \
+             patch.object(wrapper, 'connect') as mocked_connect:
+            wrapper.ensure_connection()
+            
+            connection.close.assert_called_once()
+            mocked_connect.assert_called_once()
+            
+            wrapper.connection = MagicMock()
+            wrapper.ensure_connection()
+            
+            self.assertEqual(mocked_usable.call_count, 1)
+            
+            wrapper.close_if_unusable_or_obsolete()
+            wrapper.ensure_connection()
+            
+            self.assertEqual(mocked_usable.call_count, 2)
+    
+    def test_health_checks_disabled(self):
+        wrapper = self.get_wrapper(CONN_HEALTH_CHECKS=False)
+        
+        with patch.object(wrapper, 'is_usable') as mocked_usable:
+            wrapper.ensure_connection()
+        
+        mocked_usable.assert_not_called()
+
+@patch('core.routers.get_replicas', MagicMock(return_value=['replica1']))
+class ReplicaRouterTest(SimpleTestCase):
+    
+    def setUp(self):
+        self.router = ReplicaRouter()
+    
+    def test_primary_outside_request(self):
+        self.assertEqual(self.router.db_for_read(Genre), 'default')
+    
+    def test_read_your_writes(self):
+        with routing():
+            self.assertEqual(self.router.db_for_read(Genre), 'replica1')
+            self.assertEqual(self.router.db_for_write(Genre), 'default')
+            self.assertEqual(self.router.db_for_read(Genre), 'default')
+        
+        with routing():
+            self.assertEqual(self.router.db_for_read(Genre), 'replica1')
+    
+    def test_no_migrations_on_replica(self):
+        self.assertFalse(self.router.allow_migrate('replica1', 'movies'))
+        self.assertIsNone(self.router.allow_migrate('default', 'movies'))
+    
+    def get_pinned(self, view, method='get', path='/user/list', route='user/list'):
+        pinned  = []
+        request = getattr(RequestFactory(), method)(path)
+        
+        request.resolver_match = MagicMock(route=route)
+        
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            pinned.append(current_routing.get().pinned)
+        
+        middleware = DatabaseRoutingMiddleware(get_response)
+        middleware(request)
+        
+        return pinned[0]
+    
+    def test_middleware_pins_per_view(self):
+        view = MagicMock(view_class=type('View', (), {}))
+        
+        self.assertFalse(self.get_pinned(view))
+        self.assertTrue(self.get_pinned(view, method='post'))
+        self.assertTrue(self.get_pinned(MagicMock(view_class=type('View', (), {'use_primary_db': True}))))
+        
+        with override_settings(DATABASE_PRIMARY_ROUTES=['user/list']):
+            self.assertTrue(self.get_pinned(view))
+
+@unittest.skipUnless(get_replicas(), 'DB_REPLICA_HOSTS로 replica alias를 추가하면 실행합니다.')
+class ReplicaRoutingTest(TransactionTestCase):
+    """replica alias가 있을 때 실제 요청의 쿼리가 라우팅되는 DB를 확인합니다.
+
+    TestCase는 테스트를 primary의 트랜잭션 안에서 실행해 읽기도 primary로 보내므로 TransactionTestCase를 사용합니다.
+
+        DB_REPLICA_HOSTS=localhost python manage.py test core.tests.ReplicaRoutingTest
+    """
+    databases = '__all__'
+    
+    def test_reads_routed_to_replica(self):
+        replica = get_replicas()[0]
+        
+        with patch('core.routers.get_replicas', return_value=[replica]), \
+             CaptureQueriesContext(connections['default']) as primary_queries, \
+             CaptureQueriesContext(connections[replica]) as replica_queries:
+            response = self.client.get('/user/list')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(replica_queries), 0)
+        self.assertEqual(len(primary_queries), 0)
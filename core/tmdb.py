@@ -1,14 +1,152 @@
-from my_settings import TMDB_API_KEY
+import asyncio, hashlib, httpx, requests, time, weakref
+
+from django.conf       import settings
+from django.core.cache import cache
+from urllib.parse      import urlencode
+
+from core.circuitbreaker import CircuitBreakers
+from core.deadline       import bound_timeout, check_deadline
+from core.exceptions     import TMDBError, TMDBRateLimited, TMDBTimeout
+from core.metrics        import record_cache_hit, record_tmdb_call
+from core.ratelimit      import TokenBucket
+from core.singleflight   import AsyncSingleFlight, SingleFlight
+from core.tmdb_fixtures  import FixtureStore, TMDBFixtureNotFound
+from my_settings         import TMDB_API_KEY
+
+# TMDB 서버 측 오류 status_code (Internal error, Backend timeout, Service offline 등)
+TMDB_SERVER_ERROR_CODES = {11, 15, 24, 43, 44, 46}
+
+class LiveTransport:
+    """TMDB API를 직접 호출합니다.
+    
+    요청 timeout은 TMDB_REQUEST_TIMEOUT과 요청의 남은 처리 시간 중 짧은 값을 사용합니다.
+    TMDB가 요청 한도 초과(status_code 25)로 응답하면 TMDBRateLimited를,
+    연결 실패, JSON이 아닌 응답, 서버 측 오류 응답은 TMDBError를 발생시킵니다.
+    존재하지 않는 리소스 등 요청 오류 응답은 그대로 반환합니다.
+    """
+    
+    def fetch(self, helper, method, params):
+        try:
+            response = requests.get(helper.get_request_url(method, **params), timeout=bound_timeout(settings.TMDB_REQUEST_TIMEOUT))
+            body     = response.json()
+        except requests.Timeout as error:
+            raise TMDBTimeout(f'{method} : {error}')
+        except (requests.RequestException, ValueError) as error:
+            raise TMDBError(f'{method} : {error}')
+        
+        return self.check(method, body)
+    
+    async def afetch(self, helper, method, params):
+        """fetch의 비동기 버전입니다. 이벤트 루프별로 공유하는 httpx 클라이언트를 사용합니다."""
+        try:
+            response = await get_async_client().get(helper.get_request_url(method, **params), timeout=bound_timeout(settings.TMDB_REQUEST_TIMEOUT))
+            body     = response.json()
+        except httpx.TimeoutException as error:
+            raise TMDBTimeout(f'{method} : {error}')
+        except (httpx.HTTPError, ValueError) as error:
+            raise TMDBError(f'{method} : {error}')
+        
+        return self.check(method, body)
+    
+    def check(self, method, body):
+        if isinstance(body, dict) and body.get('success') == False:
+            if body.get('status_code') == 25:
+                raise TMDBRateLimited(body.get('status_message', 'TMDB rate limit exceeded'))
+            
+            if body.get('status_code') in TMDB_SERVER_ERROR_CODES:
+                raise TMDBError(f"{method} : {body.get('status_message')}")
+        
+        return body
+
+class RecordTransport(LiveTransport):
+    """TMDB API를 호출하고 응답을 fixture로 저장합니다."""
+    
+    def __init__(self, store):
+        self.store = store
+    
+    def fetch(self, helper, method, params):
+        body = super().fetch(helper, method, params)
+        
+        self.store.save(method, params, body)
+        
+        return body
+    
+    async def afetch(self, helper, method, params):
+        body = await super().afetch(helper, method, params)
+        
+        self.store.save(method, params, body)
+        
+        return body
+
+class ReplayTransport:
+    """저장된 fixture로 응답합니다. 네트워크를 사용하지 않습니다."""
+    
+    def __init__(self, store):
+        self.store = store
+    
+    def fetch(self, helper, method, params):
+        return self.store.load(method, params)
+    
+    async def afetch(self, helper, method, params):
+        return self.store.load(method, params)
+
+async_clients = weakref.WeakKeyDictionary()
+
+def get_async_client():
+    """현재 이벤트 루프에서 공유하는 httpx.AsyncClient를 반환합니다. (연결 재사용)
+
+    ASGI 서버에서는 워커의 이벤트 루프 하나가 계속 사용되므로 연결 풀이 요청 간에 유지됩니다.
+    WSGI 서버나 테스트에서는 요청마다 이벤트 루프가 새로 생성되므로 요청이 끝나면 close_async_client로 닫습니다.
+    """
+    loop = asyncio.get_running_loop()
+    
+    if loop not in async_clients:
+        async_clients[loop] = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections           = settings.TMDB_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections = settings.TMDB_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ))
+    
+    return async_clients[loop]
+
+async def close_async_client():
+    client = async_clients.pop(asyncio.get_running_loop(), None)
+    
+    if client is not None:
+        await client.aclose()
+
+def get_transport(mode, fixture_dir):
+    """TMDB_TRANSPORT 설정(live, record, replay)에 맞는 transport를 반환합니다."""
+    if mode == 'record':
+        return RecordTransport(FixtureStore(fixture_dir))
+    
+    if mode == 'replay':
+        return ReplayTransport(FixtureStore(fixture_dir))
+    
+    return LiveTransport()
 
 class TMDBHelper:
     """API 요청에 필요한 기능들을 제공합니다.
     
     Attributes:
         api_key: API 서비스에서 발급받은 API KEY입니다.
+        base_url: API 기본 주소입니다. 벤치마크에서는 로컬 TMDB 대체 서버 주소를 사용합니다.
+        transport: 응답을 가져오는 방식입니다. (live, record, replay)
+        single_flight: 같은 요청이 동시에 들어오면 한 번만 호출하도록 합칩니다. (비동기 호출은 같은 설정의 AsyncSingleFlight 사용)
+        rate_limiter: 호출 전에 토큰을 얻는 TokenBucket입니다. None이면 제한하지 않습니다.
+        breakers: 경로 그룹(/movie, /person, /search 등)별 CircuitBreaker입니다. None이면 차단하지 않습니다.
+        stale_timeout: 마지막 정상 응답을 보관하는 시간(초)입니다. 호출이 실패하면 이 응답을 대신 반환합니다.
     """
     
-    def __init__(self, api_key):
-        self.api_key = api_key
+    def __init__(self, api_key, base_url='https://api.themoviedb.org/3', transport=None, single_flight=None, rate_limiter=None, breakers=None, stale_timeout=60*60*24):
+        self.api_key       = api_key
+        self.base_url      = base_url
+        self.transport     = transport or LiveTransport()
+        self.single_flight = single_flight or SingleFlight()
+        self.rate_limiter  = rate_limiter
+        
+        self.async_single_flight = AsyncSingleFlight(self.single_flight.timeout, self.single_flight.shared)
+        self.breakers      = breakers
+        self.stale_timeout = stale_timeout
         
     def get_request_url(self, method, **kargs):
         """API 요청에 필요한 주소를 구성합니다.
@@ -20,13 +158,164 @@ class TMDBHelper:
         Returns:
             base_url, mothod, 쿼리 스트링 형태로 구성된 요청 주소를 반환합니다.
         """
-        base_url = 'https://api.themoviedb.org/3'
-        request_url = base_url + method
+        request_url = self.base_url + method
         request_url += f'?api_key={self.api_key}'
         
         for k, v in kargs.items():
             request_url += f'&{k}={v}'
             
         return request_url
+    
+    def get_request_key(self, method, **kargs):
+        """method와 쿼리 파라미터로 요청을 구분하는 키를 구성합니다. (파라미터 순서 무관)"""
+        return method + '?' + urlencode(sorted((k, str(v)) for k, v in kargs.items()))
+    
+    def get(self, method, **kargs):
+        """API에 GET 요청을 보내고 응답 본문을 반환합니다.
+        
+        같은 요청이 이미 진행 중이면 새로 호출하지 않고 그 응답을 함께 받습니다.
+        호출이 실패하거나 경로가 차단된 상태면 보관된 마지막 정상 응답을 반환합니다. (stale-if-error)
+        반환된 응답은 다른 요청과 공유될 수 있으므로 수정하지 않아야 합니다.
+        
+        Args:
+            method: API 서비스에서 제공하는 메서드입니다.
+            **kargs: 쿼리 스트링으로 전달됩니다.
+            
+        Returns:
+            JSON 응답을 dict 형태로 반환합니다.
+            
+        Raises:
+            TMDBTimeout: 진행 중인 같은 요청의 응답을 기다리다 시간이 초과된 경우 발생합니다.
+            TMDBRateLimited: 요청 한도를 초과한 경우 발생합니다.
+            DeadlineExceeded: 요청 처리 제한 시간이 지난 경우 발생합니다.
+            TMDBCircuitOpen: 경로가 차단된 상태이고 보관된 응답이 없는 경우 발생합니다.
+            TMDBError: 호출이 실패하고 보관된 응답이 없는 경우 발생합니다.
+        """
+        check_deadline()
+        
+        key = self.get_request_key(method, **kargs)
+        
+        try:
+            body, leader = self.single_flight.do(key, lambda: self.fetch(key, method, kargs))
+        except TMDBError:
+            body = cache.get(self.get_stale_key(key))
+            
+            if body is None:
+                raise
+            
+            record_cache_hit('stale')
+            return body
+        
+        if not leader:
+            record_cache_hit('single_flight')
+        
+        return body
+    
+    def get_stale_key(self, key):
+        return 'tmdb_stale:' + hashlib.md5(key.encode('utf-8')).hexdigest()
+    
+    def get_breaker(self, method):
+        return self.breakers.get(method.strip('/').split('/')[0])
+    
+    def fetch(self, key, method, params):
+        breaker = self.get_breaker(method) if self.breakers is not None else None
+        
+        if breaker is not None:
+            breaker.before_call()
+        
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        
+        start = time.perf_counter()
+        
+        try:
+            body = self.transport.fetch(self, method, params)
+        except (TMDBRateLimited, TMDBFixtureNotFound):
+            raise
+        except TMDBError:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        finally:
+            record_tmdb_call(time.perf_counter()-start)
+        
+        if breaker is not None:
+            breaker.record_success()
+        
+        if self.stale_timeout:
+            cache.set(self.get_stale_key(key), body, self.stale_timeout)
+        
+        return body
+    
+    async def aget(self, method, **kargs):
+        """get의 비동기 버전입니다. 여러 호출을 asyncio.gather로 동시에 보낼 수 있습니다.
+        
+        같은 이벤트 루프에서 진행 중인 같은 요청의 응답을 함께 받으며,
+        차단, 요청 한도, 제한 시간, stale-if-error 처리는 get과 같습니다.
+        """
+        check_deadline()
+        
+        key = self.get_request_key(method, **kargs)
+        
+        try:
+            body, leader = await self.async_single_flight.do(key, lambda: self.afetch(key, method, kargs))
+        except TMDBError:
+            body = await cache.aget(self.get_stale_key(key))
+            
+            if body is None:
+                raise
+            
+            record_cache_hit('stale')
+            return body
+        
+        if not leader:
+            record_cache_hit('single_flight')
+        
+        return body
+    
+    async def afetch(self, key, method, params):
+        breaker = self.get_breaker(method) if self.breakers is not None else None
+        
+        if breaker is not None:
+            breaker.before_call()
+        
+        if self.rate_limiter is not None:
+            await self.rate_limiter.aacquire()
+        
+        start = time.perf_counter()
+        
+        try:
+            body = await self.transport.afetch(self, method, params)
+        except (TMDBRateLimited, TMDBFixtureNotFound):
+            raise
+        except TMDBError:
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        finally:
+            record_tmdb_call(time.perf_counter()-start)
+        
+        if breaker is not None:
+            breaker.record_success()
+        
+        if self.stale_timeout:
+            await cache.aset(self.get_stale_key(key), body, self.stale_timeout)
+        
+        return body
 
-tmdb_helper = TMDBHelper(TMDB_API_KEY)
\ No newline at end of file
+tmdb_helper = TMDBHelper(
+    TMDB_API_KEY,
+    settings.TMDB_BASE_URL,
+    get_transport(settings.TMDB_TRANSPORT, settings.TMDB_FIXTURE_DIR),
+    SingleFlight(settings.TMDB_SINGLE_FLIGHT_TIMEOUT, settings.TMDB_SINGLE_FLIGHT_SHARED),
+    TokenBucket(
+        'tmdb_rate_limit',
+        settings.TMDB_RATE_LIMIT_RATE,
+        settings.TMDB_RATE_LIMIT_CAPACITY,
+        settings.TMDB_RATE_LIMIT_BACKGROUND_RESERVE,
+        settings.TMDB_RATE_LIMIT_MAX_WAIT,
+        settings.TMDB_RATE_LIMIT_BACKGROUND_MAX_WAIT,
+    ) if settings.TMDB_RATE_LIMIT_RATE else None,
+    CircuitBreakers(settings.TMDB_CIRCUIT_FAILURE_THRESHOLD, settings.TMDB_CIRCUIT_RESET_TIMEOUT),
+    settings.TMDB_STALE_TIMEOUT,
+)
@@ -0,0 +1,42 @@
+import gzip, hashlib, json, os
+
+from urllib.parse import urlencode
+
+from core.exceptions import TMDBError
+
+class TMDBFixtureNotFound(TMDBError):
+    """replay 모드에서 기록되지 않은 요청을 호출한 경우 발생합니다.
+
+    TMDB 장애가 아니므로 경로 차단(circuit breaker)의 실패로 세지 않습니다.
+    """
+    message = 'TMDB_FIXTURE_NOT_FOUND'
+
+class FixtureStore:
+    """TMDB 응답을 gzip JSON 파일로 저장합니다.
+
+    method와 쿼리 파라미터(api_key 제외)로 키를 구성하며,
+    응답 하나를 `{method 경로}/{키 해시}.json.gz` 파일 하나에 저장합니다.
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+
+    def get_path(self, method, params):
+        key = method + '?' + urlencode(sorted((k, str(v)) for k, v in params.items() if k != 'api_key'))
+
+        return os.path.join(self.directory, method.strip('/').replace('/', '_'), hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]+'.json.gz')
+
+    def load(self, method, params):
+        try:
+            with gzip.open(self.get_path(method, params), 'rt', encoding='utf-8') as f:
+                return json.load(f)['body']
+        except FileNotFoundError:
+            raise TMDBFixtureNotFound(f'{method} {params}')
+
+    def save(self, method, params, body):
+        path = self.get_path(method, params)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump({'method': method, 'params': {k: str(v) for k, v in params.items() if k != 'api_key'}, 'body': body}, f, ensure_ascii=False)
@@ -1,10 +1,20 @@
 import jwt
 
-from django.http    import JsonResponse
+from asgiref.sync   import sync_to_async
+
+from core.http      import JsonResponse
 
 from my_settings    import SECRET_KEY, ALGORITHM
 from users.models   import User
 
+def get_limit(params, default, maximum):
+    """limit 쿼리 파라미터를 1 이상 maximum 이하의 정수로 반환합니다.
+
+    Raises:
+        ValueError: limit이 정수가 아닌 경우 발생합니다.
+    """
+    return max(1, min(int(params.get('limit', default)), maximum))
+
 def login_decorator(func):
     def wrapper(self, request, *args, **kwargs):
         try: 
@@ -27,3 +37,36 @@ def login_decorator(func):
             return JsonResponse({'message' : 'INVALID_TOKEN'}, status=400)
         
     return wrapper
+
+def get_token_user(token):
+    """토큰의 사용자를 조회합니다. 유효하지 않은 토큰이면 (None, 오류 응답)을 반환합니다."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, ALGORITHM)
+
+        return User.objects.get(id=payload["id"]), None
+
+    except User.DoesNotExist:
+        return None, JsonResponse({'message' : 'INVALID_USER'}, status=400)
+
+    except jwt.exceptions.ExpiredSignatureError:
+        return None, JsonResponse({"message" : "EXPIRED_TOKEN"}, status=401)
+
+    except jwt.exceptions.DecodeError:
+        return None, JsonResponse({'message' : 'INVALID_TOKEN'}, status=400)
+
+def alogin_decorator(func):
+    """login_decorator의 비동기 버전입니다. (AsyncView의 async def 핸들러용)"""
+    async def wrapper(self, request, *args, **kwargs):
+        if 'Authorization' not in request.headers:
+            return JsonResponse({"message" : "NO AUTHORIZATION IN HEADER"}, status = 401)
+
+        user, error = await sync_to_async(get_token_user)(request.headers.get("Authorization"))
+
+        if error is not None:
+            return error
+
+        request.user = user
+
+        return await func(self, request, *args, **kwargs)
+
+    return wrapper
@@ -1,3 +1,56 @@
-from django.shortcuts import render
+import asyncio
 
-# Create your views here.
+from django.conf               import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db                 import transaction
+from django.http               import HttpResponse
+from django.utils.decorators   import method_decorator
+from django.views              import View
+
+from core.metrics import render_prometheus
+from core.tmdb    import close_async_client
+
+METRICS_ALLOWED_IPS = getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1'])
+
+def non_atomic_requests(view_class):
+    """클래스 기반 뷰를 ATOMIC_REQUESTS에서 제외합니다.
+
+    외부 HTTP(TMDB, S3, 소셜 로그인)를 호출하는 뷰가 응답을 기다리는 동안 트랜잭션과 DB 연결을 유지하지 않도록 하고,
+    쓰기는 뷰 안에서 transaction.atomic으로 필요한 구간만 묶습니다.
+    """
+    return method_decorator(transaction.non_atomic_requests, name='dispatch')(view_class)
+
+class MetricsView(View):
+    def get(self, request):
+        if request.META.get('REMOTE_ADDR') not in METRICS_ALLOWED_IPS:
+            return HttpResponse(status=404)
+        
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+class AsyncView(View):
+    """async def 핸들러를 사용하는 클래스 기반 뷰입니다.
+
+    Django 4.0의 View는 async 핸들러를 지원하지 않으므로 as_view가 반환하는 함수를 코루틴 함수로 표시합니다.
+    TMDB 호출을 기다리는 동안 트랜잭션을 유지하지 않도록 ATOMIC_REQUESTS에서 제외합니다.
+    ASGI가 아닌 환경(WSGI, 테스트)에서는 요청마다 이벤트 루프가 새로 생성되므로 요청이 끝나면 httpx 클라이언트를 닫습니다.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view._is_coroutine = asyncio.coroutines._is_coroutine
+
+        return transaction.non_atomic_requests(view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        finally:
+            if not isinstance(request, ASGIRequest):
+                await close_async_client()
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        return super().http_method_not_allowed(request, *args, **kwargs)
+
+    async def options(self, request, *args, **kwargs):
+        return super().options(request, *args, **kwargs)
@@ -0,0 +1,142 @@
+import logging, threading
+
+from django.core.cache import cache
+from django.db         import connections, transaction
+from django.db.models  import F
+
+from movies.models  import UserActorAffinity
+from reviews.models import Review
+from core.ratelimit import background
+from core.tmdb      import tmdb_helper
+
+MOVIE_CAST_CACHE_TIMEOUT = 60*60*24*7
+AFFINITY_REBUILD_DELAY   = 60
+AFFINITY_REBUILD_LOCK    = 60*10
+
+logger = logging.getLogger(__name__)
+
+def get_movie_cast(movie_id):
+    """영화 출연진을 {actor_id: {name, profile_path}} 형태로 반환합니다.
+
+    출연진은 거의 바뀌지 않으므로 MOVIE_CAST_CACHE_TIMEOUT 동안 캐시합니다.
+    한 배우가 여러 역할로 출연해도 한 번만 포함합니다.
+    """
+    key  = f'movie_cast:{movie_id}'
+    cast = cache.get(key)
+
+    if cast is None:
+        credits = tmdb_helper.get(f'/movie/{movie_id}/credits', language='ko')
+        cast    = {
+            actor['id'] : {
+                'name'         : actor.get('name') or '',
+                'profile_path' : actor.get('profile_path') or '',
+            } for actor in credits.get('cast') or []
+        }
+
+        cache.set(key, cast, MOVIE_CAST_CACHE_TIMEOUT)
+
+    return cast
+
+def add_review(user_id, movie_id):
+    """리뷰한 영화의 출연진 친밀도를 1씩 올립니다."""
+    cast = get_movie_cast(movie_id)
+
+    if not cast:
+        return
+
+    with transaction.atomic(using='default'):
+        existing = set(
+            UserActorAffinity.objects.select_for_update()
+            .filter(user_id=user_id, actor_id__in=cast)
+            .values_list('actor_id', flat=True)
+        )
+
+        UserActorAffinity.objects.filter(user_id=user_id, actor_id__in=existing).update(review_count=F('review_count')+1)
+        UserActorAffinity.objects.bulk_create([
+            UserActorAffinity(user_id=user_id, actor_id=actor_id, review_count=1, **actor)
+            for actor_id, actor in cast.items() if actor_id not in existing
+        ])
+
+def remove_review(user_id, movie_id):
+    """삭제한 리뷰 영화의 출연진 친밀도를 1씩 내리고, 0이 된 배우는 삭제합니다."""
+    cast = get_movie_cast(movie_id)
+
+    if not cast:
+        return
+
+    with transaction.atomic(using='default'):
+        affinities = UserActorAffinity.objects.filter(user_id=user_id, actor_id__in=cast)
+
+        affinities.filter(review_count__lte=1).delete()
+        affinities.update(review_count=F('review_count')-1)
+
+def on_commit(update, user_id, movie_id):
+    """리뷰를 저장, 삭제한 트랜잭션이 커밋된 뒤에 친밀도를 갱신합니다. (add_review, remove_review)
+
+    출연진 조회(TMDB)를 트랜잭션 밖에서 처리합니다. 리뷰는 이미 커밋되었으므로 갱신이 실패해도(TMDB 장애 등)
+    예외를 응답으로 전달하지 않고, 기록한 뒤 schedule_rebuild로 사용자의 친밀도를 다시 계산합니다.
+    """
+    def run():
+        try:
+            update(user_id, movie_id)
+        except Exception:
+            logger.exception('user %s affinity update failed for movie %s, scheduling a rebuild', user_id, movie_id)
+            schedule_rebuild(user_id)
+
+    transaction.on_commit(run, using='default')
+
+def rebuild_user(user_id):
+    """사용자의 리뷰 전체로 친밀도를 다시 계산합니다. (데이터 이전, 출연진 변경 보정용)
+
+    Returns:
+        친밀도가 있는 배우 수를 반환합니다.
+    """
+    counts = {}
+    actors = {}
+
+    for movie_id in Review.objects.filter(user_id=user_id).values_list('movie_id', flat=True).distinct():
+        for actor_id, actor in get_movie_cast(movie_id).items():
+            counts[actor_id] = counts.get(actor_id, 0) + 1
+            actors[actor_id] = actor
+
+    with transaction.atomic(using='default'):
+        UserActorAffinity.objects.filter(user_id=user_id).delete()
+        UserActorAffinity.objects.bulk_create([
+            UserActorAffinity(user_id=user_id, actor_id=actor_id, review_count=count, **actors[actor_id])
+            for actor_id, count in counts.items()
+        ])
+
+    return len(counts)
+
+@background
+def _rebuild_in_background(user_id):
+    try:
+        rebuild_user(user_id)
+    except Exception:
+        logger.exception('user %s affinity rebuild failed', user_id)
+    finally:
+        cache.delete(f'affinity_rebuild:{user_id}')
+        connections.close_all()
+
+def schedule_rebuild(user_id, delay=AFFINITY_REBUILD_DELAY):
+    """delay초 뒤에 백그라운드 스레드에서 사용자의 친밀도를 다시 계산합니다. (갱신 실패 보정용)
+
+    TMDB 장애가 지나갈 시간을 두고 실행하며, 캐시 락으로 같은 사용자의 재계산이 여러 번 예약되지 않도록 합니다.
+    재계산도 실패하면 rebuild_actor_affinity 명령으로 보정합니다.
+    """
+    if not cache.add(f'affinity_rebuild:{user_id}', True, AFFINITY_REBUILD_LOCK):
+        return False
+
+    timer        = threading.Timer(delay, _rebuild_in_background, args=(user_id,))
+    timer.daemon = True
+    timer.start()
+
+    return True
+
+def get_intimacy(user_id, actor_id):
+    """사용자가 리뷰한 영화 중 배우가 출연한 영화 수를 반환합니다."""
+    return UserActorAffinity.objects.filter(user_id=user_id, actor_id=actor_id).values_list('review_count', flat=True).first() or 0
+
+def get_top_actors(user_id, limit):
+    """친밀도가 높은 배우 limit명을 반환합니다. ((user, -review_count, actor_id) 인덱스 범위 조회)"""
+    return list(UserActorAffinity.objects.filter(user_id=user_id).order_by('-review_count', 'actor_id')[:limit])
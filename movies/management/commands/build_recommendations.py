@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from movies.recommendations import MIN_MOVIE_RATINGS, NEIGHBOR_COUNT, RECOMMENDATION_COUNT, build_all
+
+class Command(BaseCommand):
+    help = '리뷰 평점으로 영화별 유사 영화와 사용자별 추천 영화를 다시 계산합니다. (매일 밤 cron 등록용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbors', type=int, default=NEIGHBOR_COUNT, help='영화별로 저장할 유사 영화 수')
+        parser.add_argument('--recommendations', type=int, default=RECOMMENDATION_COUNT, help='사용자별로 저장할 추천 영화 수')
+        parser.add_argument('--min-ratings', type=int, default=MIN_MOVIE_RATINGS, help='유사도를 계산할 영화의 최소 리뷰 수')
+
+    def handle(self, *args, **options):
+        start  = time.perf_counter()
+        result = build_all(options['neighbors'], options['recommendations'], options['min_ratings'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"recommendations built : {result['reviews']} reviews, {result['users']} users, {result['movies']} movies ({time.perf_counter()-start:.1f}s)"
+        ))
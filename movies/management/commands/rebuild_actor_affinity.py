@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.ratelimit  import background
+from movies.affinity import rebuild_user
+from reviews.models  import Review
+
+class Command(BaseCommand):
+    help = '리뷰 전체로 사용자별 배우 친밀도를 다시 계산합니다. (데이터 이전, TMDB 장애로 건너뛴 갱신 보정용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('users', nargs='*', type=int, help='다시 계산할 사용자 id (기본값: 리뷰를 작성한 전체 사용자)')
+
+    @background
+    def handle(self, *args, **options):
+        user_ids = options['users'] or Review.objects.values_list('user_id', flat=True).distinct().order_by('user_id')
+        
+        for user_id in user_ids:
+            actors = rebuild_user(user_id)
+            
+            self.stdout.write(self.style.SUCCESS(f'user {user_id} affinity rebuilt : {actors} actors'))
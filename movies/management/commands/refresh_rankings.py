@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ratelimit  import background
+from movies.rankings import RANKING_BUILDERS, refresh_ranking
+
+class Command(BaseCommand):
+    help = '인기/최신 영화 순위 스냅샷을 갱신합니다. (cron 등록용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f'갱신할 순위 {list(RANKING_BUILDERS)} (기본값: 전체)')
+
+    @background
+    def handle(self, *args, **options):
+        names = options['names'] or list(RANKING_BUILDERS)
+        
+        for name in names:
+            if name not in RANKING_BUILDERS:
+                raise CommandError(f'unknown ranking : {name}')
+        
+        for name in names:
+            snapshot = refresh_ranking(name)
+            
+            if snapshot is None:
+                self.stdout.write(self.style.ERROR(f'{name} ranking skipped : no movies'))
+                continue
+            
+            self.stdout.write(self.style.SUCCESS(f'{name} ranking refreshed : {len(snapshot.payload)}'))
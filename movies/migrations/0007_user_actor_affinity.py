@@ -0,0 +1,39 @@
+# Generated by Django 4.0.4 on 2026-10-19 16:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_login_background'),
+        ('movies', '0006_ranking_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserActorAffinity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('actor_id', models.IntegerField()),
+                ('name', models.CharField(blank=True, max_length=200)),
+                ('profile_path', models.CharField(blank=True, max_length=200)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='users.user')),
+            ],
+            options={
+                'db_table': 'user_actor_affinities',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='useractoraffinity',
+            index=models.Index(fields=['user', '-review_count', 'actor_id'], name='user_actor_affinity_top'),
+        ),
+        migrations.AddConstraint(
+            model_name='useractoraffinity',
+            constraint=models.UniqueConstraint(fields=('user', 'actor_id'), name='unique_user_actor_affinity'),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from core.models import TimeStampedModel
+
 class CountryCode(models.Model):
     iso_code = models.CharField(max_length=20)
     name     = models.CharField(max_length=100)
@@ -14,3 +16,52 @@ class Genre(models.Model):
     
     class Meta:
         db_table = 'genres'
+
+class RankingSnapshot(TimeStampedModel):
+    name    = models.CharField(max_length=50, unique=True)
+    payload = models.JSONField(default=list)
+    
+    class Meta:
+        db_table = 'ranking_snapshots'
+
+class UserActorAffinity(TimeStampedModel):
+    """사용자가 리뷰한 영화 중 배우가 출연한 영화 수입니다. (친밀도)
+
+    리뷰를 작성, 삭제할 때 영화 출연진 기준으로 증감합니다. (movies.affinity)
+    """
+    user         = models.ForeignKey('users.User', on_delete=models.CASCADE)
+    actor_id     = models.IntegerField()
+    name         = models.CharField(max_length=200, blank=True)
+    profile_path = models.CharField(max_length=200, blank=True)
+    review_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table    = 'user_actor_affinities'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'actor_id'], name='unique_user_actor_affinity'),
+        ]
+        indexes     = [
+            models.Index(fields=['user', '-review_count', 'actor_id'], name='user_actor_affinity_top'),
+        ]
+
+class MovieSimilarity(TimeStampedModel):
+    """영화별로 평점 패턴이 비슷한 영화 목록입니다. (build_recommendations 명령으로 매일 다시 계산)
+
+    payload는 유사도 순서의 [{'id': movie_id, 'score': similarity}] 목록입니다.
+    """
+    movie_id = models.IntegerField(unique=True)
+    payload  = models.JSONField(default=list)
+    
+    class Meta:
+        db_table = 'movie_similarities'
+
+class UserRecommendation(TimeStampedModel):
+    """사용자별 추천 영화 목록입니다. (build_recommendations 명령으로 매일 다시 계산)
+
+    payload는 예상 평점 순서의 [{'id': movie_id, 'score': predicted_rating}] 목록입니다.
+    """
+    user    = models.OneToOneField('users.User', on_delete=models.CASCADE)
+    payload = models.JSONField(default=list)
+    
+    class Meta:
+        db_table = 'user_recommendations'
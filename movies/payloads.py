@@ -0,0 +1,148 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+
+from movies.models import Genre
+from core.deadline import aoptional, is_partial
+from core.tmdb     import tmdb_helper
+from my_settings   import TMDB_IMAGE_BASE_URL, TMDB_VIDEO_BASE_URL
+
+def get_total_page(total, limit):
+    return (total//limit)-1 if total%limit == 0 else (total//limit)
+
+def get_buy_providers(provider_data):
+    """watch/providers 응답에서 국내 구매 가능 플랫폼 목록을 반환합니다."""
+    return ((provider_data.get('results') or {}).get('KR') or {}).get('buy') or []
+
+async def build_movie_info(movie_id, limit):
+    """영화 상세페이지 payload를 구성합니다.
+
+    상세 정보와 출연진, 이미지, 영상, 플랫폼 정보를 동시에 조회합니다.
+    이미지, 영상, 플랫폼 정보는 선택 항목으로, 요청 처리 시간이 부족하면 생략하고 `partial: true`를 추가합니다.
+
+    Returns:
+        movie_info dict, 존재하지 않는 영화면 None을 반환합니다.
+    """
+    total_page = -1
+
+    movie_data, actor_data, image_data, video_data, provider_data = await asyncio.gather(
+        # MOVIES / Get Details
+        tmdb_helper.aget('/movie/'+str(movie_id), region='KR', language='ko'),
+        # MOVIES / Get credits
+        tmdb_helper.aget('/movie/'+str(movie_id)+'/credits', language='ko'),
+        # MOVIES / Get Images
+        aoptional(lambda: tmdb_helper.aget('/movie/'+str(movie_id)+'/images'), {}),
+        # MOVIES / Get Videos
+        aoptional(lambda: tmdb_helper.aget('/movie/'+str(movie_id)+'/videos', language='ko'), {}),
+        # MOVIES / Get Watch Providers
+        aoptional(lambda: tmdb_helper.aget('/movie/'+str(movie_id)+'/watch/providers'), {}),
+    )
+
+    if movie_data.get('id') == None :
+        return None
+
+    if actor_data.get('cast'):
+        total_page = get_total_page(len(actor_data['cast']), limit)
+
+    providers = get_buy_providers(provider_data)
+
+    genres = await sync_to_async(Genre.objects.in_bulk)([genre.get('id') for genre in movie_data.get('genres') or []])
+
+    movie_info = {
+        'total_page'          : total_page,
+        'id'                  : movie_data.get('id'),
+        'title'               : movie_data.get('title'),
+        'en_title'            : movie_data.get('original_title'),
+        'description'         : movie_data.get('overview'),
+        'running_time'        : movie_data.get('runtime'),
+        'age'                 : movie_data.get('adult'),
+        'ratings'             : round(float(movie_data.get('vote_average'))/2,0),
+        'release_date'        : movie_data.get('release_date'),
+        'country'             : movie_data.get('production_countries')[0].get('name') if movie_data.get('production_countries') else '',
+        'category'            : '미구현 제공여부 확인중',
+        'genre'               : [{
+            'name'       : genre.get('name'),
+            'color_code' : genres[genre.get('id')].color_code,
+            } for genre in movie_data.get('genres')] if movie_data.get('genres') else '',
+        'platform_name'       : [provider.get('provider_name') for provider in providers] if providers else '',
+        'platform_logo_image' : [TMDB_IMAGE_BASE_URL+provider.get('logo_path') for provider in providers] if providers else '',
+        'actor'               : [{
+            'id'        : actor.get('id'),
+            'name'      : actor.get('name'),
+            'image'     : TMDB_IMAGE_BASE_URL+actor.get('profile_path') if actor.get('profile_path') != None else 'basic_img',
+            'role'      : actor.get('known_for_department'),
+            'role_name' : actor.get('character'),
+            } for actor in actor_data.get('cast')][:20] if actor_data.get('cast') != None else '',
+        'thumbnail_image_url' : TMDB_IMAGE_BASE_URL+movie_data.get('poster_path') if movie_data.get('poster_path') != None else '',
+        'image_url'           : [TMDB_IMAGE_BASE_URL+image.get('file_path') for image in image_data.get('backdrops')][:20] if image_data.get('backdrops') != None else '',
+        'video_url'           : [TMDB_VIDEO_BASE_URL+video.get('key') for video in video_data.get('results')][:4] if video_data.get('results') != None else '',
+    }
+
+    if is_partial():
+        movie_info['partial'] = True
+
+    return movie_info
+
+async def build_starring(movie):
+    """배우 출연작 한 편의 정보를 구성합니다.
+
+    플랫폼 로고와 배경 이미지는 영화별로 한 번씩 동시에 조회하며, 요청 처리 시간이 부족하면 생략합니다.
+    """
+    provider_data, image_data = await asyncio.gather(
+        aoptional(lambda: tmdb_helper.aget('/movie/'+str(movie.get('id'))+'/watch/providers'), {}),
+        aoptional(lambda: tmdb_helper.aget('/movie/'+str(movie.get('id'))+'/images'), {}),
+    )
+
+    providers = get_buy_providers(provider_data)
+    backdrops = image_data.get('backdrops') or []
+
+    return {
+        'id'                   : movie.get('id'),
+        'title'                : movie.get('title'),
+        'release'              : (movie.get('release_date') or '').split("-")[0],
+        'thumbnail_image_url'  : TMDB_IMAGE_BASE_URL+movie.get('poster_path') if movie.get('poster_path') != None else '',
+        'role_name'            : movie.get('character'),
+        'ratings'              : round(float(movie.get('vote_average'))/2,0),
+        'platform'             : TMDB_IMAGE_BASE_URL+providers[0].get('logo_path') if providers and providers[0].get('logo_path') != None else '',
+        'background_image_url' : TMDB_IMAGE_BASE_URL+backdrops[0].get('file_path') if backdrops and backdrops[0].get('file_path') != None else '',
+    }
+
+async def build_actor_info(actor_id, page, limit):
+    """배우 상세페이지 payload를 구성합니다. (비로그인 기준)
+
+    출연작 정보는 페이지의 영화들을 동시에 조회합니다.
+    출연작의 플랫폼 로고와 배경 이미지를 생략한 경우 actor_info에 `partial: true`를 추가합니다.
+
+    Returns:
+        actor_info dict와 전체 출연작 id 리스트를 반환합니다.
+        출연작 조회에 실패하면 id 리스트는 None입니다.
+    """
+    offset = page*limit
+
+    actor, actor_movie = await asyncio.gather(
+        # PERSONS / Get Details
+        tmdb_helper.aget('/person/'+str(actor_id), language='ko-KR'),
+        # PERSONS / Get Movie Credits
+        tmdb_helper.aget('/person/'+str(actor_id)+'/movie_credits', language='ko-KR'),
+    )
+
+    actor_data = {
+        'total_page'    : -1,
+        'name'          : actor.get('name'),
+        'image_url'     : TMDB_IMAGE_BASE_URL+actor.get('profile_path') if actor.get('profile_path') != None else '',
+        'country'       : actor.get('place_of_birth'),
+        'starring_list' : [],
+    }
+
+    if actor_movie.get('success') == False:
+        return {'actor_info': actor_data, 'movie_ids': None}
+
+    cast = sorted(actor_movie.get('cast'), key=lambda x:x.get('release_date') or '', reverse=True)
+
+    actor_data['total_page']    = get_total_page(len(cast), limit)
+    actor_data['starring_list'] = list(await asyncio.gather(*[build_starring(movie) for movie in cast[offset:offset+limit]]))
+
+    if is_partial():
+        actor_data['partial'] = True
+
+    return {'actor_info': actor_data, 'movie_ids': [movie.get('id') for movie in cast]}
@@ -0,0 +1,116 @@
+import datetime, logging, threading
+
+from django.core.cache import cache
+from django.db         import connections
+from django.utils      import timezone
+
+from movies.models  import RankingSnapshot
+from core.ratelimit import background
+from core.tmdb      import tmdb_helper
+from my_settings    import TMDB_IMAGE_BASE_URL
+
+RANKING_STALE_AFTER   = datetime.timedelta(hours=1)
+RANKING_REFRESH_LOCK  = 60*5
+RANKING_SIZE          = 10
+
+logger = logging.getLogger(__name__)
+
+def build_popular_ranking():
+    """인기 영화 순위를 구성합니다."""
+    popular_movies = tmdb_helper.get('/movie/popular', language='ko-KR', region='KR')
+
+    return [{
+        'id'    : movie['id'],
+        'title' : movie['title']
+    } for movie in popular_movies.get('results', [])[:RANKING_SIZE]]
+
+def build_latest_ranking():
+    """현재 상영작 순위를 구성합니다.
+
+    목록 응답에 없는 제작 국가는 영화별 상세 조회로 채워 스냅샷에 함께 저장합니다.
+    """
+    latest_movies = tmdb_helper.get('/movie/now_playing', language='ko-KR', region='KR')
+    result        = []
+
+    for movie in sorted(latest_movies.get('results', []), key=lambda x: x.get('popularity'), reverse=True)[:RANKING_SIZE]:
+        movie_data = tmdb_helper.get('/movie/'+str(movie['id']), region='KR', language='ko-KR')
+
+        result.append({
+            'id'           : movie['id'],
+            'title'        : movie['title'],
+            'poster'       : TMDB_IMAGE_BASE_URL+movie['poster_path'] if movie.get('poster_path') else '',
+            'release_date' : movie['release_date'],
+            'ratings'      : movie['vote_average'],
+            'country'      : movie_data.get('production_countries')[0].get('name') if movie_data.get('production_countries') else '',
+        })
+
+    return result
+
+RANKING_BUILDERS = {
+    'popular' : build_popular_ranking,
+    'latest'  : build_latest_ranking,
+}
+
+def refresh_ranking(name):
+    """순위를 새로 구성해 스냅샷으로 저장합니다.
+
+    빈 순위가 구성되면(TMDB가 빈 목록을 반환한 경우) 기존 스냅샷을 덮어쓰지 않습니다.
+
+    Returns:
+        저장한 스냅샷을 반환합니다. 빈 순위이면 기존 스냅샷을, 기존 스냅샷도 없으면 None을 반환합니다.
+
+    Raises:
+        TMDBError: 순위 구성에 실패한 경우 발생하며, 기존 스냅샷은 바뀌지 않습니다.
+    """
+    payload = RANKING_BUILDERS[name]()
+
+    if not payload:
+        logger.warning('ranking %s refresh returned no movies, keeping the previous snapshot', name)
+        return RankingSnapshot.objects.filter(name=name).first()
+
+    snapshot, is_created = RankingSnapshot.objects.update_or_create(
+        name     = name,
+        defaults = {'payload': payload}
+    )
+
+    return snapshot
+
+@background
+def _refresh_in_background(name):
+    try:
+        refresh_ranking(name)
+    except Exception:
+        logger.exception('ranking %s refresh failed, keeping the previous snapshot', name)
+    finally:
+        cache.delete(f'ranking_refresh:{name}')
+        connections.close_all()
+
+def schedule_refresh(name):
+    """백그라운드 스레드에서 스냅샷을 갱신합니다.
+
+    캐시 락으로 같은 순위에 대한 갱신이 동시에 여러 번 실행되지 않도록 합니다.
+    """
+    if not cache.add(f'ranking_refresh:{name}', True, RANKING_REFRESH_LOCK):
+        return False
+
+    threading.Thread(target=_refresh_in_background, args=(name,), daemon=True).start()
+
+    return True
+
+def get_ranking(name):
+    """저장된 스냅샷을 반환합니다. (stale-while-revalidate)
+
+    스냅샷이 오래되었으면 즉시 기존 값을 반환하고 갱신은 백그라운드에서 진행합니다.
+    스냅샷이 아직 없을 때에만 요청 안에서 구성합니다.
+    """
+    snapshot = RankingSnapshot.objects.filter(name=name).first()
+
+    if snapshot is None:
+        snapshot = refresh_ranking(name)
+
+        return snapshot.payload if snapshot is not None else []
+
+    if timezone.now() - snapshot.updated_at > RANKING_STALE_AFTER:
+        schedule_refresh(name)
+
+    return snapshot.payload
@@ -0,0 +1,253 @@
+"""리뷰 평점 기반 영화 추천 (item-item 협업 필터링)
+
+build_recommendations 명령이 매일 밤 다음 순서로 계산해 저장하고, 요청에서는 저장된 행 하나만 조회합니다.
+
+1. 리뷰 평점을 쿼리 하나로 순회해 사용자×영화 희소 행렬(CSR)을 만듭니다.
+2. 사용자 평균을 뺀 평점으로 영화 간 adjusted cosine 유사도를 영화 블록 단위로 계산하고,
+   영화별로 유사도가 높은 이웃을 MovieSimilarity에 저장합니다.
+3. 이웃 행렬로 사용자 블록 단위로 보지 않은 영화의 예상 평점을 계산하고, 상위 영화를 UserRecommendation에 저장합니다.
+
+블록 하나의 dense 행렬 크기를 BLOCK_CELLS로 제한하므로 메모리 사용량은 리뷰 수와 영화 수에 비례합니다.
+"""
+from array import array
+
+import numpy as np
+
+from django.db    import transaction
+from django.utils import timezone
+from scipy        import sparse
+
+from movies.models  import MovieSimilarity, UserRecommendation
+from reviews.models import Review
+
+NEIGHBOR_COUNT       = 20
+RECOMMENDATION_COUNT = 50
+MIN_MOVIE_RATINGS    = 2
+BLOCK_CELLS          = 2**24
+REVIEW_CHUNK_SIZE    = 10000
+WRITE_BATCH_SIZE     = 1000
+
+def load_ratings():
+    """리뷰 평점을 사용자×영화 희소 행렬로 읽습니다.
+
+    리뷰 테이블은 정렬 없이 한 번만 순회하고, 숫자가 아닌 movie_id는 건너뜁니다.
+
+    Returns:
+        (ratings, user_ids, movie_ids), ratings는 float32 CSR 행렬이고 user_ids, movie_ids는 행, 열 순서의 id 배열입니다.
+    """
+    users, movies, values = array('q'), array('q'), array('f')
+
+    for user_id, movie_id, rating in Review.objects.order_by().values_list('user_id', 'movie_id', 'rating').iterator(chunk_size=REVIEW_CHUNK_SIZE):
+        if movie_id.isdigit():
+            users.append(user_id)
+            movies.append(int(movie_id))
+            values.append(float(rating))
+
+    return build_matrix(np.array(users, dtype=np.int64), np.array(movies, dtype=np.int64), np.array(values, dtype=np.float32))
+
+def build_matrix(users, movies, values):
+    """(user_id, movie_id, rating) 배열로 사용자×영화 CSR 행렬을 만듭니다. 같은 사용자, 영화의 평점이 여러 개면 평균을 사용합니다."""
+    user_ids, rows  = np.unique(users, return_inverse=True)
+    movie_ids, cols = np.unique(movies, return_inverse=True)
+    shape           = (len(user_ids), len(movie_ids))
+
+    ratings = sparse.csr_matrix((values, (rows, cols)), shape=shape, dtype=np.float32)
+    counts  = sparse.csr_matrix((np.ones_like(values), (rows, cols)), shape=shape, dtype=np.float32)
+
+    ratings.data /= counts.data
+
+    return ratings, user_ids, movie_ids
+
+def center(ratings):
+    """사용자별 평균 평점을 뺀 행렬과 평균 평점 배열을 반환합니다."""
+    counts   = np.diff(ratings.indptr)
+    means    = np.asarray(ratings.sum(axis=1)).ravel() / np.maximum(counts, 1)
+    centered = ratings.copy()
+
+    centered.data -= np.repeat(means, counts).astype(np.float32)
+
+    return centered, means.astype(np.float32)
+
+def block_ranges(total, width):
+    """블록의 곱셈 결과가 dense 행렬이어도 BLOCK_CELLS를 넘지 않도록 total개의 행을 나눈 (start, stop) 범위를 반환합니다."""
+    size = max(1, BLOCK_CELLS // max(width, 1))
+
+    return [(start, min(start+size, total)) for start in range(0, total, size)]
+
+def top_k(scores, count):
+    """dense 행렬의 행마다 값이 큰 count개의 (열, 값)을 값 순서로 반환합니다."""
+    count   = min(count, scores.shape[1])
+    columns = np.argpartition(-scores, count-1, axis=1)[:, :count]
+    values  = np.take_along_axis(scores, columns, axis=1)
+    order   = np.argsort(-values, axis=1, kind='stable')
+
+    return np.take_along_axis(columns, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+def iter_top_k(scores, count):
+    """CSR 행렬의 행마다 값이 큰 count개를 값 순서로 반환합니다. 무한대(-inf) 값은 제외합니다.
+
+    Yields:
+        (행, 열 배열, 값 배열), 남은 값이 없는 행은 건너뜁니다.
+    """
+    for row in range(scores.shape[0]):
+        begin, end = scores.indptr[row], scores.indptr[row+1]
+        values     = scores.data[begin:end]
+        columns    = scores.indices[begin:end]
+        keep       = np.isfinite(values)
+
+        if not keep.any():
+            continue
+
+        values, columns = values[keep], columns[keep]
+
+        if len(values) > count:
+            top             = np.argpartition(-values, count-1)[:count]
+            values, columns = values[top], columns[top]
+
+        order = np.argsort(-values, kind='stable')
+
+        yield row, columns[order], values[order]
+
+def iter_rows(matrix):
+    """CSR 행렬의 행마다 (행, 열 배열, 값 배열)을 반환합니다. 값이 없는 행은 건너뜁니다."""
+    for row, (begin, end) in enumerate(zip(matrix.indptr[:-1], matrix.indptr[1:])):
+        if end > begin:
+            yield row, matrix.indices[begin:end], matrix.data[begin:end]
+
+def build_neighbors(centered, count=NEIGHBOR_COUNT, min_ratings=MIN_MOVIE_RATINGS):
+    """영화별로 adjusted cosine 유사도가 높은 이웃 count개를 계산합니다.
+
+    평점이 min_ratings개보다 적은 영화는 이웃을 계산하지 않고 다른 영화의 이웃으로도 사용하지 않으며,
+    유사도가 0 이하인 영화는 이웃에서 제외합니다.
+
+    Returns:
+        영화×영화 CSR 행렬, i행에 영화 i의 이웃 유사도가 저장됩니다.
+    """
+    columns = centered.tocsc()
+    support = np.diff(columns.indptr)
+    norms   = np.sqrt(np.asarray(columns.multiply(columns).sum(axis=0)).ravel())
+    valid   = (support >= min_ratings) & (norms > 0)
+    scale   = np.where(valid, 1 / np.where(norms > 0, norms, 1), 0).astype(np.float32)
+
+    normalized = (columns @ sparse.diags(scale)).tocsc()
+    movie_rows = normalized.T.tocsr()
+    total      = movie_rows.shape[0]
+    rows       = []
+    cols       = []
+    values     = []
+
+    for start, stop in block_ranges(total, total):
+        similarities = (movie_rows[start:stop] @ normalized).tocsr()
+        diagonal     = similarities.indices == np.repeat(np.arange(start, stop), np.diff(similarities.indptr))
+
+        similarities.data[diagonal | (similarities.data <= 0)] = -np.inf
+
+        for row, neighbors, scores in iter_top_k(similarities, count):
+            rows.append(np.full(len(neighbors), start+row))
+            cols.append(neighbors)
+            values.append(scores)
+
+    if not values:
+        return sparse.csr_matrix((total, total), dtype=np.float32)
+
+    return sparse.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=(total, total), dtype=np.float32)
+
+def recommend(ratings, centered, means, neighbors, count=RECOMMENDATION_COUNT):
+    """사용자별로 보지 않은 영화의 예상 평점 상위 count개를 계산합니다.
+
+    예상 평점은 사용자 평균 + (사용자가 평가한 이웃 영화의 평균 대비 평점을 유사도로 가중 평균한 값)입니다.
+    이웃이 있는 영화만 후보로 사용하며, 사용자 블록마다 후보 영화 전체의 예상 평점을 dense 행렬로 계산합니다.
+
+    Yields:
+        (사용자 행, 영화 열 배열, 예상 평점 배열), 추천할 영화가 없는 사용자는 건너뜁니다.
+    """
+    candidates = np.flatnonzero(np.diff(neighbors.indptr))
+
+    if not len(candidates):
+        return
+
+    rated       = ratings.copy()
+    rated.data  = np.ones_like(rated.data)
+    neighbors_t = neighbors[candidates].T.tocsr()
+
+    for start, stop in block_ranges(ratings.shape[0], len(candidates)):
+        weighted = (centered[start:stop] @ neighbors_t).toarray()
+        weights  = (rated[start:stop] @ neighbors_t).toarray()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            predictions = means[start:stop, None] + weighted / weights
+
+        # 평가한 영화의 이웃이 아니거나 이미 평가한 영화는 추천하지 않습니다.
+        predictions[weights <= 0] = -np.inf
+        predictions[rated[start:stop][:, candidates].nonzero()] = -np.inf
+
+        movies, values = top_k(predictions, count)
+
+        for offset in range(stop-start):
+            keep = np.isfinite(values[offset])
+
+            if keep.any():
+                yield start+offset, candidates[movies[offset][keep]], np.clip(values[offset][keep], 0.5, 5.0)
+
+def save_payloads(model, key, items, started_at):
+    """(key 값, payload)를 WRITE_BATCH_SIZE개씩 교체해 저장하고, 이번 계산에 없는 이전 행은 삭제합니다.
+
+    배치마다 트랜잭션을 나눠 긴 트랜잭션과 잠금 없이 저장하며, 저장하는 동안에도 이전 결과를 계속 조회할 수 있습니다.
+    """
+    batch = []
+
+    def flush():
+        with transaction.atomic(using='default'):
+            model.objects.filter(**{f'{key}__in': [value for value, _ in batch]}).delete()
+            model.objects.bulk_create([model(**{key: value, 'payload': payload}) for value, payload in batch])
+
+        batch.clear()
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) >= WRITE_BATCH_SIZE:
+            flush()
+
+    if batch:
+        flush()
+
+    model.objects.filter(updated_at__lt=started_at).delete()
+
+def to_payload(ids, scores, digits):
+    """영화 id, 점수 배열을 점수 순서의 [{'id', 'score'}] 목록으로 변환합니다."""
+    order = np.argsort(-scores, kind='stable')
+
+    return [{'id': int(ids[index]), 'score': round(float(scores[index]), digits)} for index in order]
+
+def build_all(neighbor_count=NEIGHBOR_COUNT, recommendation_count=RECOMMENDATION_COUNT, min_ratings=MIN_MOVIE_RATINGS):
+    """리뷰 전체로 영화별 유사 영화와 사용자별 추천 영화를 다시 계산해 저장합니다.
+
+    Returns:
+        {'reviews', 'users', 'movies'} 처리한 리뷰, 사용자, 영화 수를 반환합니다.
+    """
+    started_at                   = timezone.now()
+    ratings, user_ids, movie_ids = load_ratings()
+    centered, means              = center(ratings)
+    neighbors                    = build_neighbors(centered, neighbor_count, min_ratings)
+
+    save_payloads(MovieSimilarity, 'movie_id', (
+        (int(movie_ids[row]), to_payload(movie_ids[movies], scores, 4)) for row, movies, scores in iter_rows(neighbors)
+    ), started_at)
+
+    save_payloads(UserRecommendation, 'user_id', (
+        (int(user_ids[row]), to_payload(movie_ids[movies], predictions, 2))
+        for row, movies, predictions in recommend(ratings, centered, means, neighbors, recommendation_count)
+    ), started_at)
+
+    return {'reviews': ratings.nnz, 'users': len(user_ids), 'movies': len(movie_ids)}
+
+def get_similar_movies(movie_id, limit):
+    payload = MovieSimilarity.objects.filter(movie_id=movie_id).values_list('payload', flat=True).first()
+
+    return (payload or [])[:limit]
+
+def get_user_recommendations(user_id, limit):
+    payload = UserRecommendation.objects.filter(user_id=user_id).values_list('payload', flat=True).first()
+
+    return (payload or [])[:limit]
@@ -0,0 +1,106 @@
+import asyncio
+
+from django.core.cache import cache
+
+from core.exceptions import TMDBError
+from core.metrics    import record_cache_hit
+from core.tmdb       import tmdb_helper
+from my_settings     import TMDB_IMAGE_BASE_URL
+
+MOVIE_SUMMARY_CACHE_TIMEOUT           = 60*60*24
+MOVIE_SUMMARY_NOT_FOUND_CACHE_TIMEOUT = 60*60
+
+def get_summary_key(movie_id):
+    return f'movie_summary:v2:{movie_id}'
+
+def build_movie_summary(movie_data):
+    """목록(컬렉션 등)에 표시할 영화 요약 정보를 구성합니다."""
+    return {
+        'id'           : movie_data.get('id'),
+        'title'        : movie_data.get('title'),
+        'en_title'     : movie_data.get('original_title'),
+        'poster'       : TMDB_IMAGE_BASE_URL+movie_data['poster_path'] if movie_data.get('poster_path') else '',
+        'release_date' : movie_data.get('release_date', ''),
+        'ratings'      : round(float(movie_data.get('vote_average') or 0)/2, 1),
+        'genres'       : [{'id': genre['id'], 'name': genre.get('name', '')} for genre in movie_data.get('genres') or []],
+        'runtime'      : movie_data.get('runtime') or 0,
+    }
+
+def get_movie_summary(movie_id):
+    """영화 요약 정보를 캐시에서 조회하고, 없으면 TMDB에서 조회해 캐시합니다. (동기 버전, 통계 집계 등 백그라운드 작업용)
+
+    Returns:
+        요약 정보 dict, 존재하지 않는 영화면 빈 dict를 반환합니다.
+
+    Raises:
+        TMDBError: TMDB 조회에 실패한 경우 발생합니다. (캐시하지 않습니다)
+    """
+    key     = get_summary_key(movie_id)
+    summary = cache.get(key)
+
+    if summary is not None:
+        record_cache_hit('movie_summary')
+        return summary
+
+    movie_data = tmdb_helper.get(f'/movie/{movie_id}', region='KR', language='ko-KR')
+    summary    = build_movie_summary(movie_data) if movie_data.get('id') is not None else {}
+
+    cache.set(key, summary, MOVIE_SUMMARY_CACHE_TIMEOUT if summary else MOVIE_SUMMARY_NOT_FOUND_CACHE_TIMEOUT)
+
+    return summary
+
+async def afetch_movie_summary(movie_id):
+    """TMDB에서 영화 요약 정보를 조회합니다.
+
+    Returns:
+        요약 정보 dict, 존재하지 않는 영화면 빈 dict, 조회에 실패하면 None을 반환합니다.
+    """
+    try:
+        movie_data = await tmdb_helper.aget(f'/movie/{movie_id}', region='KR', language='ko-KR')
+    except TMDBError:
+        return None
+
+    if movie_data.get('id') is None:
+        return {}
+
+    return build_movie_summary(movie_data)
+
+async def aget_movie_summaries(movie_ids):
+    """영화 요약 정보를 {movie_id: summary} 형태로 반환합니다.
+
+    캐시는 cache.get_many 한 번으로 조회하고, 캐시에 없는 영화만 TMDB에 동시에 요청해 set_many로 저장합니다.
+    존재하지 않는 영화는 빈 dict로 MOVIE_SUMMARY_NOT_FOUND_CACHE_TIMEOUT 동안 저장해 매번 다시 요청하지 않고,
+    조회에 실패한 영화는 결과에서 제외하며 캐시하지 않습니다.
+
+    Args:
+        movie_ids: 영화 id 목록입니다. (str)
+    """
+    keys    = {movie_id: get_summary_key(movie_id) for movie_id in movie_ids}
+    cached  = await cache.aget_many(keys.values())
+    result  = {movie_id: cached[key] for movie_id, key in keys.items() if key in cached}
+    missing = [movie_id for movie_id in keys if movie_id not in result]
+
+    if result:
+        record_cache_hit('movie_summary')
+
+    if not missing:
+        return result
+
+    summaries = await asyncio.gather(*[afetch_movie_summary(movie_id) for movie_id in missing])
+    fetched   = {movie_id: summary for movie_id, summary in zip(missing, summaries) if summary is not None}
+
+    found     = {keys[movie_id]: summary for movie_id, summary in fetched.items() if summary}
+    not_found = {keys[movie_id]: summary for movie_id, summary in fetched.items() if not summary}
+
+    if found:
+        await cache.aset_many(found, MOVIE_SUMMARY_CACHE_TIMEOUT)
+    if not_found:
+        await cache.aset_many(not_found, MOVIE_SUMMARY_NOT_FOUND_CACHE_TIMEOUT)
+
+    return {**result, **fetched}
+
+async def ahydrate(items):
+    """[{'id', ...}] 목록의 각 항목에 영화 요약 정보를 합쳐 반환합니다. 요약 정보가 없는 영화는 id만 포함합니다."""
+    summaries = await aget_movie_summaries([str(item['id']) for item in items])
+
+    return [{**(summaries.get(str(item['id'])) or {'id': item['id']}), **item} for item in items]
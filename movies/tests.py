@@ -1,3 +1,424 @@
-from django.test import TestCase
+import datetime, httpx, jwt
 
-# Create your tests here.
+from django.core.cache      import cache
+from django.core.management import call_command
+from django.test            import TestCase, override_settings
+from django.utils           import timezone
+from rest_framework.test    import APIClient
+from unittest.mock          import MagicMock, patch
+
+from movies          import affinity
+from movies.models   import Genre, MovieSimilarity, RankingSnapshot, UserActorAffinity, UserRecommendation
+from core.exceptions import TMDBError
+from movies.rankings import _refresh_in_background, refresh_ranking
+from reviews.models  import Review
+from users.models    import Group, SocialPlatform, User
+from core.testing    import PerformanceBudgetMixin
+from my_settings     import TMDB_IMAGE_BASE_URL, TMDB_VIDEO_BASE_URL, SECRET_KEY, ALGORITHM
+
+class MockNowPlayingResponse:
+    def json():
+        now_playing = {
+            'results' : [
+                {
+                    'id'           : 550,
+                    'title'        : '파이트 클럽',
+                    'poster_path'  : '/poster.jpg',
+                    'release_date' : '1999-10-12',
+                    'vote_average' : 7.8,
+                    'popularity'   : 0.5
+                }
+            ]
+        }
+        return now_playing
+
+class MockMovieDetailResponse:
+    def json():
+        movie = {
+            'id'                   : 550,
+            'title'                : '파이트 클럽',
+            'production_countries' : [{'iso_3166_1': 'US', 'name': 'United States of America'}]
+        }
+        return movie
+
+class RankingTest(PerformanceBudgetMixin, TestCase):
+    maxDiff = None
+    
+    @classmethod
+    def setUpTestData(cls):
+        RankingSnapshot.objects.create(
+            name    = 'popular',
+            payload = [{'id': 550, 'title': '파이트 클럽'}]
+        )
+    
+    @patch('core.tmdb.requests.get')
+    def test_popular_served_from_snapshot(self, mocked_requests):
+        
+        response = self.client.get('/movie/popular')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'message': 'SUCCESS', 'rank': [{'id': 550, 'title': '파이트 클럽'}]})
+        mocked_requests.assert_not_called()
+        self.assertWithinBudget(response)
+    
+    @patch('movies.rankings.schedule_refresh')
+    def test_stale_snapshot_schedules_refresh(self, mocked_schedule):
+        RankingSnapshot.objects.filter(name='popular').update(updated_at=timezone.now()-datetime.timedelta(days=1))
+        
+        response = self.client.get('/movie/popular')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rank'], [{'id': 550, 'title': '파이트 클럽'}])
+        mocked_schedule.assert_called_once_with('popular')
+    
+    @patch('core.tmdb.requests.get', MagicMock(side_effect=[MockNowPlayingResponse, MockMovieDetailResponse]))
+    def test_latest_snapshot_enriched(self):
+        
+        snapshot = refresh_ranking('latest')
+        
+        self.assertEqual(snapshot.payload, [{
+            'id'           : 550,
+            'title'        : '파이트 클럽',
+            'poster'       : TMDB_IMAGE_BASE_URL+'/poster.jpg',
+            'release_date' : '1999-10-12',
+            'ratings'      : 7.8,
+            'country'      : 'United States of America',
+        }])
+    
+    @patch.dict('movies.rankings.RANKING_BUILDERS', {'popular': MagicMock(return_value=[])})
+    def test_empty_refresh_keeps_snapshot(self):
+        
+        with self.assertLogs('movies.rankings', 'WARNING'):
+            snapshot = refresh_ranking('popular')
+        
+        self.assertEqual(snapshot.payload, [{'id': 550, 'title': '파이트 클럽'}])
+        self.assertEqual(RankingSnapshot.objects.get(name='popular').payload, [{'id': 550, 'title': '파이트 클럽'}])
+    
+    @patch('movies.rankings.connections')
+    @patch.dict('movies.rankings.RANKING_BUILDERS', {'popular': MagicMock(side_effect=TMDBError('upstream error'))})
+    def test_failed_refresh_keeps_snapshot(self, mocked_connections):
+        cache.add('ranking_refresh:popular', True)
+        
+        with self.assertLogs('movies.rankings', 'ERROR'):
+            _refresh_in_background('popular')
+        
+        self.assertEqual(RankingSnapshot.objects.get(name='popular').payload, [{'id': 550, 'title': '파이트 클럽'}])
+        self.assertIsNone(cache.get('ranking_refresh:popular'))
+        mocked_connections.close_all.assert_called_once_with()
+
+TMDB_RESPONSES = {
+    '/movie/550/credits'         : {'cast': [{'id': 819, 'name': 'Edward Norton', 'profile_path': None, 'known_for_department': 'Acting', 'character': 'The Narrator'}]},
+    '/movie/550/images'          : {'backdrops': [{'file_path': '/backdrop.jpg'}]},
+    '/movie/550/videos'          : {'results': [{'key': 'video_key'}]},
+    '/movie/550/watch/providers' : {'results': {'KR': {'buy': [{'provider_name': 'Netflix', 'logo_path': '/logo.jpg'}]}}},
+    '/movie/550'                 : {'id': 550, 'title': '파이트 클럽', 'original_title': 'Fight Club', 'overview': 'overview', 'runtime': 139, 'adult': False, 'vote_average': 7.8,
+                                    'release_date': '1999-10-12', 'production_countries': [{'name': 'United States of America'}], 'genres': [{'id': 18, 'name': 'Drama'}], 'poster_path': '/poster.jpg'},
+    '/person/819/movie_credits'  : {'cast': [{'id': 550, 'title': '파이트 클럽', 'release_date': '1999-10-12', 'poster_path': None, 'character': 'The Narrator', 'vote_average': 7.8}]},
+    '/person/819'                : {'id': 819, 'name': 'Edward Norton', 'profile_path': None, 'place_of_birth': 'Boston'},
+}
+
+def mock_tmdb_get(request_url, **kwargs):
+    method = request_url.split('/3', 1)[1].split('?')[0]
+    
+    return MagicMock(json=MagicMock(return_value=TMDB_RESPONSES[method]))
+
+def mock_tmdb_get_or_not_found(request_url, **kwargs):
+    method = request_url.split('/3', 1)[1].split('?')[0]
+    
+    return MagicMock(json=MagicMock(return_value=TMDB_RESPONSES.get(method, {'success': False, 'status_code': 34})))
+
+def mock_tmdb_get_slow_images(request_url, **kwargs):
+    if '/images' in request_url:
+        raise httpx.ReadTimeout('read timed out')
+    
+    return mock_tmdb_get(request_url, **kwargs)
+
+class DetailCacheTest(PerformanceBudgetMixin, TestCase):
+    maxDiff = None
+    
+    @classmethod
+    def setUpTestData(cls):
+        Genre.objects.create(id=18, name='드라마', color_code='#af4448')
+        
+        cls.user = User.objects.create(
+            social_id       = '소셜아이디',
+            nickname        = '테스트유저',
+            group           = Group.objects.create(name='user'),
+            social_platform = SocialPlatform.objects.create(name='naver'),
+        )
+        cls.header = {'HTTP_Authorization': jwt.encode({'id': cls.user.id}, SECRET_KEY, algorithm=ALGORITHM)}
+        
+        Review.objects.create(user=cls.user, movie_id='550', title='title', content='content', rating=4.5)
+        UserActorAffinity.objects.create(user=cls.user, actor_id=819, name='Edward Norton', review_count=1)
+    
+    def setUp(self):
+        cache.clear()
+    
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get)
+    def test_movie_detail_not_modified(self, mocked_requests):
+        
+        response = self.client.get('/movie/detail', {'movie_id': 550})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['movie_info']['genre'], [{'name': 'Drama', 'color_code': '#af4448'}])
+        self.assertEqual(response['Cache-Control'], 'public, max-age=600')
+        self.assertWithinBudget(response)
+        
+        upstream_calls = mocked_requests.call_count
+        response       = self.client.get('/movie/detail', {'movie_id': 550}, HTTP_IF_NONE_MATCH=response['ETag'])
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(mocked_requests.call_count, upstream_calls)
+    
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get)
+    def test_actor_detail_personalized(self, mocked_requests):
+        
+        response = self.client.get('/movie/actor/detail', {'actor_id': 819}, **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, max-age=0, must-revalidate')
+        self.assertIn('Authorization', response['Vary'])
+        self.assertEqual(response.json()['actor_info']['intimacy'], 1)
+        self.assertEqual(response.json()['actor_info']['starring_list'][0]['ratings'], {'review': True, 'rating': 4.5})
+        self.assertWithinBudget(response, 'authenticated')
+        
+        response = self.client.get('/movie/actor/detail', {'actor_id': 819})
+        
+        self.assertEqual(response['Cache-Control'], 'public, max-age=600')
+        self.assertEqual(response.json()['actor_info']['starring_list'][0]['ratings'], 4.0)
+        self.assertEqual(response.json()['actor_info']['starring_list'][0]['platform'], TMDB_IMAGE_BASE_URL+'/logo.jpg')
+    
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get_slow_images)
+    def test_movie_detail_partial(self, mocked_requests):
+        
+        response = self.client.get('/movie/detail', {'movie_id': 550})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['movie_info']['partial'])
+        self.assertEqual(response.json()['movie_info']['title'], '파이트 클럽')
+        self.assertEqual(response.json()['movie_info']['image_url'], '')
+        self.assertEqual(response.json()['movie_info']['video_url'], [TMDB_VIDEO_BASE_URL+'video_key'])
+    
+    @override_settings(REQUEST_DEADLINE_OPTIONAL_RESERVE=60)
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get)
+    def test_actor_detail_optional_sections_skipped(self, mocked_requests):
+        
+        response = self.client.get('/movie/actor/detail', {'actor_id': 819})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['actor_info']['partial'])
+        self.assertEqual(response.json()['actor_info']['starring_list'][0]['platform'], '')
+        self.assertEqual(mocked_requests.call_count, 2)
+    
+    @override_settings(REQUEST_DEADLINES={'movie/detail': 1e-9})
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get)
+    def test_movie_detail_deadline_exceeded(self, mocked_requests):
+        
+        response = self.client.get('/movie/detail', {'movie_id': 550})
+        
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(response.json(), {'message': 'DEADLINE_EXCEEDED'})
+        mocked_requests.assert_not_called()
+
+class ActorAffinityTest(PerformanceBudgetMixin, TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            social_id       = '소셜아이디',
+            nickname        = '테스트유저',
+            group           = Group.objects.create(name='user'),
+            social_platform = SocialPlatform.objects.create(name='naver'),
+        )
+        cls.header = {'HTTP_Authorization': jwt.encode({'id': cls.user.id}, SECRET_KEY, algorithm=ALGORITHM)}
+    
+    def setUp(self):
+        cache.clear()
+    
+    @patch('core.tmdb.requests.get', side_effect=mock_tmdb_get)
+    def test_updated_on_review_create_and_delete(self, mocked_requests):
+        data = {
+            'movie_id'     : 550,
+            'title'        : 'title',
+            'content'      : 'content',
+            'rating'       : 4.5,
+            'watched_date' : '2022-10-26 19:43:14',
+            'with_user'    : '',
+        }
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post('/review', data=data, **self.header)
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            list(UserActorAffinity.objects.filter(user=self.user).values_list('actor_id', 'name', 'review_count')),
+            [(819, 'Edward Norton', 1)]
+        )
+        
+        review = Review.objects.get(user=self.user, movie_id='550')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/review/{review.id}', **self.header)
+        
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(UserActorAffinity.objects.filter(user=self.user).exists())
+        self.assertEqual(len([call for call in mocked_requests.call_args_list if '/credits' in call.args[0]]), 1)
+    
+    @patch('movies.affinity.schedule_rebuild')
+    @patch('movies.affinity.add_review', side_effect=RuntimeError('deadlock'))
+    def test_failed_update_schedules_rebuild(self, mocked_add_review, mocked_schedule):
+        data = {
+            'movie_id'     : 550,
+            'title'        : 'title',
+            'content'      : 'content',
+            'rating'       : 4.5,
+            'watched_date' : '2022-10-26 19:43:14',
+            'with_user'    : '',
+        }
+        
+        with self.assertLogs('movies.affinity', 'ERROR'), patch('core.tmdb.requests.get', side_effect=mock_tmdb_get):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = APIClient().post('/review', data=data, **self.header)
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Review.objects.filter(user=self.user, movie_id='550').exists())
+        mocked_schedule.assert_called_once_with(self.user.id)
+    
+    @patch('movies.affinity.connections')
+    @patch('movies.affinity.rebuild_user', side_effect=RuntimeError('deadlock'))
+    def test_failed_rebuild_logged(self, mocked_rebuild, mocked_connections):
+        cache.add(f'affinity_rebuild:{self.user.id}', True)
+        
+        with self.assertLogs('movies.affinity', 'ERROR'):
+            affinity._rebuild_in_background(self.user.id)
+        
+        self.assertIsNone(cache.get(f'affinity_rebuild:{self.user.id}'))
+        mocked_connections.close_all.assert_called_once_with()
+    
+    @patch('movies.affinity.threading.Timer')
+    def test_rebuild_scheduled_once(self, mocked_timer):
+        
+        self.assertTrue(affinity.schedule_rebuild(self.user.id))
+        self.assertFalse(affinity.schedule_rebuild(self.user.id))
+        mocked_timer.assert_called_once_with(60, affinity._rebuild_in_background, args=(self.user.id,))
+    
+    def test_top_actors(self):
+        UserActorAffinity.objects.bulk_create([
+            UserActorAffinity(user=self.user, actor_id=819, name='Edward Norton', review_count=2),
+            UserActorAffinity(user=self.user, actor_id=287, name='Brad Pitt', profile_path='/pitt.jpg', review_count=5),
+            UserActorAffinity(user=self.user, actor_id=1283, name='Helena Bonham Carter', review_count=1),
+        ])
+        
+        response = self.client.get('/movie/actor/top', {'limit': 2}, **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'], [
+            {'id': 287, 'name': 'Brad Pitt', 'image': TMDB_IMAGE_BASE_URL+'/pitt.jpg', 'intimacy': 5},
+            {'id': 819, 'name': 'Edward Norton', 'image': '', 'intimacy': 2},
+        ])
+        self.assertWithinBudget(response)
+        
+        response = self.client.get('/movie/actor/top', {'limit': -1}, **self.header)
+        
+        self.assertEqual([actor['id'] for actor in response.json()['result']], [287])
+        
+        response = self.client.get('/movie/actor/top', {'limit': 'abc'}, **self.header)
+        
+        self.assertEqual((response.status_code, response.json()), (400, {'message': 'INVALID_LIMIT'}))
+    
+    @patch('core.tmdb.requests.get', side_effect=mock_tmdb_get)
+    def test_rebuild(self, mocked_requests):
+        Review.objects.create(user=self.user, movie_id='550', title='title', content='content', rating=4.5)
+        UserActorAffinity.objects.create(user=self.user, actor_id=287, review_count=3)
+        
+        call_command('rebuild_actor_affinity', stdout=MagicMock())
+        
+        self.assertEqual(list(UserActorAffinity.objects.filter(user=self.user).values_list('actor_id', 'review_count')), [(819, 1)])
+
+class RecommendationTest(PerformanceBudgetMixin, TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        group           = Group.objects.create(name='user')
+        social_platform = SocialPlatform.objects.create(name='naver')
+        ratings         = {
+            '첫번째' : {'550': 5.0, '13': 4.5, '680': 1.0},
+            '두번째' : {'550': 4.5, '13': 4.0, '680': 1.5, '155': 5.0},
+            '세번째' : {'550': 5.0, '680': 1.0, '155': 4.0},
+            '네번째' : {'550': 4.0, '680': 2.0},
+        }
+        
+        cls.users = {}
+        
+        for nickname, movies in ratings.items():
+            cls.users[nickname] = User.objects.create(social_id=nickname, nickname=nickname, group=group, social_platform=social_platform)
+            
+            for movie_id, rating in movies.items():
+                Review.objects.create(user=cls.users[nickname], movie_id=movie_id, title='title', content='content', rating=rating)
+        
+        cls.header = {'HTTP_Authorization': jwt.encode({'id': cls.users['네번째'].id}, SECRET_KEY, algorithm=ALGORITHM)}
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_build(self):
+        MovieSimilarity.objects.create(movie_id=999, payload=[{'id': 550, 'score': 0.5}])
+        
+        call_command('build_recommendations', stdout=MagicMock())
+        
+        self.assertEqual(
+            {similarity.movie_id: [movie['id'] for movie in similarity.payload] for similarity in MovieSimilarity.objects.all()},
+            {550: [13, 155], 13: [550, 155], 155: [550, 13]}
+        )
+        self.assertEqual(
+            {recommendation.user.nickname: recommendation.payload for recommendation in UserRecommendation.objects.all()},
+            {
+                '첫번째' : [{'id': 155, 'score': 4.86}],
+                '세번째' : [{'id': 13, 'score': 4.75}],
+                '네번째' : [{'id': 13, 'score': 4.0}, {'id': 155, 'score': 4.0}],
+            }
+        )
+    
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get_or_not_found)
+    def test_recommendations_get(self, mocked_requests):
+        UserRecommendation.objects.create(user=self.users['네번째'], payload=[{'id': 550, 'score': 4.5}, {'id': 13, 'score': 4.0}])
+        
+        response = self.client.get('/movie/recommendations', {'limit': 1}, **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'], [
+            {'id': 550, 'title': '파이트 클럽', 'en_title': 'Fight Club', 'poster': TMDB_IMAGE_BASE_URL+'/poster.jpg', 'release_date': '1999-10-12', 'ratings': 3.9,
+             'genres': [{'id': 18, 'name': 'Drama'}], 'runtime': 139, 'score': 4.5},
+        ])
+        self.assertWithinBudget(response)
+        
+        response = self.client.get('/movie/recommendations', **self.header)
+        
+        self.assertEqual([movie['id'] for movie in response.json()['result']], [550, 13])
+        
+        response = self.client.get('/movie/recommendations', {'limit': 0}, **self.header)
+        
+        self.assertEqual([movie['id'] for movie in response.json()['result']], [550])
+        
+        response = self.client.get('/movie/recommendations', {'limit': 'abc'}, **self.header)
+        
+        self.assertEqual((response.status_code, response.json()), (400, {'message': 'INVALID_LIMIT'}))
+    
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get_or_not_found)
+    def test_similar_movies_get(self, mocked_requests):
+        MovieSimilarity.objects.create(movie_id=13, payload=[{'id': 550, 'score': 0.64}, {'id': 155, 'score': 0.21}])
+        
+        response = self.client.get('/movie/13/similar')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(movie['id'], movie['score'], movie.get('title')) for movie in response.json()['result']], [(550, 0.64, '파이트 클럽'), (155, 0.21, None)])
+        self.assertWithinBudget(response)
+        
+        response = self.client.get('/movie/680/similar')
+        
+        self.assertEqual(response.json()['result'], [])
+        
+        response = self.client.get('/movie/13/similar', {'limit': -5})
+        
+        self.assertEqual([movie['id'] for movie in response.json()['result']], [550])
+        self.assertEqual(self.client.get('/movie/13/similar', {'limit': 'abc'}).status_code, 400)
@@ -1,6 +1,7 @@
 from django.urls  import path
 
-from movies.views import MovieDetailView, MovieReviewView, MoviePopularView, MovieLatestView, MovieSearchView, ActorDetailView, ActorSearchView
+from movies.views import MovieDetailView, MovieReviewView, MoviePopularView, MovieLatestView, MovieSearchView, ActorDetailView, ActorSearchView, ActorTopView
+from movies.views import MovieRecommendationView, SimilarMovieView
 
 urlpatterns = [
     # 영화 상세페이지
@@ -9,6 +10,12 @@ urlpatterns = [
     #영화 리뷰 전체
     path('/<int:movie_id>/reviews', MovieReviewView.as_view()),
     
+    #비슷한 영화
+    path('/<int:movie_id>/similar', SimilarMovieView.as_view()),
+    
+    #사용자 추천 영화
+    path('/recommendations', MovieRecommendationView.as_view()),
+    
     #영화 검색 추천 데이터
     path('/popular', MoviePopularView.as_view()),
     
@@ -24,6 +31,9 @@ urlpatterns = [
     # 영화배우 상세페이지
     path('/actor/detail', ActorDetailView.as_view()),
     
+    # 많이 본 영화배우
+    path('/actor/top', ActorTopView.as_view()),
+    
     # # 영화배우 리스트
     # path('/actor/list', ActorListView.as_view()),
     
@@ -0,0 +1,19 @@
+"""ASGI 배포 설정 (gunicorn + uvicorn worker)
+
+TMDB 호출이 많은 async 뷰는 워커 하나의 이벤트 루프에서 요청을 동시에 처리하고,
+이벤트 루프별 httpx 연결 풀을 요청 간에 재사용합니다.
+
+    gunicorn --config myview/gunicorn_asgi.py myview.asgi:application
+"""
+import multiprocessing, os
+
+from uvicorn.workers import UvicornWorker
+
+class DjangoUvicornWorker(UvicornWorker):
+    # Django 4.0 ASGI 핸들러는 lifespan 이벤트를 지원하지 않습니다.
+    CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, 'lifespan': 'off'}
+
+bind         = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers      = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'myview.gunicorn_asgi.DjangoUvicornWorker'
+timeout      = 30
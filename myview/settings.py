@@ -9,13 +9,15 @@ https://docs.djangoproject.com/en/4.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
-from pathlib import Path
+import os
 
-from my_settings import DATABASES, SECRET_KEY
+from pathlib import Path
 
-import pymysql
+from core.db.config import configure_databases, install_driver
+from my_settings    import DATABASES, SECRET_KEY
 
-pymysql.install_as_MySQLdb() 
+# mysqlclient(C 확장)가 없으면 PyMySQL을 사용합니다.
+DB_DRIVER = install_driver()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -52,9 +54,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.TMDBErrorMiddleware',
+    'core.middleware.DeadlineMiddleware',
+    'core.middleware.DatabaseRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     # 'django.middleware.csrf.CsrfViewMiddleware',
     # 'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -86,7 +94,35 @@ WSGI_APPLICATION = 'myview.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
-DATABASES = DATABASES
+# MySQL은 연결 유지(CONN_MAX_AGE), 상태 확인(CONN_HEALTH_CHECKS), 연결 풀(DB_POOL_SIZE) 설정을 추가합니다.
+# 요청 전체를 트랜잭션으로 감싸지 않고(ATOMIC_REQUESTS=False) 쓰기 구간만 transaction.atomic으로 묶습니다.
+# (core.db.config.configure_databases 참고)
+DATABASES = configure_databases(DATABASES)
+
+# 요청의 읽기 쿼리는 replica로, 쓰기는 default(primary)로 보냅니다. (core.routers.ReplicaRouter)
+# replica alias는 my_settings의 DATABASES나 DB_REPLICA_HOSTS 환경변수로 추가합니다.
+DATABASE_ROUTERS  = ['core.routers.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica')]
+
+# 항상 primary에서 읽을 경로(URL 패턴)입니다. 뷰 클래스에 use_primary_db = True를 지정해도 됩니다.
+DATABASE_PRIMARY_ROUTES = []
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+
+# TMDB 요청 한도(core.ratelimit), 워커 간 single-flight(TMDB_SINGLE_FLIGHT_SHARED), 순위 갱신 락(ranking_refresh:*)은
+# 캐시로 워커 간 상태를 공유하므로 배포 환경에서는 REDIS_URL 환경변수로 공유 캐시(Redis)를 지정합니다.
+# 지정하지 않으면 워커 프로세스마다 따로 동작하는 로컬 메모리 캐시를 사용하고,
+# CACHE_ALLOW_LOCAL이 False이면 시스템 체크(core.E001)가 오류로, True이면 경고(core.W001)로 알립니다.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+CACHE_ALLOW_LOCAL = DEBUG
 
 
 # Password validation
@@ -156,5 +192,59 @@ CORS_ALLOW_HEADERS = (
     'x-csrftoken',
     'x-requested-with',
 )
-#Transaction
-ATOMIC_REQUESTS = True
\ No newline at end of file
+## TMDB
+TMDB_BASE_URL = os.environ.get('TMDB_BASE_URL', 'https://api.themoviedb.org/3')
+
+# live : TMDB API 호출, record : 호출 후 응답을 fixture로 저장, replay : 저장된 fixture로만 응답
+TMDB_TRANSPORT   = os.environ.get('TMDB_TRANSPORT', 'live')
+TMDB_FIXTURE_DIR = os.environ.get('TMDB_FIXTURE_DIR', BASE_DIR / 'tmdb_fixtures')
+
+TMDB_REQUEST_TIMEOUT = 10
+
+# async 뷰에서 사용하는 httpx 연결 풀 크기 (이벤트 루프별)
+TMDB_HTTP_MAX_CONNECTIONS           = 100
+TMDB_HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+
+# 같은 요청이 동시에 들어오면 한 번만 호출합니다. SHARED는 캐시 락으로 워커 간에도 합칩니다. (공유 캐시 백엔드 필요)
+TMDB_SINGLE_FLIGHT_TIMEOUT = 15
+TMDB_SINGLE_FLIGHT_SHARED  = os.environ.get('TMDB_SINGLE_FLIGHT_SHARED') == '1'
+
+# 워커 전체의 초당 TMDB 요청 수 (캐시 백엔드로 공유, 0이면 제한하지 않음)
+# background(관리 명령, 백그라운드 갱신) 요청은 RESERVE 비율의 토큰을 interactive 요청을 위해 남겨 둡니다.
+TMDB_RATE_LIMIT_RATE                = int(os.environ.get('TMDB_RATE_LIMIT_RATE', 40))
+TMDB_RATE_LIMIT_CAPACITY            = 40
+TMDB_RATE_LIMIT_BACKGROUND_RESERVE  = 0.3
+TMDB_RATE_LIMIT_MAX_WAIT            = 0.2
+TMDB_RATE_LIMIT_BACKGROUND_MAX_WAIT = 30
+
+# 경로 그룹(movie, person, search 등)별로 연속 실패 시 호출을 차단하고, RESET_TIMEOUT(초)마다 시험 호출합니다.
+TMDB_CIRCUIT_FAILURE_THRESHOLD = 5
+TMDB_CIRCUIT_RESET_TIMEOUT     = 30
+
+# 호출 실패, 차단 중에 대신 반환할 마지막 정상 응답 보관 시간(초)
+TMDB_STALE_TIMEOUT = 60*60*24
+
+## Deadline
+# 경로(URL 패턴)별 요청 처리 제한 시간(초), 0이면 제한하지 않습니다.
+REQUEST_DEADLINE_DEFAULT = 10
+REQUEST_DEADLINES        = {
+    'movie/detail'       : 3,
+    'movie/actor/detail' : 3,
+}
+
+# 남은 시간이 이보다 적으면 선택 항목(이미지, 영상, 플랫폼 로고, 배경 이미지)을 조회하지 않고 partial로 응답합니다.
+REQUEST_DEADLINE_OPTIONAL_RESERVE = 0.5
+
+## Compression
+COMPRESSION_MIN_SIZE = 1024
+
+## Metrics
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+## REST Framework
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
\ No newline at end of file
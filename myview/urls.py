@@ -1,9 +1,12 @@
 from django.urls import include, path
 
+from core.views import MetricsView
+
 urlpatterns = [
     path('api-auth', include('rest_framework.urls')),
     path('user', include('users.urls')),
     path('movie', include('movies.urls')),
     path('review', include('reviews.urls')),
-    path('admin', include('adminpage.urls'))
+    path('admin', include('adminpage.urls')),
+    path('metrics', MetricsView.as_view()),
 ]
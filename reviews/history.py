@@ -0,0 +1,393 @@
+"""리뷰 기록 가져오기, 내보내기 (CSV, JSONL)
+
+가져오기는 파일을 한 줄씩 읽어 IMPORT_BATCH_SIZE개씩 검증하고, 묶음마다
+이미 작성한 영화 확인, 태그 조회와 생성을 쿼리 몇 개로 처리한 뒤 리뷰, 리뷰 태그, 리뷰 장소를 bulk_create로 저장합니다.
+내보내기는 id 순서로 EXPORT_CHUNK_SIZE개씩 읽고 묶음의 태그, 장소를 함께 조회해 한 줄씩 내보내므로
+기록 크기와 관계없이 메모리 사용량이 일정합니다.
+ASGI에서는 응답을 이벤트 루프에서 읽어 ORM을 호출할 수 없으므로 spool_export로 임시 파일에 먼저 기록해 내보냅니다.
+
+CSV는 HISTORY_FIELDS 열을 사용하고 태그는 "|"로 구분합니다.
+JSONL은 한 줄에 리뷰 하나이며 tags는 목록, place는 {'name', 'mapx', 'mapy', 'link'} 또는 null입니다.
+"""
+import csv, datetime, io, itertools, json, logging, math, random, tempfile, threading
+
+from collections import defaultdict
+from decimal     import Decimal, InvalidOperation
+
+from django.core.cache import cache
+from django.db         import connections, transaction
+
+from core.ratelimit  import background
+from core.renderers  import dumps
+from movies          import affinity
+from reviews         import places, tag_index
+from reviews.models  import ColorCode, Review, ReviewPlace, ReviewTag, Tag
+from users           import stats
+
+HISTORY_FORMATS   = ['csv', 'jsonl']
+HISTORY_FIELDS    = ['movie_id', 'title', 'content', 'rating', 'watched_date', 'with_user', 'tags', 'place_name', 'place_mapx', 'place_mapy', 'place_link']
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_ROWS   = 10000
+IMPORT_MAX_ERRORS = 100
+IMPORT_MAX_TAGS   = 20
+EXPORT_CHUNK_SIZE = 500
+EXPORT_SPOOL_SIZE = 1024*1024*5
+REBUILD_LOCK      = 60*10
+TAG_SEPARATOR     = '|'
+
+logger = logging.getLogger(__name__)
+
+def get_format(name, default='csv'):
+    """파일 이름이나 format 파라미터에서 형식(csv, jsonl)을 구합니다.
+
+    Raises:
+        ValueError: 지원하지 않는 형식인 경우 발생합니다.
+    """
+    value = (name or default).rsplit('.', 1)[-1].lower()
+
+    if value not in HISTORY_FORMATS:
+        raise ValueError('unsupported format')
+
+    return value
+
+def read_rows(stream, format):
+    """텍스트 스트림을 한 줄씩 읽어 리뷰 dict를 반환합니다. JSON으로 읽을 수 없는 줄은 None을 반환합니다."""
+    if format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        if not line.strip():
+            continue
+
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+
+        if isinstance(row, dict):
+            place = row.get('place') or {}
+            row   = {
+                **row,
+                'place_name' : place.get('name', ''),
+                'place_mapx' : place.get('mapx'),
+                'place_mapy' : place.get('mapy'),
+                'place_link' : place.get('link', ''),
+            } if isinstance(place, dict) else None
+
+        yield row if isinstance(row, dict) else None
+
+def clean_text(row, key, max_length):
+    value = str(row.get(key) or '').strip()
+
+    if len(value) > max_length:
+        raise ValueError(f'{key} is too long')
+
+    return value
+
+def clean_watched_date(value):
+    """'YYYY-MM-DD' 또는 'YYYY-MM-DD HH:MM[:SS]'를 (date, time)으로 변환합니다."""
+    value = str(value or '').strip()
+
+    if not value:
+        return None, None
+
+    if len(value) == 10:
+        return datetime.date.fromisoformat(value), None
+
+    watched_at = datetime.datetime.fromisoformat(value)
+
+    return watched_at.date(), watched_at.time()
+
+def clean_row(row):
+    """가져올 리뷰 한 줄을 검증해 저장할 값으로 변환합니다.
+
+    Raises:
+        ValueError: 값이 올바르지 않은 경우 발생합니다.
+    """
+    if row is None:
+        raise ValueError('invalid row')
+
+    movie_id = str(row.get('movie_id') or '').strip()
+
+    if not movie_id.isdigit():
+        raise ValueError('invalid movie_id')
+
+    try:
+        rating = Decimal(str(row.get('rating')).strip())
+    except InvalidOperation:
+        raise ValueError('invalid rating')
+
+    # Review.rating은 DecimalField(max_digits=2, decimal_places=1)이므로 0~5의 소수점 한 자리까지 허용합니다.
+    if not rating.is_finite() or not Decimal('0') <= rating <= Decimal('5') or rating != rating.quantize(Decimal('0.1')):
+        raise ValueError('invalid rating')
+
+    tags = row.get('tags') or []
+    tags = tags.split(TAG_SEPARATOR) if isinstance(tags, str) else tags
+    tags = list(dict.fromkeys(str(tag).strip() for tag in tags if str(tag).strip()))
+
+    if len(tags) > IMPORT_MAX_TAGS or any(len(tag) > 50 for tag in tags):
+        raise ValueError('invalid tags')
+
+    place = None
+
+    if row.get('place_mapx') not in (None, '') and row.get('place_mapy') not in (None, ''):
+        mapx, mapy = float(row['place_mapx']), float(row['place_mapy'])
+
+        # float()는 'inf', 'nan'도 읽으므로 geohash로 색인할 수 있는 경위도만 허용합니다.
+        if not (math.isfinite(mapx) and math.isfinite(mapy) and places.is_valid_point(mapx, mapy)):
+            raise ValueError('invalid place')
+
+        place = (mapx, mapy, clean_text(row, 'place_name', 50), clean_text(row, 'place_link', 500))
+
+    watched_date, watched_time = clean_watched_date(row.get('watched_date'))
+
+    return {
+        'movie_id'     : movie_id,
+        'title'        : clean_text(row, 'title', 100),
+        'content'      : clean_text(row, 'content', 1000),
+        'rating'       : rating,
+        'watched_date' : watched_date,
+        'watched_time' : watched_time,
+        'with_user'    : clean_text(row, 'with_user', 30),
+        'tags'         : tags,
+        'place'        : place,
+    }
+
+def resolve_tags(names, color_ids):
+    """태그 이름을 {name: tag_id}로 반환합니다. 없는 태그는 한 번에 생성합니다.
+
+    같은 이름의 태그가 여러 개면 먼저 만든 태그를 사용합니다.
+    """
+    if not names:
+        return {}
+
+    def find():
+        tag_ids = {}
+
+        for tag_id, name in Tag.objects.filter(name__in=names).order_by('-id').values_list('id', 'name'):
+            tag_ids[name] = tag_id
+
+        return tag_ids
+
+    tag_ids = find()
+    missing = [name for name in names if name not in tag_ids]
+
+    if missing:
+        # MySQL의 bulk_create는 생성한 pk를 돌려주지 않으므로 다시 조회합니다.
+        Tag.objects.bulk_create([Tag(name=name, color_code_id=random.choice(color_ids)) for name in missing])
+        tag_ids = find()
+
+    return tag_ids
+
+def resolve_places(rows, place_ids):
+    """묶음의 장소를 {place: place_id}(place_ids)에 채웁니다. 같은 장소는 가져오기 전체에서 한 번만 조회합니다."""
+    for row in rows:
+        if row['place'] and row['place'] not in place_ids:
+            place_ids[row['place']] = places.get_or_create_place(*row['place']).id
+
+def save_batch(user, rows, color_ids, place_ids):
+    """검증한 리뷰 묶음을 저장합니다. 태그 색인은 커밋된 뒤에 리뷰별로 갱신합니다."""
+    resolve_places(rows, place_ids)
+
+    with transaction.atomic(using='default'):
+        tag_ids = resolve_tags(sorted({tag for row in rows for tag in row['tags']}), color_ids)
+
+        Review.objects.bulk_create([
+            Review(user=user, **{key: value for key, value in row.items() if key not in ('tags', 'place')}) for row in rows
+        ])
+
+        review_ids = dict(Review.objects.filter(user=user, movie_id__in=[row['movie_id'] for row in rows]).values_list('movie_id', 'id'))
+
+        ReviewTag.objects.bulk_create([
+            ReviewTag(review_id=review_ids[row['movie_id']], tag_id=tag_ids[tag]) for row in rows for tag in row['tags']
+        ])
+        ReviewPlace.objects.bulk_create([
+            ReviewPlace(review_id=review_ids[row['movie_id']], place_id=place_ids[row['place']]) for row in rows if row['place']
+        ])
+
+        for row in rows:
+            if row['tags']:
+                tag_index.on_commit(tag_index.add_review_tags, row['movie_id'], [tag_ids[tag] for tag in row['tags']])
+
+def import_reviews(user, rows, batch_size=IMPORT_BATCH_SIZE):
+    """리뷰 기록을 가져옵니다.
+
+    이미 리뷰를 작성한 영화와 파일 안에서 중복된 영화는 건너뛰고, 올바르지 않은 줄은 errors에 몇 번째 리뷰인지(row)와 함께 기록합니다.
+    IMPORT_MAX_ROWS줄까지만 읽습니다.
+    묶음마다 커밋하므로 파일을 더 읽을 수 없으면(인코딩, CSV 형식 오류) 그때까지 읽은 줄만 저장하고 aborted를 True로 반환합니다.
+
+    Returns:
+        {'created', 'skipped', 'errors', 'aborted'} 가져온 리뷰 수, 건너뛴 리뷰 수, 오류 목록(최대 IMPORT_MAX_ERRORS개),
+        파일을 끝까지 읽지 못했는지를 반환합니다.
+    """
+    result    = {'created': 0, 'skipped': 0, 'errors': [], 'aborted': False}
+    color_ids = list(ColorCode.objects.values_list('id', flat=True))
+    seen      = set()
+    place_ids = {}
+
+    def add_error(line, message):
+        if len(result['errors']) < IMPORT_MAX_ERRORS:
+            result['errors'].append({'row': line, 'message': message})
+
+    def number(rows):
+        line = 0
+
+        try:
+            for line, row in enumerate(itertools.islice(rows, IMPORT_MAX_ROWS+1), 1):
+                yield line, row
+        except (ValueError, csv.Error):
+            result['aborted'] = True
+            add_error(line+1, 'unreadable file')
+
+    numbered = number(rows)
+
+    while batch := list(itertools.islice(numbered, batch_size)):
+        valid = []
+
+        for line, row in batch:
+            if line > IMPORT_MAX_ROWS:
+                add_error(line, 'too many rows')
+                break
+
+            try:
+                valid.append(clean_row(row))
+            except (ValueError, TypeError) as error:
+                add_error(line, str(error))
+
+        existing = set(Review.objects.filter(user=user, movie_id__in=[row['movie_id'] for row in valid]).values_list('movie_id', flat=True))
+        created  = []
+
+        for row in valid:
+            if row['movie_id'] in existing or row['movie_id'] in seen:
+                result['skipped'] += 1
+                continue
+
+            seen.add(row['movie_id'])
+            created.append(row)
+
+        if created:
+            save_batch(user, created, color_ids, place_ids)
+
+        result['created'] += len(created)
+
+    return result
+
+def rebuild_derived(user_id):
+    """가져온 리뷰로 사용자 통계와 배우 친밀도를 다시 계산합니다. (리뷰마다 TMDB를 조회하지 않도록 가져오기가 끝난 뒤 한 번)"""
+    stats.rebuild_users([user_id])
+    affinity.rebuild_user(user_id)
+
+@background
+def _rebuild_in_background(user_id):
+    try:
+        # 실행 중에 다른 가져오기가 끝났으면(pending) 그 리뷰까지 읽도록 한 번 더 계산합니다.
+        while True:
+            cache.delete(f'history_rebuild_pending:{user_id}')
+            rebuild_derived(user_id)
+
+            if not cache.get(f'history_rebuild_pending:{user_id}'):
+                break
+    except Exception:
+        logger.exception('user %s imported history rebuild failed', user_id)
+    finally:
+        cache.delete(f'history_rebuild:{user_id}')
+        connections.close_all()
+
+def schedule_rebuild(user_id):
+    """백그라운드 스레드에서 rebuild_derived를 실행합니다. 실패하면 rebuild_user_stats, rebuild_actor_affinity 명령으로 보정합니다.
+
+    캐시 락으로 같은 사용자의 재계산이 동시에 여러 번 실행되지 않도록 하고, 실행 중이면 끝난 뒤 다시 계산하도록 표시만 합니다.
+    """
+    if not cache.add(f'history_rebuild:{user_id}', True, REBUILD_LOCK):
+        cache.set(f'history_rebuild_pending:{user_id}', True, REBUILD_LOCK)
+        return False
+
+    threading.Thread(target=_rebuild_in_background, args=(user_id,), daemon=True).start()
+
+    return True
+
+def iter_export_rows(user):
+    """사용자의 리뷰를 id 순서로 EXPORT_CHUNK_SIZE개씩 읽어 한 줄씩 반환합니다. (묶음마다 리뷰, 태그, 장소 쿼리 하나씩)"""
+    last_id = 0
+
+    while True:
+        reviews = list(Review.objects.filter(user=user, id__gt=last_id).order_by('id')[:EXPORT_CHUNK_SIZE])
+
+        if not reviews:
+            return
+
+        review_ids   = [review.id for review in reviews]
+        review_tags  = defaultdict(list)
+        review_place = {}
+
+        for review_id, name in ReviewTag.objects.filter(review_id__in=review_ids).order_by('id').values_list('review_id', 'tag__name'):
+            review_tags[review_id].append(name)
+
+        for review_place_row in ReviewPlace.objects.filter(review_id__in=review_ids).select_related('place').order_by('id'):
+            review_place.setdefault(review_place_row.review_id, review_place_row.place)
+
+        for review in reviews:
+            place        = review_place.get(review.id)
+            watched_date = f'{review.watched_date} {review.watched_time}' if review.watched_time else str(review.watched_date or '')
+
+            yield {
+                'movie_id'     : review.movie_id,
+                'title'        : review.title,
+                'content'      : review.content,
+                'rating'       : float(review.rating),
+                'watched_date' : watched_date,
+                'with_user'    : review.with_user,
+                'tags'         : review_tags[review.id],
+                'place'        : {'name': place.name, 'mapx': place.mapx, 'mapy': place.mapy, 'link': place.link} if place else None,
+            }
+
+        last_id = reviews[-1].id
+
+def iter_csv(rows):
+    """리뷰를 CSV 줄 단위 bytes로 반환합니다. (UTF-8 BOM 포함, 엑셀 호환)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+        return value.encode('utf-8')
+
+    writer.writerow(HISTORY_FIELDS)
+    yield b'\xef\xbb\xbf' + flush()
+
+    for row in rows:
+        place = row['place'] or {}
+
+        writer.writerow([
+            row['movie_id'], row['title'], row['content'], row['rating'], row['watched_date'], row['with_user'],
+            TAG_SEPARATOR.join(row['tags']), place.get('name', ''), place.get('mapx', ''), place.get('mapy', ''), place.get('link', ''),
+        ])
+        yield flush()
+
+def iter_jsonl(rows):
+    """리뷰를 JSON Lines bytes로 반환합니다."""
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+EXPORT_WRITERS = {
+    'csv'   : (iter_csv, 'text/csv; charset=utf-8'),
+    'jsonl' : (iter_jsonl, 'application/x-ndjson'),
+}
+
+def spool_export(chunks):
+    """내보낼 bytes를 모두 기록한 파일을 처음 위치로 되돌려 반환합니다.
+
+    EXPORT_SPOOL_SIZE까지는 메모리에, 넘으면 디스크 임시 파일에 기록하며 응답을 닫을 때 함께 삭제됩니다.
+    """
+    file = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+
+    for chunk in chunks:
+        file.write(chunk)
+
+    file.seek(0)
+
+    return file
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.tag_index import SIMILAR_MOVIE_COUNT, build_all
+
+class Command(BaseCommand):
+    help = '리뷰 태그 전체로 영화별 태그 빈도, 태그 동시 출현 수, 태그가 비슷한 영화를 다시 계산합니다. (매일 밤 cron 등록용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--similar', type=int, default=SIMILAR_MOVIE_COUNT, help='영화별로 저장할 태그가 비슷한 영화 수')
+
+    def handle(self, *args, **options):
+        start  = time.perf_counter()
+        result = build_all(options['similar'])
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"tag index built : {result['review_tags']} review tags, {result['movies']} movies, {result['tags']} tags ({time.perf_counter()-start:.1f}s)"
+        ))
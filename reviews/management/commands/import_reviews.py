@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ratelimit import background
+from reviews        import history
+from users.models   import User
+
+class Command(BaseCommand):
+    help = '다른 서비스에서 옮겨온 리뷰 기록(CSV, JSONL)을 사용자의 리뷰로 가져옵니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', type=int, help='리뷰를 가져올 사용자 id')
+        parser.add_argument('path', help='가져올 파일 경로')
+        parser.add_argument('--format', choices=history.HISTORY_FORMATS, help='파일 형식 (기본값: 파일 확장자)')
+
+    @background
+    def handle(self, *args, **options):
+        try:
+            user   = User.objects.get(id=options['user'])
+            format = history.get_format(options['format'] or options['path'])
+        except (User.DoesNotExist, ValueError) as error:
+            raise CommandError(error)
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            result = history.import_reviews(user, history.read_rows(stream, format))
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"row {error['row']} : {error['message']}"))
+
+        if result['aborted']:
+            self.stdout.write(self.style.ERROR('file could not be read to the end, rows before the error were imported'))
+
+        if result['created']:
+            history.rebuild_derived(user.id)
+
+        self.stdout.write(self.style.SUCCESS(f"reviews imported : {result['created']} created, {result['skipped']} skipped, {len(result['errors'])} errors"))
@@ -0,0 +1,71 @@
+# Generated by Django 4.0.4 on 2026-10-19 17:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieTagSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('movie_id', models.IntegerField(unique=True)),
+                ('payload', models.JSONField(default=list)),
+            ],
+            options={
+                'db_table': 'movie_tag_similarities',
+            },
+        ),
+        migrations.CreateModel(
+            name='TagCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('other_tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.tag')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.tag')),
+            ],
+            options={
+                'db_table': 'tag_cooccurrences',
+            },
+        ),
+        migrations.CreateModel(
+            name='MovieTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('movie_id', models.IntegerField()),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='reviews.tag')),
+            ],
+            options={
+                'db_table': 'movie_tags',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tagcooccurrence',
+            index=models.Index(fields=['tag', '-review_count', 'other_tag'], name='tag_cooccurrence_top'),
+        ),
+        migrations.AddConstraint(
+            model_name='tagcooccurrence',
+            constraint=models.UniqueConstraint(fields=('tag', 'other_tag'), name='unique_tag_cooccurrence'),
+        ),
+        migrations.AddIndex(
+            model_name='movietag',
+            index=models.Index(fields=['movie_id', '-review_count', 'tag'], name='movie_tag_top'),
+        ),
+        migrations.AddConstraint(
+            model_name='movietag',
+            constraint=models.UniqueConstraint(fields=('movie_id', 'tag'), name='unique_movie_tag'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.0.4 on 2026-10-19 17:19
+
+from django.db import migrations, models
+
+# reviews.places의 encode를 복사했습니다. 이후 모듈이 바뀌어도 이 migration의 결과는 바뀌지 않아야 합니다.
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+BATCH_SIZE = 1000
+
+
+def encode(mapx, mapy, precision=9):
+    if not (-180 <= mapx <= 180 and -90 <= mapy <= 90):
+        return ''
+
+    lon_range, lat_range = [-180.0, 180.0], [-90.0, 90.0]
+    geohash, bits, value = [], 0, 0
+    is_lon               = True
+
+    while len(geohash) < precision:
+        current, coordinate = (lon_range, mapx) if is_lon else (lat_range, mapy)
+        middle              = (current[0]+current[1]) / 2
+
+        if coordinate >= middle:
+            value      = value*2 + 1
+            current[0] = middle
+        else:
+            value      = value*2
+            current[1] = middle
+
+        is_lon = not is_lon
+        bits  += 1
+
+        if bits == 5:
+            geohash.append(BASE32[value])
+            bits, value = 0, 0
+
+    return ''.join(geohash)
+
+
+def fill_geohash(apps, schema_editor):
+    Place  = apps.get_model('reviews', 'Place')
+    places = []
+
+    for place in Place.objects.exclude(mapx=None).exclude(mapy=None).only('id', 'mapx', 'mapy').iterator(chunk_size=BATCH_SIZE):
+        place.geohash = encode(place.mapx, place.mapy)
+        places.append(place)
+
+        if len(places) == BATCH_SIZE:
+            Place.objects.bulk_update(places, ['geohash'])
+            places = []
+
+    if places:
+        Place.objects.bulk_update(places, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_tag_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='geohash',
+            field=models.CharField(blank=True, default='', max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['geohash'], name='place_geohash'),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
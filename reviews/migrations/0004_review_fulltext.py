@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def add_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE `reviews` ADD FULLTEXT INDEX `review_fulltext` (`title`, `content`) WITH PARSER ngram')
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute('ALTER TABLE `reviews` DROP INDEX `review_fulltext`')
+
+
+class Migration(migrations.Migration):
+    """리뷰 제목, 내용 전문 검색용 FULLTEXT 인덱스입니다. (reviews.search)
+
+    ngram parser는 MySQL에서만 사용할 수 있으므로 다른 DB에서는 아무것도 하지 않습니다.
+    """
+
+    dependencies = [
+        ('reviews', '0003_place_geohash'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_fulltext_index, drop_fulltext_index),
+    ]
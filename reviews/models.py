@@ -36,13 +36,18 @@ class ReviewTag(models.Model):
         db_table = 'review_tags'
 
 class Place(models.Model):
-    name = models.CharField(max_length=50, blank=True)
-    mapx = models.FloatField(max_length=100, blank=True, null=True)
-    mapy = models.FloatField(max_length=100, blank=True, null=True)
-    link = models.URLField(max_length=500, blank=True)
+    """리뷰 장소입니다. mapx, mapy는 경도, 위도이며 geohash로 주변 장소를 조회합니다. (reviews.places)"""
+    name    = models.CharField(max_length=50, blank=True)
+    mapx    = models.FloatField(max_length=100, blank=True, null=True)
+    mapy    = models.FloatField(max_length=100, blank=True, null=True)
+    link    = models.URLField(max_length=500, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default='')
 
     class Meta:
         db_table = 'places'
+        indexes  = [
+            models.Index(fields=['geohash'], name='place_geohash'),
+        ]
         
 class ReviewPlace(TimeStampedModel):
     review = models.ForeignKey('reviews.Review', on_delete=models.CASCADE)
@@ -63,4 +68,47 @@ class ReviewUser(TimeStampedModel):
     user   = models.ForeignKey('users.User', on_delete=models.CASCADE)
     
     class Meta:
-        db_table = 'review_users'
\ No newline at end of file
+        db_table = 'review_users'
+class MovieTag(TimeStampedModel):
+    """영화에 달린 리뷰 중 태그가 달린 리뷰 수입니다. (영화별 태그 빈도)
+
+    리뷰를 작성, 수정, 삭제할 때 증감하고, build_tag_index 명령으로 다시 계산합니다. (reviews.tag_index)
+    """
+    movie_id     = models.IntegerField()
+    tag          = models.ForeignKey('reviews.Tag', on_delete=models.CASCADE)
+    review_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table    = 'movie_tags'
+        constraints = [
+            models.UniqueConstraint(fields=['movie_id', 'tag'], name='unique_movie_tag'),
+        ]
+        indexes     = [
+            models.Index(fields=['movie_id', '-review_count', 'tag'], name='movie_tag_top'),
+        ]
+
+class TagCooccurrence(TimeStampedModel):
+    """두 태그가 같은 리뷰에 함께 달린 리뷰 수입니다. (tag, other_tag) 양방향으로 저장합니다."""
+    tag          = models.ForeignKey('reviews.Tag', on_delete=models.CASCADE, related_name='+')
+    other_tag    = models.ForeignKey('reviews.Tag', on_delete=models.CASCADE, related_name='+')
+    review_count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        db_table    = 'tag_cooccurrences'
+        constraints = [
+            models.UniqueConstraint(fields=['tag', 'other_tag'], name='unique_tag_cooccurrence'),
+        ]
+        indexes     = [
+            models.Index(fields=['tag', '-review_count', 'other_tag'], name='tag_cooccurrence_top'),
+        ]
+
+class MovieTagSimilarity(TimeStampedModel):
+    """영화별로 태그 분포가 비슷한 영화 목록입니다. (build_tag_index 명령으로 매일 다시 계산)
+
+    payload는 유사도 순서의 [{'id': movie_id, 'score': similarity}] 목록입니다.
+    """
+    movie_id = models.IntegerField(unique=True)
+    payload  = models.JSONField(default=list)
+    
+    class Meta:
+        db_table = 'movie_tag_similarities'
@@ -0,0 +1,174 @@
+"""리뷰 장소 좌표 색인
+
+Place의 mapx, mapy를 WGS84 경도, 위도로 보고 geohash(PLACE_GEOHASH_PRECISION 자리, 약 5m 격자)를 함께 저장합니다.
+geohash는 앞자리가 같으면 같은 격자 안에 있으므로, 좌표 주변 검색은 범위를 덮는 격자 몇 개의
+접두사(prefix) 조회로 후보를 읽고 실제 거리로 다시 거릅니다. (테이블 전체를 읽지 않습니다)
+좌표 범위를 벗어난 장소는 geohash 없이 저장하고 좌표가 정확히 같은 장소만 같은 장소로 봅니다.
+"""
+import math
+
+from django.db        import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q
+
+from reviews.models import Place
+
+PLACE_GEOHASH_PRECISION = 9
+PLACE_DEDUPE_METERS     = 30
+PLACE_SAME_POINT_METERS = 1
+NEARBY_RADIUS_METERS    = 1000
+NEARBY_MAX_RADIUS       = 20000
+NEARBY_MAX_CELLS        = 16
+NEARBY_MAX_CANDIDATES   = 500
+EARTH_RADIUS_METERS     = 6371008.8
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+def is_valid_point(mapx, mapy):
+    return mapx is not None and mapy is not None and -180 <= mapx <= 180 and -90 <= mapy <= 90
+
+def encode(mapx, mapy, precision=PLACE_GEOHASH_PRECISION):
+    """경도(mapx), 위도(mapy)의 geohash를 반환합니다. 좌표 범위를 벗어나면 빈 문자열을 반환합니다."""
+    if not is_valid_point(mapx, mapy):
+        return ''
+
+    lon_range, lat_range = [-180.0, 180.0], [-90.0, 90.0]
+    geohash, bits, value = [], 0, 0
+    is_lon               = True
+
+    while len(geohash) < precision:
+        current, coordinate = (lon_range, mapx) if is_lon else (lat_range, mapy)
+        middle              = (current[0]+current[1]) / 2
+
+        if coordinate >= middle:
+            value      = value*2 + 1
+            current[0] = middle
+        else:
+            value      = value*2
+            current[1] = middle
+
+        is_lon = not is_lon
+        bits  += 1
+
+        if bits == 5:
+            geohash.append(BASE32[value])
+            bits, value = 0, 0
+
+    return ''.join(geohash)
+
+def get_cell_size(precision):
+    """geohash precision 자리 격자의 (경도 폭, 위도 높이)를 반환합니다."""
+    lon_bits = (precision*5+1) // 2
+    lat_bits = precision*5 // 2
+
+    return 360 / 2**lon_bits, 180 / 2**lat_bits
+
+def get_distance(mapx, mapy, other_mapx, other_mapy):
+    """두 좌표 사이의 거리(m)를 반환합니다. (haversine)"""
+    lat, other_lat = math.radians(mapy), math.radians(other_mapy)
+    value          = math.sin((other_lat-lat)/2)**2 + math.cos(lat)*math.cos(other_lat)*math.sin(math.radians(other_mapx-mapx)/2)**2
+
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(min(1.0, value)))
+
+def get_bounds(mapx, mapy, radius):
+    """좌표에서 radius(m) 안의 범위를 덮는 (west, east, south, north) 경위도 범위를 반환합니다."""
+    lat_delta = math.degrees(radius / EARTH_RADIUS_METERS)
+    lon_delta = lat_delta / max(math.cos(math.radians(mapy)), 1e-6)
+
+    return max(-180.0, mapx-lon_delta), min(180.0, mapx+lon_delta), max(-90.0, mapy-lat_delta), min(90.0, mapy+lat_delta)
+
+def get_cells(mapx, mapy, radius):
+    """좌표에서 radius(m) 안의 범위를 덮는 geohash 격자 목록을 반환합니다.
+
+    격자가 NEARBY_MAX_CELLS개를 넘지 않는 가장 작은 격자(긴 geohash)를 사용합니다.
+    """
+    west, east, south, north = get_bounds(mapx, mapy, radius)
+
+    for precision in range(PLACE_GEOHASH_PRECISION, 0, -1):
+        width, height = get_cell_size(precision)
+        columns       = range(math.floor((west+180)/width), math.floor((east+180)/width)+1)
+        rows          = range(math.floor((south+90)/height), math.floor((north+90)/height)+1)
+
+        if len(columns)*len(rows) <= NEARBY_MAX_CELLS or precision == 1:
+            break
+
+    # 격자 중심 좌표를 인코딩해 경계의 부동소수점 오차 없이 격자를 구합니다.
+    return sorted({
+        encode(min(180.0, (column+0.5)*width-180), min(90.0, (row+0.5)*height-90), precision)
+        for column in columns for row in rows
+    })
+
+def get_nearby_queryset(queryset, mapx, mapy, radius):
+    """radius(m) 범위를 덮는 격자의 장소만 조회하는 queryset을 반환합니다. (geohash 인덱스 범위 조회)"""
+    condition = Q()
+
+    for cell in get_cells(mapx, mapy, radius):
+        condition |= Q(geohash__startswith=cell)
+
+    return queryset.filter(condition)
+
+def find_same_place(mapx, mapy, name):
+    """이미 저장된 같은 장소를 반환합니다.
+
+    PLACE_DEDUPE_METERS 안에서 이름이 같은(공백, 대소문자 무시) 장소이거나 PLACE_SAME_POINT_METERS 안의 장소 중
+    가장 가까운 장소를 같은 장소로 봅니다. 좌표 범위를 벗어나면 좌표가 정확히 같은 장소만 찾습니다.
+    """
+    if not is_valid_point(mapx, mapy):
+        return Place.objects.filter(mapx=mapx, mapy=mapy).order_by('id').first()
+
+    normalized = ''.join(name.split()).lower()
+    candidates = []
+
+    for place in get_nearby_queryset(Place.objects.all(), mapx, mapy, PLACE_DEDUPE_METERS):
+        distance = get_distance(mapx, mapy, place.mapx, place.mapy)
+
+        if distance <= PLACE_SAME_POINT_METERS or (distance <= PLACE_DEDUPE_METERS and ''.join(place.name.split()).lower() == normalized):
+            candidates.append((distance, place.id, place))
+
+    return min(candidates)[2] if candidates else None
+
+def get_or_create_place(mapx, mapy, name, link):
+    """리뷰 장소를 저장합니다. 같은 장소가 있으면 이름과 링크를 갱신해 재사용합니다.
+
+    Raises:
+        ValueError: 좌표가 숫자가 아닌 경우 발생합니다.
+    """
+    mapx, mapy = float(mapx), float(mapy)
+
+    with transaction.atomic(using='default'):
+        place = find_same_place(mapx, mapy, name)
+
+        if place is None:
+            return Place.objects.create(mapx=mapx, mapy=mapy, name=name, link=link, geohash=encode(mapx, mapy))
+
+        if (place.name, place.link) != (name, link):
+            place.name, place.link = name, link
+            place.save(update_fields=['name', 'link'])
+
+        return place
+
+def get_nearby_places(mapx, mapy, radius, limit, movie_id=None):
+    """좌표에서 radius(m) 안의 장소를 가까운 순서로 limit개 반환합니다.
+
+    격자 접두사 조회에 경위도 범위(mapx, mapy) 조건을 더해 격자 중 범위 밖 부분의 장소를 DB에서 거르고,
+    근사 거리(경도 차이에 cos(위도)를 곱한 평면 거리) 순서로 NEARBY_MAX_CANDIDATES개까지만 읽어 실제 거리를 계산합니다.
+    movie_id가 있으면 그 영화를 본 리뷰의 장소만 조회합니다. 장소마다 review_count(리뷰 수), distance(m)를 포함합니다.
+    """
+    west, east, south, north = get_bounds(mapx, mapy, radius)
+
+    queryset = get_nearby_queryset(Place.objects.all(), mapx, mapy, radius).filter(mapx__range=(west, east), mapy__range=(south, north))
+
+    if movie_id is not None:
+        queryset = queryset.filter(reviewplace__review__movie_id=movie_id)
+
+    scale       = math.cos(math.radians(mapy))**2
+    approximate = ExpressionWrapper((F('mapx')-mapx)*(F('mapx')-mapx)*scale + (F('mapy')-mapy)*(F('mapy')-mapy), output_field=FloatField())
+    candidates  = queryset.annotate(review_count=Count('reviewplace'), approximate=approximate).order_by('approximate', 'id')[:NEARBY_MAX_CANDIDATES]
+    places      = []
+
+    for place in candidates:
+        place.distance = get_distance(mapx, mapy, place.mapx, place.mapy)
+
+        if place.distance <= radius:
+            places.append(place)
+
+    return sorted(places, key=lambda place: (place.distance, place.id))[:limit]
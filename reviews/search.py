@@ -0,0 +1,86 @@
+"""리뷰 제목, 내용 전문 검색
+
+MySQL에서는 reviews(title, content)의 FULLTEXT 인덱스(ngram parser, 조사가 붙어 공백 단위로는 단어를 찾을 수 없는 한국어용)를
+MATCH ... AGAINST로 조회하고 관련도(score) 순서로 정렬합니다.
+다른 DB(개발, 테스트용 SQLite)에서는 제목에 있으면 2, 내용에 있으면 1을 더한 점수로 같은 결과 형식을 만듭니다.
+
+페이지는 (score, id) keyset pagination으로 나누므로 cursor는 마지막 결과의 "score_id" 문자열입니다.
+"""
+from django.db                    import connections
+from django.db.models             import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from reviews.models import Review
+
+SEARCH_PAGE_SIZE     = 20
+SEARCH_MAX_PAGE_SIZE = 50
+SEARCH_MIN_LENGTH    = 2
+SEARCH_MAX_LENGTH    = 100
+
+def clean_query(query):
+    """검색어의 앞뒤 공백을 지웁니다.
+
+    Raises:
+        ValueError: 검색어가 SEARCH_MIN_LENGTH(ngram 토큰 크기)보다 짧거나 SEARCH_MAX_LENGTH보다 긴 경우 발생합니다.
+    """
+    query = ' '.join((query or '').split())
+
+    if not SEARCH_MIN_LENGTH <= len(query) <= SEARCH_MAX_LENGTH:
+        raise ValueError('invalid query')
+
+    return query
+
+def get_page_params(params):
+    """cursor, limit 쿼리 파라미터를 반환합니다.
+
+    Raises:
+        ValueError: cursor가 "score_id" 형식이 아니거나 limit이 정수가 아닌 경우 발생합니다.
+    """
+    cursor = params.get('cursor')
+    limit  = max(1, min(int(params.get('limit', SEARCH_PAGE_SIZE)), SEARCH_MAX_PAGE_SIZE))
+
+    if not cursor:
+        return None, limit
+
+    score, review_id = cursor.rsplit('_', 1)
+
+    return (float(score), int(review_id)), limit
+
+def get_score(queryset, query):
+    """검색어에 대한 리뷰 관련도 식을 반환합니다. (MySQL: FULLTEXT MATCH 점수)"""
+    if connections[queryset.db].vendor == 'mysql':
+        return RawSQL('MATCH (`reviews`.`title`, `reviews`.`content`) AGAINST (%s IN NATURAL LANGUAGE MODE)', [query], output_field=FloatField())
+
+    return (
+        Case(When(title__icontains=query, then=Value(2.0)), default=Value(0.0), output_field=FloatField())
+        + Case(When(content__icontains=query, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+    )
+
+def search_reviews(query, cursor, limit, user=None, movie_id=None):
+    """리뷰를 관련도 순서로 한 페이지 검색합니다.
+
+    Args:
+        user: 사용자가 작성한 리뷰에서만 검색합니다.
+        movie_id: 영화의 리뷰에서만 검색합니다.
+
+    Returns:
+        (reviews, next_cursor), 리뷰마다 score가 포함되고 마지막 페이지면 next_cursor는 None입니다.
+    """
+    queryset = Review.objects.select_related('user')
+
+    if user is not None:
+        queryset = queryset.filter(user=user)
+
+    if movie_id is not None:
+        queryset = queryset.filter(movie_id=movie_id)
+
+    queryset = queryset.annotate(score=get_score(queryset, query)).filter(score__gt=0)
+
+    if cursor is not None:
+        score, review_id = cursor
+        queryset         = queryset.filter(Q(score__lt=score) | Q(score=score, id__lt=review_id))
+
+    reviews = list(queryset.order_by('-score', '-id')[:limit+1])
+    last    = reviews[limit-1] if len(reviews) > limit else None
+
+    return reviews[:limit], (f'{last.score!r}_{last.id}' if last else None)
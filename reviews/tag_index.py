@@ -0,0 +1,281 @@
+"""리뷰 태그 색인
+
+- MovieTag: 영화별 태그 빈도 (영화의 인기 태그)
+- TagCooccurrence: 같은 리뷰에 함께 달린 태그 수 (연관 태그)
+- MovieTagSimilarity: 태그 분포가 비슷한 영화 top-k (태그가 비슷한 영화)
+
+빈도와 동시 출현 수는 리뷰를 작성, 수정, 삭제한 트랜잭션이 커밋된 뒤에 증감하고(실패하면 해당 영화, 태그만 다시 계산),
+build_tag_index 명령이 리뷰 태그 전체로 세 테이블을 희소 행렬 연산으로 다시 계산합니다. (비슷한 영화 목록은 이때만 갱신)
+"""
+import itertools, logging, threading
+
+from array       import array
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from django.core.cache import cache
+from django.db         import connections, transaction
+from django.db.models  import Count, F
+from django.utils      import timezone
+from scipy             import sparse
+
+from core.ratelimit         import background
+from movies.recommendations import block_ranges, iter_rows, iter_top_k, save_payloads, to_payload
+from reviews.models         import MovieTag, MovieTagSimilarity, ReviewTag, TagCooccurrence
+
+SIMILAR_MOVIE_COUNT     = 20
+REVIEW_TAG_CHUNK_SIZE   = 10000
+WRITE_BATCH_SIZE        = 1000
+TAG_INDEX_REBUILD_DELAY = 10
+TAG_INDEX_REBUILD_LOCK  = 60*10
+
+logger = logging.getLogger(__name__)
+
+def get_tag_pairs(tag_ids):
+    """같은 리뷰에 달린 태그의 (tag, other_tag) 쌍을 양방향으로 반환합니다."""
+    return list(itertools.permutations(sorted(set(tag_ids)), 2))
+
+def add_review_tags(movie_id, tag_ids):
+    """리뷰 하나의 태그를 영화별 태그 빈도와 태그 동시 출현 수에 1씩 더합니다."""
+    tag_ids = set(tag_ids)
+
+    if not tag_ids or not str(movie_id).isdigit():
+        return
+
+    with transaction.atomic(using='default'):
+        existing = set(
+            MovieTag.objects.select_for_update()
+            .filter(movie_id=movie_id, tag_id__in=tag_ids)
+            .values_list('tag_id', flat=True)
+        )
+
+        MovieTag.objects.filter(movie_id=movie_id, tag_id__in=existing).update(review_count=F('review_count')+1)
+        MovieTag.objects.bulk_create([
+            MovieTag(movie_id=movie_id, tag_id=tag_id, review_count=1) for tag_id in tag_ids if tag_id not in existing
+        ])
+
+        # 리뷰 하나의 태그 쌍은 tag_ids×tag_ids에서 같은 태그끼리의 쌍을 뺀 것이므로 in 조건 두 개로 모두 조회합니다.
+        pairs    = TagCooccurrence.objects.filter(tag_id__in=tag_ids, other_tag_id__in=tag_ids)
+        existing = set(pairs.select_for_update().values_list('tag_id', 'other_tag_id'))
+
+        pairs.update(review_count=F('review_count')+1)
+        TagCooccurrence.objects.bulk_create([
+            TagCooccurrence(tag_id=tag_id, other_tag_id=other_tag_id, review_count=1)
+            for tag_id, other_tag_id in get_tag_pairs(tag_ids) if (tag_id, other_tag_id) not in existing
+        ])
+
+def remove_review_tags(movie_id, tag_ids):
+    """리뷰 하나의 태그를 영화별 태그 빈도와 태그 동시 출현 수에서 1씩 빼고, 0이 된 행은 삭제합니다."""
+    tag_ids = set(tag_ids)
+
+    if not tag_ids or not str(movie_id).isdigit():
+        return
+
+    with transaction.atomic(using='default'):
+        movie_tags = MovieTag.objects.filter(movie_id=movie_id, tag_id__in=tag_ids)
+        pairs      = TagCooccurrence.objects.filter(tag_id__in=tag_ids, other_tag_id__in=tag_ids)
+
+        movie_tags.filter(review_count__lte=1).delete()
+        movie_tags.update(review_count=F('review_count')-1)
+        pairs.filter(review_count__lte=1).delete()
+        pairs.update(review_count=F('review_count')-1)
+
+def replace_review_tags(movie_id, old_tag_ids, new_tag_ids):
+    """수정한 리뷰의 이전 태그를 빼고 새 태그를 더합니다."""
+    with transaction.atomic(using='default'):
+        remove_review_tags(movie_id, old_tag_ids)
+        add_review_tags(movie_id, new_tag_ids)
+
+def on_commit(update, movie_id, *tag_ids):
+    """리뷰를 저장, 수정, 삭제한 트랜잭션이 커밋된 뒤에 태그 색인을 갱신합니다. (add_review_tags, remove_review_tags, replace_review_tags)
+
+    리뷰는 이미 커밋되었으므로 갱신이 실패해도 예외를 응답으로 전달하지 않고,
+    기록한 뒤 schedule_rebuild로 영화의 태그 빈도와 태그들의 동시 출현 수를 다시 계산합니다.
+    """
+    def run():
+        try:
+            update(movie_id, *tag_ids)
+        except Exception:
+            logger.exception('tag index update failed for movie %s, scheduling a rebuild', movie_id)
+            schedule_rebuild(movie_id, set().union(*tag_ids))
+
+    transaction.on_commit(run, using='default')
+
+def rebuild_review_tags(movie_id, tag_ids):
+    """리뷰 태그로 영화의 태그 빈도 전체와 tag_ids 사이의 태그 동시 출현 수를 다시 계산합니다. (증감 실패 보정용)"""
+    tag_ids = set(tag_ids)
+
+    if not str(movie_id).isdigit():
+        return
+
+    movie_tags  = ReviewTag.objects.filter(review__movie_id=str(movie_id)).values('tag_id').annotate(review_count=Count('review_id', distinct=True))
+    review_tags = defaultdict(set)
+
+    for review_id, review_movie_id, tag_id in ReviewTag.objects.filter(tag_id__in=tag_ids).values_list('review_id', 'review__movie_id', 'tag_id'):
+        if review_movie_id.isdigit():
+            review_tags[review_id].add(tag_id)
+
+    pairs = Counter(pair for tags in review_tags.values() for pair in get_tag_pairs(tags))
+
+    with transaction.atomic(using='default'):
+        MovieTag.objects.filter(movie_id=movie_id).delete()
+        MovieTag.objects.bulk_create([
+            MovieTag(movie_id=movie_id, tag_id=row['tag_id'], review_count=row['review_count']) for row in movie_tags
+        ])
+
+        TagCooccurrence.objects.filter(tag_id__in=tag_ids, other_tag_id__in=tag_ids).delete()
+        TagCooccurrence.objects.bulk_create([
+            TagCooccurrence(tag_id=tag_id, other_tag_id=other_tag_id, review_count=count) for (tag_id, other_tag_id), count in pairs.items()
+        ])
+
+@background
+def _rebuild_in_background(movie_id, tag_ids):
+    try:
+        rebuild_review_tags(movie_id, tag_ids)
+    except Exception:
+        logger.exception('tag index rebuild failed for movie %s', movie_id)
+    finally:
+        cache.delete(f'tag_index_rebuild:{movie_id}')
+        connections.close_all()
+
+def schedule_rebuild(movie_id, tag_ids, delay=TAG_INDEX_REBUILD_DELAY):
+    """delay초 뒤에 백그라운드 스레드에서 rebuild_review_tags를 실행합니다. (갱신 실패 보정용)
+
+    캐시 락으로 같은 영화의 재계산이 여러 번 예약되지 않도록 합니다.
+    예약되지 않은 태그나 재계산도 실패한 경우는 build_tag_index 명령(매일 밤)으로 보정합니다.
+    """
+    if not cache.add(f'tag_index_rebuild:{movie_id}', True, TAG_INDEX_REBUILD_LOCK):
+        return False
+
+    timer        = threading.Timer(delay, _rebuild_in_background, args=(movie_id, set(tag_ids)))
+    timer.daemon = True
+    timer.start()
+
+    return True
+
+def load_review_tags():
+    """리뷰 태그 전체를 리뷰×태그 이진 행렬과 리뷰별 영화 열 번호로 읽습니다.
+
+    Returns:
+        (review_tags, review_movies, movie_ids, tag_ids), review_movies[i]는 i행 리뷰의 영화 열 번호입니다.
+    """
+    reviews, movies, tags = array('q'), array('q'), array('q')
+
+    for review_id, movie_id, tag_id in ReviewTag.objects.order_by().values_list('review_id', 'review__movie_id', 'tag_id').iterator(chunk_size=REVIEW_TAG_CHUNK_SIZE):
+        if movie_id.isdigit():
+            reviews.append(review_id)
+            movies.append(int(movie_id))
+            tags.append(tag_id)
+
+    review_ids, review_rows = np.unique(np.array(reviews, dtype=np.int64), return_inverse=True)
+    movie_ids, movie_cols   = np.unique(np.array(movies, dtype=np.int64), return_inverse=True)
+    tag_ids, tag_cols       = np.unique(np.array(tags, dtype=np.int64), return_inverse=True)
+
+    review_tags = sparse.csr_matrix((np.ones(len(tags), dtype=np.float32), (review_rows, tag_cols)), shape=(len(review_ids), len(tag_ids)))
+    # 같은 리뷰에 같은 태그가 여러 번 달려도 한 번으로 셉니다.
+    review_tags.data[:] = 1
+
+    review_movies = np.zeros(len(review_ids), dtype=np.int64)
+    review_movies[review_rows] = movie_cols
+
+    return review_tags, review_movies, movie_ids, tag_ids
+
+def build_counts(review_tags, review_movies, movie_count):
+    """영화×태그 빈도 행렬과 태그×태그 동시 출현 행렬(대각선 제외)을 계산합니다."""
+    reviews      = review_tags.shape[0]
+    movie_review = sparse.csr_matrix((np.ones(reviews, dtype=np.float32), (review_movies, np.arange(reviews))), shape=(movie_count, reviews))
+    movie_tags   = (movie_review @ review_tags).tocsr()
+    cooccurrence = (review_tags.T @ review_tags).tolil()
+
+    cooccurrence.setdiag(0)
+
+    cooccurrence = cooccurrence.tocsr()
+    cooccurrence.eliminate_zeros()
+
+    return movie_tags, cooccurrence
+
+def build_similar_movies(movie_tags, count=SIMILAR_MOVIE_COUNT):
+    """영화별로 태그 분포(TF-IDF)의 코사인 유사도가 높은 영화 count개를 계산합니다."""
+    total = movie_tags.shape[0]
+
+    if total < 2:
+        return sparse.csr_matrix((total, total), dtype=np.float32)
+
+    frequency = np.diff(movie_tags.tocsc().indptr)
+    idf       = np.log(total / np.maximum(frequency, 1)).astype(np.float32)
+    weighted  = movie_tags.copy()
+
+    weighted.data = np.log1p(weighted.data)
+    weighted      = (weighted @ sparse.diags(idf)).tocsr()
+    norms         = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    normalized    = (sparse.diags(np.where(norms > 0, 1 / np.where(norms > 0, norms, 1), 0).astype(np.float32)) @ weighted).tocsr()
+    transposed    = normalized.T.tocsc()
+    rows, cols, values = [], [], []
+
+    for start, stop in block_ranges(total, total):
+        similarities = (normalized[start:stop] @ transposed).tocsr()
+        diagonal     = similarities.indices == np.repeat(np.arange(start, stop), np.diff(similarities.indptr))
+
+        similarities.data[diagonal | (similarities.data <= 0)] = -np.inf
+
+        for row, movies, scores in iter_top_k(similarities, count):
+            rows.append(np.full(len(movies), start+row))
+            cols.append(movies)
+            values.append(scores)
+
+    if not values:
+        return sparse.csr_matrix((total, total), dtype=np.float32)
+
+    return sparse.csr_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=(total, total), dtype=np.float32)
+
+def iter_entries(matrix):
+    """CSR 행렬의 0이 아닌 값을 (행, 열, 값)으로 반환합니다."""
+    coo = matrix.tocoo()
+
+    return zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist())
+
+def build_all(similar_count=SIMILAR_MOVIE_COUNT):
+    """리뷰 태그 전체로 영화별 태그 빈도, 태그 동시 출현 수, 태그가 비슷한 영화를 다시 계산해 저장합니다.
+
+    빈도와 동시 출현 수는 트랜잭션 하나로 교체하므로, 계산하는 동안 커밋된 리뷰의 증감은 다음 계산에 반영됩니다.
+
+    Returns:
+        {'review_tags', 'movies', 'tags'} 처리한 리뷰 태그, 영화, 태그 수를 반환합니다.
+    """
+    started_at                                     = timezone.now()
+    review_tags, review_movies, movie_ids, tag_ids = load_review_tags()
+    movie_tags, cooccurrence                       = build_counts(review_tags, review_movies, len(movie_ids))
+    similar_movies                                 = build_similar_movies(movie_tags, similar_count)
+
+    with transaction.atomic(using='default'):
+        MovieTag.objects.all().delete()
+        MovieTag.objects.bulk_create((
+            MovieTag(movie_id=int(movie_ids[row]), tag_id=int(tag_ids[col]), review_count=int(count))
+            for row, col, count in iter_entries(movie_tags)
+        ), batch_size=WRITE_BATCH_SIZE)
+
+        TagCooccurrence.objects.all().delete()
+        TagCooccurrence.objects.bulk_create((
+            TagCooccurrence(tag_id=int(tag_ids[row]), other_tag_id=int(tag_ids[col]), review_count=int(count))
+            for row, col, count in iter_entries(cooccurrence)
+        ), batch_size=WRITE_BATCH_SIZE)
+
+    save_payloads(MovieTagSimilarity, 'movie_id', (
+        (int(movie_ids[row]), to_payload(movie_ids[movies], scores, 4)) for row, movies, scores in iter_rows(similar_movies)
+    ), started_at)
+
+    return {'review_tags': review_tags.nnz, 'movies': len(movie_ids), 'tags': len(tag_ids)}
+
+def get_movie_tags(movie_id, limit):
+    """영화에서 많이 사용된 태그 limit개를 반환합니다. ((movie_id, -review_count, tag) 인덱스 범위 조회)"""
+    return list(MovieTag.objects.filter(movie_id=movie_id).select_related('tag__color_code').order_by('-review_count', 'tag_id')[:limit])
+
+def get_related_tags(tag_id, limit):
+    """같은 리뷰에 함께 많이 달린 태그 limit개를 반환합니다. ((tag, -review_count, other_tag) 인덱스 범위 조회)"""
+    return list(TagCooccurrence.objects.filter(tag_id=tag_id).select_related('other_tag__color_code').order_by('-review_count', 'other_tag_id')[:limit])
+
+def get_similar_movies(movie_id, limit):
+    payload = MovieTagSimilarity.objects.filter(movie_id=movie_id).values_list('payload', flat=True).first()
+
+    return (payload or [])[:limit]
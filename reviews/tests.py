@@ -1,11 +1,27 @@
-import jwt
+import io, json, jwt, math, requests, tempfile
 
-from rest_framework.test import APITestCase, APIClient
-from unittest.mock       import MagicMock, patch
+from asgiref.sync import async_to_sync
+from decimal      import Decimal
 
-from reviews.models import ColorCode, Review, Tag, ReviewTag, ReviewImage
-from users.models   import SocialPlatform, User, Group  
-from my_settings    import SECRET_KEY, ALGORITHM
+from django.core.cache              import cache
+from django.core.handlers.asgi      import ASGIHandler
+from django.core.signals            import request_finished, request_started
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management         import call_command
+from django.db                      import close_old_connections, connections
+from django.test                    import TestCase, TransactionTestCase
+from rest_framework.test            import APITestCase, APIClient
+from unittest.mock                  import MagicMock, patch
+
+from movies.models       import Genre
+from reviews             import history, places, search, tag_index
+from reviews.models      import ColorCode, MovieTag, MovieTagSimilarity, Place, Review, ReviewPlace, Tag, TagCooccurrence, ReviewTag, ReviewImage
+from users.models        import SocialPlatform, User, Group  
+from core.circuitbreaker import CircuitBreakers
+from core.testing        import PerformanceBudgetMixin, outside_transaction
+from core.tmdb           import tmdb_helper
+from movies.tests        import mock_tmdb_get_or_not_found
+from my_settings         import SECRET_KEY, ALGORITHM
 
 class MockMovieResponse:
     def json():
@@ -99,7 +115,7 @@ class MockMovieResponse:
 class MockS3UploadImageUrl:
     text = 'https://mblogthumb-phinf.pstatic.net/MjAxOTEwMTFfNjEg/MDAxNTcwNzg1ODM3Nzc0.zxDXm20VlPdQv8GQi9LWOdPwkqoBdiEmf8aBTWTsPF8g.FqMQTiF6ufydkQxrLBgET3kNYAyyKGJTWTyi1qd1-_Ag.PNG.kkson50/sample_images_01.png?type=w800'
 
-class ReviewTest(APITestCase):
+class ReviewTest(PerformanceBudgetMixin, APITestCase):
     maxDiff = None
         
     @classmethod
@@ -176,7 +192,7 @@ class ReviewTest(APITestCase):
 
     client = APIClient()
       
-    @patch('reviews.views.requests.get', return_value=MockMovieResponse)
+    @patch('core.tmdb.requests.get', return_value=MockMovieResponse)
     def test_review_get_success(self, mocked_requests):
         mocked_requests.get = MagicMock()
         
@@ -209,6 +225,7 @@ class ReviewTest(APITestCase):
                         }
                     }
         )
+        self.assertWithinBudget(response)
         
 
     @patch('core.storages.MyS3Client.upload', return_value=MockS3UploadImageUrl)
@@ -230,6 +247,7 @@ class ReviewTest(APITestCase):
         
         self.assertEqual(response.status_code, 201)
         self.assertEqual(response.json(), {'message': 'SUCCESS'})
+        self.assertWithinBudget(response)
     
     @patch('core.storages.MyS3Client.upload', return_value=MockS3UploadImageUrl)
     def test_review_put_success(self, mocked_response):
@@ -244,8 +262,570 @@ class ReviewTest(APITestCase):
         self.assertEqual(response.status_code, 201)
         self.assertEqual(response.json(), {'message': 'SUCCESS'})
     
+    @patch('core.tmdb.requests.get', return_value=MockMovieResponse)
+    def test_review_list_success(self, mocked_requests):
+        Genre.objects.create(id=18, name='드라마', color_code='#af4448')
+        
+        response = self.client.get('/review/list', **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'][0]['movie']['title'], 'Fight Club')
+        self.assertEqual(mocked_requests.call_count, 1)
+        self.assertWithinBudget(response)
+    
+    @patch('core.tmdb.requests.get', MagicMock(return_value=MagicMock(json=MagicMock(return_value={'success': False, 'status_code': 34, 'status_message': 'The resource you requested could not be found.'}))))
+    def test_review_list_tmdb_error_payload(self):
+        
+        response = self.client.get('/review/list', **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'][0]['movie']['country'], '')
+        self.assertEqual(response.json()['result'][0]['movie']['genre'], [])
+    
+    @patch.object(tmdb_helper, 'breakers', CircuitBreakers())
+    @patch('core.tmdb.requests.get', side_effect=requests.ConnectionError('connection refused'))
+    def test_review_list_tmdb_unavailable(self, mocked_requests):
+        cache.clear()
+        
+        response = self.client.get('/review/list', **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'][0]['movie']['title'], '')
+    
     def test_review_delete_success(self):
         
         response = self.client.delete('/review/1', **self.header)
         
-        self.assertEqual(response.status_code, 204)
\ No newline at end of file
+        self.assertEqual(response.status_code, 204)
+
+class TransactionScopeTest(TransactionTestCase):
+    """ATOMIC_REQUESTS를 켜더라도 외부 HTTP 호출 중에는 트랜잭션이 열려 있지 않은지 확인합니다."""
+    
+    def setUp(self):
+        cache.clear()
+        
+        self.user = User.objects.create(
+            social_id       = '소셜아이디',
+            nickname        = '테스트유저',
+            group           = Group.objects.create(name='user'),
+            social_platform = SocialPlatform.objects.create(name='naver'),
+        )
+        self.header = {'HTTP_Authorization': jwt.encode({'id': self.user.id}, SECRET_KEY, algorithm=ALGORITHM)}
+        
+        ColorCode.objects.create(id=1, color_code='#af4448')
+        ColorCode.objects.create(id=2, color_code='#ba2d65')
+        Genre.objects.create(id=18, name='드라마', color_code='#af4448')
+        Review.objects.create(id=1, title='testReview', content='content', rating=5.0, user=self.user, movie_id=550)
+        
+        atomic_requests = patch.dict(connections['default'].settings_dict, {'ATOMIC_REQUESTS': True})
+        atomic_requests.start()
+        self.addCleanup(atomic_requests.stop)
+    
+    @patch('core.tmdb.requests.get')
+    def test_tmdb_calls_outside_transaction(self, mocked_requests):
+        mocked_requests.side_effect = outside_transaction(self, return_value=MockMovieResponse)
+        
+        for path in ['/review/list', '/review/top3', '/review/movie/550']:
+            response = self.client.get(path, **self.header)
+            
+            self.assertEqual(response.status_code, 200)
+        
+        self.assertTrue(mocked_requests.called)
+    
+    @patch('core.tmdb.requests.get', MagicMock(side_effect=mock_tmdb_get_or_not_found))
+    @patch('core.storages.MyS3Client.delete')
+    @patch('core.storages.MyS3Client.upload')
+    def test_s3_calls_outside_transaction(self, mocked_upload, mocked_delete):
+        mocked_upload.side_effect = outside_transaction(self, return_value='image/review/uploaded')
+        mocked_delete.side_effect = outside_transaction(self)
+        
+        data = {
+            'movie_id'      : 551,
+            'title'         : 'title',
+            'content'       : 'content',
+            'rating'        : 4.3,
+            'watched_date'  : '2022-10-26 19:43:14',
+            'with_user'     : 'with_user',
+            'review_images' : ['file1'],
+            'tags'          : ['tag'],
+        }
+        
+        response = APIClient().post('/review', data=data, **self.header)
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ReviewImage.objects.filter(review__movie_id=551).count(), 1)
+        
+        review   = Review.objects.get(movie_id=551)
+        response = self.client.delete(f'/review/{review.id}', **self.header)
+        
+        self.assertEqual(response.status_code, 204)
+        mocked_delete.assert_called_once_with('image/review/uploaded')
+
+class TagIndexTest(PerformanceBudgetMixin, TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            social_id       = '소셜아이디',
+            nickname        = '테스트유저',
+            group           = Group.objects.create(name='user'),
+            social_platform = SocialPlatform.objects.create(name='naver'),
+        )
+        cls.header = {'HTTP_Authorization': jwt.encode({'id': cls.user.id}, SECRET_KEY, algorithm=ALGORITHM)}
+        
+        ColorCode.objects.bulk_create([ColorCode(id=1, color_code='#af4448'), ColorCode(id=2, color_code='#ba2d65')])
+        Tag.objects.bulk_create([Tag(id=tag_id, name=f'tag{tag_id}', color_code_id=1) for tag_id in [1, 2, 3]])
+        
+        for movie_id, tag_ids in [('550', [1, 2]), ('550', [1]), ('13', [1, 2]), ('680', [3])]:
+            review = Review.objects.create(user=cls.user, movie_id=movie_id, title='title', content='content', rating=4.0)
+            
+            ReviewTag.objects.bulk_create([ReviewTag(review=review, tag_id=tag_id) for tag_id in tag_ids])
+    
+    def get_index(self):
+        return (
+            sorted(MovieTag.objects.values_list('movie_id', 'tag_id', 'review_count')),
+            sorted(TagCooccurrence.objects.values_list('tag_id', 'other_tag_id', 'review_count')),
+        )
+    
+    def test_build(self):
+        MovieTagSimilarity.objects.create(movie_id=999, payload=[{'id': 550, 'score': 0.5}])
+        
+        call_command('build_tag_index', stdout=MagicMock())
+        
+        self.assertEqual(self.get_index(), (
+            [(13, 1, 1), (13, 2, 1), (550, 1, 2), (550, 2, 1), (680, 3, 1)],
+            [(1, 2, 2), (2, 1, 2)],
+        ))
+        self.assertEqual(
+            {similarity.movie_id: [movie['id'] for movie in similarity.payload] for similarity in MovieTagSimilarity.objects.all()},
+            {550: [13], 13: [550]}
+        )
+    
+    @patch('core.tmdb.requests.get', MagicMock(side_effect=mock_tmdb_get_or_not_found))
+    @patch('reviews.views.randrange', MagicMock(return_value=1))
+    def test_incremental_update_matches_build(self):
+        call_command('build_tag_index', stdout=MagicMock())
+        
+        data = {
+            'movie_id'     : 120,
+            'title'        : 'title',
+            'content'      : 'content',
+            'rating'       : 4.5,
+            'watched_date' : '2022-10-26 19:43:14',
+            'with_user'    : '',
+            'tags'         : ['tag1', 'tag3', 'tag4'],
+        }
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post('/review', data=data, **self.header)
+        
+        self.assertEqual(response.status_code, 201)
+        
+        review = Review.objects.get(movie_id='120')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().put('/review', data={'review_id': review.id, 'tags': ['tag2', 'tag3']}, **self.header)
+        
+        self.assertEqual(response.status_code, 201)
+        
+        incremental = self.get_index()
+        
+        call_command('build_tag_index', stdout=MagicMock())
+        
+        self.assertEqual(incremental, self.get_index())
+        self.assertIn((2, 3, 1), incremental[1])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/review/{review.id}', **self.header)
+        
+        self.assertEqual(response.status_code, 204)
+        
+        incremental = self.get_index()
+        
+        call_command('build_tag_index', stdout=MagicMock())
+        
+        self.assertEqual(incremental, self.get_index())
+    
+    @patch('reviews.tag_index.schedule_rebuild')
+    def test_failed_update_rebuilt(self, mocked_schedule):
+        call_command('build_tag_index', stdout=MagicMock())
+        
+        review = Review.objects.create(user=self.user, movie_id='550', title='title', content='content', rating=4.0)
+        
+        ReviewTag.objects.bulk_create([ReviewTag(review=review, tag_id=tag_id) for tag_id in [2, 3]])
+        
+        with patch('reviews.tag_index.add_review_tags', side_effect=RuntimeError('deadlock')), self.assertLogs('reviews.tag_index', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                tag_index.on_commit(tag_index.add_review_tags, review.movie_id, [2, 3])
+        
+        mocked_schedule.assert_called_once_with('550', {2, 3})
+        
+        tag_index.rebuild_review_tags('550', {2, 3})
+        
+        rebuilt = self.get_index()
+        
+        call_command('build_tag_index', stdout=MagicMock())
+        
+        self.assertEqual(rebuilt, self.get_index())
+        self.assertIn((550, 3, 1), rebuilt[0])
+    
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get_or_not_found)
+    def test_tag_endpoints(self, mocked_requests):
+        call_command('build_tag_index', stdout=MagicMock())
+        
+        response = self.client.get('/review/tags/movie/550')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'], [
+            {'id': 1, 'tag': 'tag1', 'color': '#af4448', 'review_count': 2},
+            {'id': 2, 'tag': 'tag2', 'color': '#af4448', 'review_count': 1},
+        ])
+        self.assertWithinBudget(response)
+        
+        response = self.client.get('/review/tags/1/related')
+        
+        self.assertEqual(response.json()['result'], [{'id': 2, 'tag': 'tag2', 'color': '#af4448', 'review_count': 2}])
+        self.assertWithinBudget(response)
+        
+        response = self.client.get('/review/tags/movie/13/similar')
+        
+        self.assertEqual([(movie['id'], movie.get('title')) for movie in response.json()['result']], [(550, '파이트 클럽')])
+        self.assertWithinBudget(response)
+        
+        response = self.client.get('/review/tags/movie/550', {'limit': -1})
+        
+        self.assertEqual([tag['id'] for tag in response.json()['result']], [1])
+        
+        for url in ['/review/tags/movie/550', '/review/tags/1/related', '/review/tags/movie/13/similar']:
+            response = self.client.get(url, {'limit': 'abc'})
+            
+            self.assertEqual((response.status_code, response.json()), (400, {'message': 'INVALID_LIMIT'}))
+
+class PlaceIndexTest(PerformanceBudgetMixin, TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(
+            social_id       = '소셜아이디',
+            nickname        = '테스트유저',
+            group           = Group.objects.create(name='user'),
+            social_platform = SocialPlatform.objects.create(name='naver'),
+        )
+    
+    def test_encode(self):
+        self.assertEqual(places.encode(-5.6, 42.6, 5), 'ezs42')
+        self.assertEqual(places.encode(10.40744, 57.64911), 'u4pruydqq')
+        self.assertEqual(places.encode(314000.0, 544000.0), '')
+    
+    def test_cells_cover_radius(self):
+        mapx, mapy = 127.0276, 37.4979
+        
+        for radius in [30, 1000, 20000]:
+            cells = places.get_cells(mapx, mapy, radius)
+            
+            self.assertLessEqual(len(cells), places.NEARBY_MAX_CELLS)
+            
+            for bearing in range(0, 360, 15):
+                point = (
+                    mapx + math.degrees(radius*0.99*math.sin(math.radians(bearing)) / places.EARTH_RADIUS_METERS) / math.cos(math.radians(mapy)),
+                    mapy + math.degrees(radius*0.99*math.cos(math.radians(bearing)) / places.EARTH_RADIUS_METERS),
+                )
+                
+                self.assertTrue(any(places.encode(*point).startswith(cell) for cell in cells), (radius, bearing))
+    
+    def test_dedupe_within_tolerance(self):
+        place = places.get_or_create_place('127.0276', '37.4979', 'CGV 강남', 'http://cgv.co.kr')
+        
+        self.assertEqual(place.geohash, places.encode(127.0276, 37.4979))
+        self.assertEqual(places.get_or_create_place('127.0277', '37.4980', 'cgv강남', 'http://cgv.co.kr').id, place.id)
+        self.assertNotEqual(places.get_or_create_place('127.0277', '37.4980', '메가박스 강남', '').id, place.id)
+        self.assertEqual(places.get_or_create_place('127.027601', '37.4979', 'CGV 강남점', 'http://cgv.co.kr/gangnam').id, place.id)
+        self.assertEqual(Place.objects.get(id=place.id).name, 'CGV 강남점')
+        self.assertEqual(places.get_or_create_place(314000, 544000, '카텍 좌표', '').id, places.get_or_create_place(314000, 544000, '카텍 좌표', '').id)
+        self.assertEqual(Place.objects.count(), 3)
+    
+    def test_nearby_places(self):
+        gangnam     = places.get_or_create_place(127.0276, 37.4979, 'CGV 강남', '')
+        sinnonhyeon = places.get_or_create_place(127.0250, 37.5045, 'CGV 신논현', '')
+        busan       = places.get_or_create_place(129.0756, 35.1796, 'CGV 서면', '')
+        
+        for movie_id, place in [('550', gangnam), ('550', gangnam), ('13', sinnonhyeon), ('550', busan)]:
+            review = Review.objects.create(user=self.user, movie_id=movie_id, title='title', content='content', rating=4.0)
+            
+            ReviewPlace.objects.create(review=review, place=place)
+        
+        response = self.client.get('/review/places/nearby', {'mapx': 127.0270, 'mapy': 37.4985, 'radius': 2000})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(place['name'], place['review_count']) for place in response.json()['result']], [('CGV 강남', 2), ('CGV 신논현', 1)])
+        self.assertWithinBudget(response)
+        
+        response = self.client.get('/review/places/nearby', {'mapx': 127.0270, 'mapy': 37.4985, 'radius': 2000, 'movie_id': 13})
+        
+        self.assertEqual([place['name'] for place in response.json()['result']], ['CGV 신논현'])
+        
+        response = self.client.get('/review/places/nearby', {'mapx': 127.0270, 'mapy': 137.4985})
+        
+        self.assertEqual(response.status_code, 400)
+    
+    def test_nearby_candidates_capped(self):
+        far  = places.get_or_create_place(127.0300, 37.4985, 'CGV 역삼', '')
+        near = places.get_or_create_place(127.0271, 37.4985, 'CGV 강남', '')
+        
+        with patch.object(places, 'NEARBY_MAX_CANDIDATES', 1):
+            self.assertEqual([place.id for place in places.get_nearby_places(127.0270, 37.4985, 2000, 20)], [near.id])
+        
+        self.assertEqual([place.id for place in places.get_nearby_places(127.0270, 37.4985, 2000, 20)], [near.id, far.id])
+        self.assertEqual([place.id for place in places.get_nearby_places(127.0270, 37.4985, 200, 20)], [near.id])
+
+class ReviewSearchTest(PerformanceBudgetMixin, TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        group           = Group.objects.create(name='user')
+        social_platform = SocialPlatform.objects.create(name='naver')
+        
+        cls.user   = User.objects.create(social_id='소셜아이디', nickname='테스트유저', group=group, social_platform=social_platform)
+        cls.other  = User.objects.create(social_id='다른아이디', nickname='다른유저', group=group, social_platform=social_platform)
+        cls.header = {'HTTP_Authorization': jwt.encode({'id': cls.user.id}, SECRET_KEY, algorithm=ALGORITHM)}
+        
+        for user, movie_id, title, content in [
+            (cls.user, '550', '인생 영화', '반전이 대단한 영화'),
+            (cls.user, '13', '감동', '올해 본 인생 영화'),
+            (cls.user, '680', '별로', '지루했다'),
+            (cls.other, '550', '다시 본 인생 영화', '두 번째도 좋았다'),
+        ]:
+            Review.objects.create(user=user, movie_id=movie_id, title=title, content=content, rating=4.0)
+    
+    def setUp(self):
+        cache.clear()
+    
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get_or_not_found)
+    def test_search_own_reviews_by_relevance(self, mocked_requests):
+        response = self.client.get('/review/search', {'q': ' 인생  영화 ', 'limit': 1}, **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(review['title'], review['score'], review['movie'].get('title')) for review in response.json()['result']], [('인생 영화', 2.0, '파이트 클럽')])
+        self.assertIsNotNone(response.json()['next_cursor'])
+        self.assertWithinBudget(response)
+        
+        response = self.client.get('/review/search', {'q': '인생 영화', 'limit': 1, 'cursor': response.json()['next_cursor']}, **self.header)
+        
+        self.assertEqual([(review['title'], review['score']) for review in response.json()['result']], [('감동', 1.0)])
+        self.assertIsNone(response.json()['next_cursor'])
+    
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_get_or_not_found)
+    def test_search_movie_reviews(self, mocked_requests):
+        response = self.client.get('/review/search', {'q': '인생', 'movie_id': 550}, **self.header)
+        
+        self.assertEqual(
+            [(review['user']['nickname'], review['title']) for review in response.json()['result']],
+            [('다른유저', '다시 본 인생 영화'), ('테스트유저', '인생 영화')]
+        )
+        self.assertEqual(mocked_requests.call_count, 1)
+    
+    def test_invalid_query(self):
+        for params in [{'q': '인'}, {'q': '인생', 'cursor': 'invalid'}]:
+            response = self.client.get('/review/search', params, **self.header)
+            
+            self.assertEqual(response.status_code, 400)
+    
+    def test_mysql_fulltext_match(self):
+        with patch.object(connections['default'], 'vendor', 'mysql'):
+            queryset = Review.objects.all()
+            sql      = str(queryset.annotate(score=search.get_score(queryset, '인생')).filter(score__gt=0).query)
+        
+        self.assertIn('MATCH (`reviews`.`title`, `reviews`.`content`) AGAINST (인생 IN NATURAL LANGUAGE MODE)', sql)
+
+class ReviewHistoryTest(TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        group           = Group.objects.create(name='user')
+        social_platform = SocialPlatform.objects.create(name='naver')
+        
+        cls.user   = User.objects.create(social_id='소셜아이디', nickname='테스트유저', group=group, social_platform=social_platform)
+        cls.other  = User.objects.create(social_id='다른아이디', nickname='다른유저', group=group, social_platform=social_platform)
+        cls.header = {'HTTP_Authorization': jwt.encode({'id': cls.user.id}, SECRET_KEY, algorithm=ALGORITHM)}
+        
+        ColorCode.objects.bulk_create([ColorCode(id=1, color_code='#af4448'), ColorCode(id=2, color_code='#ba2d65')])
+        Tag.objects.create(name='tag1', color_code_id=1)
+        Review.objects.create(user=cls.user, movie_id='680', title='title', content='content', rating=3.0)
+    
+    def export(self, user, format):
+        response = self.client.get('/review/history', {'format': format}, HTTP_Authorization=jwt.encode({'id': user.id}, SECRET_KEY, algorithm=ALGORITHM))
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        
+        return b''.join(response.streaming_content)
+    
+    def export_asgi(self, user, format):
+        """ASGIHandler로 내보내기를 요청해 (status, body)를 반환합니다. (테스트 트랜잭션을 유지하도록 연결 정리 signal은 끊습니다)"""
+        messages = []
+        scope    = {
+            'type'         : 'http',
+            'method'       : 'GET',
+            'path'         : '/review/history',
+            'query_string' : f'format={format}'.encode(),
+            'headers'      : [(b'authorization', jwt.encode({'id': user.id}, SECRET_KEY, algorithm=ALGORITHM).encode())],
+        }
+        
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        
+        async def send(message):
+            messages.append(message)
+        
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        
+        try:
+            async_to_sync(ASGIHandler())(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        
+        return messages[0]['status'], b''.join(message.get('body', b'') for message in messages[1:])
+    
+    @patch('reviews.history.schedule_rebuild')
+    def test_import_csv(self, mocked_schedule):
+        content = '\n'.join([
+            'movie_id,title,content,rating,watched_date,with_user,tags,place_name,place_mapx,place_mapy,place_link',
+            '550,인생 영화,"반전, 또 반전",4.5,2022-10-26 19:43:14,친구,tag1|새태그,CGV 강남,127.0276,37.4979,http://cgv.co.kr',
+            '13,감동,,4,2022-11-01,,,,,,',
+            '550,중복,,3,,,,,,,',
+            '680,이미 작성,,3,,,,,,,',
+            '155,평점 오류,,7,,,,,,,',
+            'abc,영화 오류,,3,,,,,,,',
+            '120,소수점 오류,,4.25,,,,,,,',
+            '121,장소 오류,,4,,,,무한,inf,37.4979,',
+            '122,장소 오류,,4,,,,범위,127.0276,91,',
+        ]).encode('utf-8-sig')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/review/history', {'file': SimpleUploadedFile('reviews.csv', content)}, **self.header)
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            (response.json()['created'], response.json()['skipped'], [error['row'] for error in response.json()['errors']]),
+            (2, 2, [5, 6, 7, 8, 9])
+        )
+        self.assertEqual(response.json()['errors'][-1]['message'], 'invalid place')
+        
+        review = Review.objects.get(user=self.user, movie_id='550')
+        
+        self.assertEqual((review.content, review.rating, str(review.watched_date), str(review.watched_time)), ('반전, 또 반전', 4.5, '2022-10-26', '19:43:14'))
+        self.assertEqual(sorted(ReviewTag.objects.filter(review=review).values_list('tag__name', flat=True)), ['tag1', '새태그'])
+        self.assertEqual(Tag.objects.count(), 2)
+        self.assertEqual(ReviewPlace.objects.get(review=review).place.name, 'CGV 강남')
+        self.assertEqual(sorted(MovieTag.objects.filter(movie_id=550).values_list('tag__name', 'review_count')), [('tag1', 1), ('새태그', 1)])
+        mocked_schedule.assert_called_once_with(self.user.id)
+    
+    def test_import_jsonl_in_batches(self):
+        lines = [
+            {'movie_id': 550, 'title': '하나', 'rating': 4.5, 'tags': ['tag1'], 'place': {'name': 'CGV 강남', 'mapx': 127.0276, 'mapy': 37.4979}},
+            'not json',
+            {'movie_id': 13, 'title': '둘', 'rating': 3, 'place': {'name': 'CGV 강남', 'mapx': 127.0277, 'mapy': 37.4980}},
+            {'movie_id': 155, 'title': '셋', 'rating': 2.5, 'tags': ['tag1', 'tag1']},
+        ]
+        stream = io.StringIO('\n'.join(line if isinstance(line, str) else json.dumps(line, ensure_ascii=False) for line in lines))
+        
+        result = history.import_reviews(self.user, history.read_rows(stream, 'jsonl'), batch_size=2)
+        
+        self.assertEqual(result, {'created': 3, 'skipped': 0, 'errors': [{'row': 2, 'message': 'invalid row'}], 'aborted': False})
+        self.assertEqual(ReviewPlace.objects.values('place_id').distinct().count(), 1)
+        self.assertEqual(ReviewTag.objects.filter(review__movie_id='155').count(), 1)
+    
+    @patch('reviews.history.schedule_rebuild')
+    def test_unreadable_file_keeps_committed_rows(self, mocked_schedule):
+        # TextIOWrapper는 8KB씩 디코딩하므로 잘못된 바이트 앞의 줄은 여러 묶음에 걸쳐 읽힙니다.
+        lines   = ['movie_id,title,content,rating'] + [f'{movie_id},title,{"내용"*200},4' for movie_id in range(1000, 1030)]
+        content = '\n'.join(lines).encode('utf-8') + b'\n2000,\xff,,4\n'
+        
+        result = history.import_reviews(self.other, history.read_rows(io.TextIOWrapper(io.BytesIO(content), encoding='utf-8', newline=''), 'csv'), batch_size=2)
+        
+        self.assertTrue(result['aborted'])
+        self.assertGreater(result['created'], 2)
+        self.assertEqual(result['errors'], [{'row': result['created']+1, 'message': 'unreadable file'}])
+        self.assertEqual(Review.objects.filter(user=self.other).count(), result['created'])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/review/history', {'file': SimpleUploadedFile('reviews.csv', content)}, **self.header)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((response.json()['message'], response.json()['created']), ('INVALID_FILE', result['created']))
+        mocked_schedule.assert_called_once_with(self.user.id)
+    
+    @patch('reviews.history.EXPORT_CHUNK_SIZE', 1)
+    @patch('reviews.history.schedule_rebuild', MagicMock())
+    def test_export_import_roundtrip(self):
+        review = Review.objects.create(user=self.user, movie_id='550', title='인생 영화', content='반전, "또" 반전', rating='4.3', watched_date='2022-10-26', watched_time='19:43:14')
+        
+        ReviewTag.objects.create(review=review, tag=Tag.objects.get(name='tag1'))
+        ReviewPlace.objects.create(review=review, place=places.get_or_create_place(127.0276, 37.4979, 'CGV 강남', ''))
+        
+        exported = self.export(self.user, 'csv')
+        
+        self.assertTrue(exported.startswith(b'\xef\xbb\xbfmovie_id,title,'))
+        
+        response = self.client.post(
+            '/review/history',
+            {'file': SimpleUploadedFile('export.csv', exported)},
+            HTTP_Authorization=jwt.encode({'id': self.other.id}, SECRET_KEY, algorithm=ALGORITHM)
+        )
+        
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(Review.objects.get(user=self.other, movie_id='550').rating, Decimal('4.3'))
+        self.assertEqual(self.export(self.other, 'jsonl'), self.export(self.user, 'jsonl'))
+        self.assertEqual(json.loads(self.export(self.user, 'jsonl').splitlines()[1])['place']['name'], 'CGV 강남')
+    
+    @patch('reviews.history.EXPORT_CHUNK_SIZE', 1)
+    def test_export_under_asgi(self):
+        Review.objects.create(user=self.user, movie_id='550', title='인생 영화', content='content', rating='4.3')
+        
+        for format in history.HISTORY_FORMATS:
+            self.assertEqual(self.export_asgi(self.user, format), (200, self.export(self.user, format)))
+    
+    @patch('reviews.history.rebuild_derived')
+    def test_import_command(self, mocked_rebuild):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', encoding='utf-8') as file:
+            file.write(json.dumps({'movie_id': 550, 'title': '하나', 'rating': 4.5}))
+            file.flush()
+            
+            call_command('import_reviews', self.other.id, file.name, stdout=MagicMock())
+        
+        self.assertTrue(Review.objects.filter(user=self.other, movie_id='550').exists())
+        mocked_rebuild.assert_called_once_with(self.other.id)
+    
+    @patch('reviews.history.connections')
+    @patch('reviews.history.rebuild_derived')
+    def test_rebuild_locked_and_logged(self, mocked_rebuild, mocked_connections):
+        cache.clear()
+        
+        with patch('reviews.history.threading.Thread') as mocked_thread:
+            self.assertTrue(history.schedule_rebuild(self.user.id))
+        
+        mocked_thread.assert_called_once_with(target=history._rebuild_in_background, args=(self.user.id,), daemon=True)
+        
+        # 실행 중에 끝난 가져오기는 새 스레드 없이 한 번 더 계산하고, 실패는 기록합니다.
+        def rebuild(user_id):
+            if mocked_rebuild.call_count == 1:
+                self.assertFalse(history.schedule_rebuild(user_id))
+            else:
+                raise RuntimeError('deadlock')
+        
+        mocked_rebuild.side_effect = rebuild
+        
+        with self.assertLogs('reviews.history', 'ERROR'):
+            history._rebuild_in_background(self.user.id)
+        
+        self.assertEqual(mocked_rebuild.call_count, 2)
+        self.assertIsNone(cache.get(f'history_rebuild:{self.user.id}'))
+        mocked_connections.close_all.assert_called_once_with()
+    
+    def test_invalid_format(self):
+        response = self.client.post('/review/history', {'file': SimpleUploadedFile('reviews.txt', b'')}, **self.header)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/review/history', {'format': 'xml'}, **self.header).status_code, 400)
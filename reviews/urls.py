@@ -1,5 +1,5 @@
 from django.urls  import path
-from reviews.views import ReviewListView, ReviewView, ReviewTopThreeView
+from reviews.views import ReviewListView, ReviewView, ReviewTopThreeView, MovieTagView, RelatedTagView, TagSimilarMovieView, NearbyPlaceView, ReviewSearchView, ReviewHistoryView
 
 urlpatterns = [
     #list
@@ -10,6 +10,18 @@ urlpatterns = [
     path('/movie/<int:movie_id>', ReviewView.as_view()),
     #delete
     path('/<int:review_id>', ReviewView.as_view()),
+    #history export, import (csv, jsonl)
+    path('/history', ReviewHistoryView.as_view()),
+    #search
+    path('/search', ReviewSearchView.as_view()),
     #top3
     path('/top3', ReviewTopThreeView.as_view()),
+    #movie popular tags
+    path('/tags/movie/<int:movie_id>', MovieTagView.as_view()),
+    #movies with similar tags
+    path('/tags/movie/<int:movie_id>/similar', TagSimilarMovieView.as_view()),
+    #co-occurring tags
+    path('/tags/<int:tag_id>/related', RelatedTagView.as_view()),
+    #places near a point (optionally where a movie was watched)
+    path('/places/nearby', NearbyPlaceView.as_view()),
 ]
\ No newline at end of file
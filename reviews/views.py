@@ -1,28 +1,51 @@
-import requests
+import io
 
-from random               import randrange
-from django.http          import JsonResponse
-from django.views         import View
-from django.db            import transaction
-from rest_framework.views import APIView
+from random                    import randrange
+from asgiref.sync              import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http               import FileResponse, StreamingHttpResponse
+from django.views              import View
+from django.db                 import transaction
+from rest_framework.views      import APIView
 
-from core.utils       import login_decorator
+from core.cache       import http_cache
+from core.exceptions  import TMDBError
+from core.http        import JsonResponse
+from core.utils       import alogin_decorator, get_limit, login_decorator
 from core.storages    import FileHander, s3_client
 from core.tmdb        import tmdb_helper
+from core.views       import AsyncView, non_atomic_requests
 from adminpage.models import Image
+from movies           import affinity
 from movies.models    import Genre
-from reviews.models   import ColorCode, Place, ReviewImage, ReviewPlace, Tag, Review, ReviewTag
+from movies.summaries import ahydrate, aget_movie_summaries
+from reviews          import history, places, search, tag_index
+from reviews.models   import ColorCode, ReviewImage, ReviewPlace, Tag, Review, ReviewTag
+from users            import stats as user_stats
 from users.models     import User
 from my_settings      import AWS_S3_URL, TMDB_IMAGE_BASE_URL
 
+def get_movie(movie_id):
+    """리뷰 목록에 표시할 영화 정보를 조회합니다.
+
+    TMDB 장애로 조회에 실패하면 빈 dict를 반환해 영화 정보 없이 리뷰 목록을 응답합니다.
+    """
+    try:
+        return tmdb_helper.get(f'/movie/{movie_id}', language='KO')
+    except TMDBError:
+        return {}
+
+def get_country(movie):
+    return movie['production_countries'][0].get('name', '') if movie.get('production_countries') else ''
+
+@non_atomic_requests
 class ReviewView(APIView):
     @login_decorator
     def get(self, request, movie_id):
         try:
             user   = request.user
             review = Review.objects.get(user=user, movie_id=movie_id)
-            request_url = tmdb_helper.get_request_url(method=f'/movie/{movie_id}', language='KO' )
-            movie = requests.get(request_url).json()
+            movie  = tmdb_helper.get(f'/movie/{movie_id}', language='KO')
             
             result = { 
                 'review_id'     : review.id,
@@ -47,7 +70,7 @@ class ReviewView(APIView):
                 'movie'         : {
                     'id'       : movie['id'],
                     'title'    : movie['title'],
-                    'country'  : movie['production_countries'][0]['name'],
+                    'country'  : get_country(movie),
                     'category' : 'movie',
                 }
             }
@@ -64,7 +87,6 @@ class ReviewView(APIView):
             return JsonResponse({'message' : 'VALUE_ERROR'}, status=400)
         
     @login_decorator
-    @transaction.atomic(using='default')
     def post(self, request):
         try:
             data = request.data
@@ -72,153 +94,185 @@ class ReviewView(APIView):
             if Review.objects.filter(user=request.user, movie_id=data['movie_id']).exists():
                 return JsonResponse({'message' : 'REVIEW_ALREADY_EXSISTS'}, status=403)
             
-            review = Review.objects.create(
-                user         = request.user,
-                movie_id     = data['movie_id'],
-                title        = data['title'],
-                content      = data['content'],
-                rating       = data['rating'],
-                watched_date = data['watched_date'].split(' ')[0],
-                watched_time = data['watched_date'].split(' ')[1],
-                with_user    = data['with_user']
-            )
+            review_data = {
+                'user'         : request.user,
+                'movie_id'     : data['movie_id'],
+                'title'        : data['title'],
+                'content'      : data['content'],
+                'rating'       : data['rating'],
+                'watched_date' : data['watched_date'].split(' ')[0],
+                'watched_time' : data['watched_date'].split(' ')[1],
+                'with_user'    : data['with_user'],
+            }
             
-            file_handler = FileHander(s3_client)
+            # S3 업로드는 트랜잭션을 열기 전에 처리합니다.
+            file_handler  = FileHander(s3_client)
+            review_images = [file_handler.upload(review_image, 'image/review') for review_image in data.getlist('review_images', None) or []]
             
-            review_images = data.getlist('review_images', None)
-        
-            if review_images:
-                for review_image in review_images:
-                    file_name = file_handler.upload(review_image,'image/review')
-                    image     = Image.objects.create(image_url=file_name)
+            with transaction.atomic(using='default'):
+                review = Review.objects.create(**review_data)
+                
+                affinity.on_commit(affinity.add_review, request.user.id, review.movie_id)
+                
+                for file_name in review_images:
+                    image = Image.objects.create(image_url=file_name)
                     
                     ReviewImage.objects.create(
                         image  = image,
                         review = review,
                     )
-            
-            place_info = data.getlist('place', None)
+                
+                place_info    = data.getlist('place', None)
+                review_places = []
 
-            if place_info:
-                place, is_created = Place.objects.update_or_create(
-                    mapx = place_info[0],
-                    mapy = place_info[1],
-                    defaults = {
-                        'name' : place_info[2],
-                        'link' : place_info[3]
-                    }
-                )
+                if place_info:
+                    place = places.get_or_create_place(place_info[0], place_info[1], place_info[2], place_info[3])
+                    
+                    ReviewPlace.objects.create(place=place, review=review)
+                    review_places.append((place.id, place.name))
                 
-                ReviewPlace.objects.create(place=place, review=review)
-            
-            tags = data.getlist('tags', None)
-            
-            if tags:
-                for tag in tags:
-                    #TODO : 확인필수
-                    tag, is_created = Tag.objects.get_or_create(name=tag, color_code_id=randrange(1,len(ColorCode.objects.all())))
-                    ReviewTag.objects.create(
-                        review = review,
-                        tag    = tag
-                    )
+                tags = data.getlist('tags', None)
+                
+                if tags:
+                    tag_ids = []
+                    
+                    for tag in tags:
+                        #TODO : 확인필수
+                        tag, is_created = Tag.objects.get_or_create(name=tag, color_code_id=randrange(1,len(ColorCode.objects.all())))
+                        ReviewTag.objects.create(
+                            review = review,
+                            tag    = tag
+                        )
+                        tag_ids.append(tag.id)
+                    
+                    tag_index.on_commit(tag_index.add_review_tags, review.movie_id, tag_ids)
+                
+                user_stats.on_commit(request.user.id, added=[user_stats.get_contribution(review, review_places)])
             
             return JsonResponse({'message' : 'SUCCESS'}, status=201)
                 
         except KeyError:
             return JsonResponse({'message' : 'KEY_ERROR'}, status=400)
+        
+        except ValueError:
+            return JsonResponse({'message' : 'VALUE_ERROR'}, status=400)
 
     @login_decorator
-    @transaction.atomic(using='default')
     def put(self, request):
         try:
-            data   = request.data
-            review = Review.objects.get(id=data['review_id'])
+            data         = request.data
+            file_handler = FileHander(s3_client)
             
-            for key in data.dict().keys():
-                
-                if key == 'place':
-                    place_info = data.getlist(key, None)
+            # 새 이미지의 S3 업로드는 트랜잭션을 열기 전에 처리하고, 삭제는 커밋된 뒤에 처리합니다.
+            uploaded_images = [
+                file_handler.upload(review_image, 'image/review')
+                for review_image in data.getlist('review_images', None) or [] if type(review_image) != str
+            ]
+            
+            with transaction.atomic(using='default'):
+                review       = Review.objects.get(id=data['review_id'])
+                contribution = user_stats.get_contribution(review)
                 
-                    place, is_created = Place.objects.update_or_create(
-                        mapx     = place_info[0],
-                        mapy     = place_info[1],
-                        defaults = {
-                            'name' : place_info[2],
-                            'link' : place_info[3]
-                        }
-                    )
-                    ReviewPlace.objects.update_or_create(
-                        review = review,
-                        place  = place
-                    )
+                for key in data.dict().keys():
                     
-                if key == 'tags':
-                    ReviewTag.objects.filter(review=review).delete()
-                    for tag_name in data.getlist(key, None):
-                        tag, is_created = Tag.objects.get_or_create(name=tag, color_code_id=randrange(1,len(ColorCode.objects.all())))
-                        ReviewTag.objects.create(
+                    if key == 'place':
+                        place_info = data.getlist(key, None)
+                    
+                        place = places.get_or_create_place(place_info[0], place_info[1], place_info[2], place_info[3])
+                        
+                        ReviewPlace.objects.update_or_create(
                             review = review,
-                            tag    = tag
+                            place  = place
                         )
-                
-                if key == 'review_images':
-                    file_handler      = FileHander(s3_client)
-                    review_image_urls = [review_image.image.image_url for review_image in ReviewImage.objects.filter(review_id=review.id)]
-                    for review_image in data.getlist(key):
-                        if type(review_image) != str:
-                            file_name = file_handler.upload(review_image,'image/review')
-                            image     = Image.objects.create(image_url=file_name)
+                        
+                    if key == 'tags':
+                        old_tag_ids = list(ReviewTag.objects.filter(review=review).values_list('tag_id', flat=True))
+                        tag_ids     = []
+                        
+                        ReviewTag.objects.filter(review=review).delete()
+                        for tag_name in data.getlist(key, None):
+                            tag, is_created = Tag.objects.get_or_create(name=tag_name, color_code_id=randrange(1,len(ColorCode.objects.all())))
+                            ReviewTag.objects.create(
+                                review = review,
+                                tag    = tag
+                            )
+                            tag_ids.append(tag.id)
+                        
+                        tag_index.on_commit(tag_index.replace_review_tags, review.movie_id, old_tag_ids, tag_ids)
+                    
+                    if key == 'review_images':
+                        review_image_urls = [review_image.image.image_url for review_image in ReviewImage.objects.filter(review_id=review.id)]
+                        
+                        for file_name in uploaded_images:
+                            image = Image.objects.create(image_url=file_name)
 
                             ReviewImage.objects.create(
                                 image  = image,
                                 review = review,
                             )
                         
-                        elif type(review_image) == str and review_image[len(AWS_S3_URL):] in review_image_urls:
-                            review_image_urls.remove(review_image[len(AWS_S3_URL):])
-                            
-                    for review_image in review_image_urls:
-                        file_handler.delete(review_image)
-                        Image.objects.get(image_url=review_image).delete()
-                
-                if key == 'watched_date':
-                    review.watched_date = data[key].split(' ')[0]
-                    review.watched_time = data[key].split(' ')[1]
+                        for review_image in data.getlist(key):
+                            if type(review_image) == str and review_image[len(AWS_S3_URL):] in review_image_urls:
+                                review_image_urls.remove(review_image[len(AWS_S3_URL):])
+                                
+                        for review_image in review_image_urls:
+                            Image.objects.get(image_url=review_image).delete()
+                            transaction.on_commit(lambda review_image=review_image: file_handler.delete(review_image), using='default')
                     
-                if key == 'title':
-                    review.title = data[key]
+                    if key == 'watched_date':
+                        review.watched_date = data[key].split(' ')[0]
+                        review.watched_time = data[key].split(' ')[1]
+                        
+                    if key == 'title':
+                        review.title = data[key]
 
-                if key == 'content':
-                    review.content = data[key]
+                    if key == 'content':
+                        review.content = data[key]
+                    
+                    if key == 'with_user':
+                        review.with_user = data[key]
+                    
+                    if key == 'rating':
+                        review.rating = data[key]
                 
-                if key == 'with_user':
-                    review.with_user = data[key]
+                review.save()
                 
-                if key == 'rating':
-                    review.rating = data[key]
-            
-            review.save()
+                user_stats.on_commit(review.user_id, removed=[contribution], added=[user_stats.get_contribution(review)])
                
             return JsonResponse({'message' : 'SUCCESS'}, status=201)
                     
         except KeyError:
             return JsonResponse({'message' : 'KEY_ERROR'}, status=400)
+        
+        except ValueError:
+            return JsonResponse({'message' : 'VALUE_ERROR'}, status=400)
             
     @login_decorator
     def delete(self, request, review_id):
         try:
-            review        = Review.objects.get(id=review_id, user=request.user)
-            review_images = [review_image.image for review_image in ReviewImage.objects.filter(review=review)]
-            
             file_handler = FileHander(s3_client)
             
-            for review_image in review_images:
-                file_handler.delete(review_image.image_url)
-                review_image.delete()
-            
-            ReviewTag.objects.filter(review=review).delete()
-            
-            review.delete()
+            # S3 이미지는 리뷰 삭제가 커밋된 뒤에 삭제합니다.
+            with transaction.atomic(using='default'):
+                review        = Review.objects.get(id=review_id, user=request.user)
+                review_images = [review_image.image for review_image in ReviewImage.objects.filter(review=review)]
+                contribution  = user_stats.get_contribution(review)
+                
+                for review_image in review_images:
+                    review_image.delete()
+                    transaction.on_commit(lambda image_url=review_image.image_url: file_handler.delete(image_url), using='default')
+                
+                tag_ids = list(ReviewTag.objects.filter(review=review).values_list('tag_id', flat=True))
+                
+                ReviewTag.objects.filter(review=review).delete()
+                
+                review.delete()
+                
+                tag_index.on_commit(tag_index.remove_review_tags, review.movie_id, tag_ids)
+                
+                affinity.on_commit(affinity.remove_review, request.user.id, review.movie_id)
+                
+                user_stats.on_commit(request.user.id, removed=[contribution])
 
             return JsonResponse({'message':'NO_CONTENTS'}, status=204)
         
@@ -231,6 +285,7 @@ class ReviewView(APIView):
         except ValueError:
             return JsonResponse({'message':'VALUE_ERROR'}, status=400)
 
+@non_atomic_requests
 class ReviewListView(View):
     @login_decorator
     def get(self, request):
@@ -240,25 +295,24 @@ class ReviewListView(View):
             result = []
             
             for review in reviews:
-                request_url = tmdb_helper.get_request_url(method=f'/movie/{review.movie_id}', language='KO')
-                movie = requests.get(request_url).json()
+                movie = get_movie(review.movie_id)
                 result.append({ 
                     'review_id' : review.id,
                     'title'     : review.title,
                     'rating'    : review.rating,
                     'movie'     : {
-                        'id'       : movie['id'],
-                        'poster'   : TMDB_IMAGE_BASE_URL+movie['poster_path'] if movie['poster_path'] else '',
-                        'title'    : movie['title'],
-                        'en_title' : movie['original_title'],
-                        'released' : movie['release_date'],
-                        'country'  : movie['production_countries'][0]['name'],
+                        'id'       : movie.get('id', review.movie_id),
+                        'poster'   : TMDB_IMAGE_BASE_URL+movie['poster_path'] if movie.get('poster_path') else '',
+                        'title'    : movie.get('title', ''),
+                        'en_title' : movie.get('original_title', ''),
+                        'released' : movie.get('release_date', ''),
+                        'country'  : get_country(movie),
                         'genre'    : [{
                                 'name' : genre['name'],
                                 'color_code' : Genre.objects.get(id=genre['id']).color_code
-                            } for genre in movie['genres']],
-                        'age'      : movie['adult'],
-                        'running_time' : movie['runtime']
+                            } for genre in movie.get('genres', [])],
+                        'age'      : movie.get('adult'),
+                        'running_time' : movie.get('runtime')
                     }
                 })
             
@@ -270,6 +324,7 @@ class ReviewListView(View):
         except ValueError:
             return JsonResponse({'message' : 'VALUE_ERROR'}, status=400)
 
+@non_atomic_requests
 class ReviewTopThreeView(View):
     @login_decorator
     def get(self, request):
@@ -281,8 +336,7 @@ class ReviewTopThreeView(View):
         else:
             result = []
             for i in range(len(reviews)):
-                request_url = tmdb_helper.get_request_url(method=f'/movie/{reviews[i].movie_id}', language='KO')
-                movie       = requests.get(request_url).json()
+                movie = get_movie(reviews[i].movie_id)
                 
                 result.append(
                     {
@@ -297,4 +351,170 @@ class ReviewTopThreeView(View):
                     }
                 )
                 
-            return JsonResponse({'message' : 'SUCCESS', 'result' : result}, status=200)
\ No newline at end of file
+            return JsonResponse({'message' : 'SUCCESS', 'result' : result}, status=200)
+
+def get_tag_data(tag, review_count):
+    return {
+        'id'           : tag.id,
+        'tag'          : tag.name,
+        'color'        : tag.color_code.color_code,
+        'review_count' : review_count,
+    }
+
+@non_atomic_requests
+class ReviewHistoryView(View):
+    """리뷰 기록 내보내기(GET), 가져오기(POST) (CSV, JSONL)
+
+    가져오기는 묶음마다 커밋하므로 파일을 읽는 중에 인코딩, 형식 오류가 나면 그 전 줄까지는 저장되고,
+    저장된 수(created)와 함께 400 INVALID_FILE을 응답합니다.
+    통계와 배우 친밀도는 가져오기가 끝난 뒤 백그라운드에서 한 번 다시 계산합니다.
+    """
+    
+    @login_decorator
+    def get(self, request):
+        try:
+            format = history.get_format(request.GET.get('format'))
+        except ValueError:
+            return JsonResponse({'message' : 'VALUE_ERROR'}, status=400)
+        
+        writer, content_type = history.EXPORT_WRITERS[format]
+        chunks               = writer(history.iter_export_rows(request.user))
+        
+        # ASGI 핸들러는 스트리밍 응답을 이벤트 루프에서 읽으므로(ORM을 호출하면 SynchronousOnlyOperation)
+        # 뷰 스레드에서 파일에 모두 기록한 뒤 파일만 내보냅니다.
+        if isinstance(request, ASGIRequest):
+            response = FileResponse(history.spool_export(chunks), content_type=content_type)
+        else:
+            response = StreamingHttpResponse(chunks, content_type=content_type)
+        
+        response['Content-Disposition'] = f'attachment; filename="reviews.{format}"'
+        
+        return response
+    
+    @login_decorator
+    def post(self, request):
+        try:
+            upload = request.FILES['file']
+            format = history.get_format(request.POST.get('format') or upload.name)
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            result = history.import_reviews(request.user, history.read_rows(stream, format))
+        
+        except KeyError:
+            return JsonResponse({'message' : 'KEY_ERROR'}, status=400)
+        
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_FILE'}, status=400)
+        
+        # 파일을 끝까지 읽지 못해도 앞 묶음은 커밋되었으므로 통계와 배우 친밀도를 다시 계산합니다.
+        if result['created']:
+            history.schedule_rebuild(request.user.id)
+        
+        if result['aborted']:
+            return JsonResponse({'message' : 'INVALID_FILE', **result}, status=400)
+        
+        return JsonResponse({'message' : 'SUCCESS', **result}, status=201)
+
+def get_search_data(review, movie):
+    return {
+        'review_id' : review.id,
+        'title'     : review.title,
+        'content'   : review.content,
+        'rating'    : review.rating,
+        'score'     : round(review.score, 4),
+        'user'      : {'id': review.user.id, 'nickname': review.user.nickname},
+        'movie'     : movie or {'id': review.movie_id},
+    }
+
+class ReviewSearchView(AsyncView):
+    """리뷰 제목, 내용 검색
+
+    기본은 내가 작성한 리뷰에서 검색하고, movie_id를 지정하면 그 영화의 전체 리뷰에서 검색합니다.
+    영화 정보는 페이지의 영화 요약 정보를 한 번에 조회합니다. (movies.summaries)
+    """
+    
+    @alogin_decorator
+    async def get(self, request):
+        try:
+            query         = search.clean_query(request.GET.get('q'))
+            cursor, limit = search.get_page_params(request.GET)
+            movie_id      = request.GET.get('movie_id')
+        except ValueError:
+            return JsonResponse({'message' : 'VALUE_ERROR'}, status=400)
+        
+        user                 = None if movie_id else request.user
+        reviews, next_cursor = await sync_to_async(search.search_reviews)(query, cursor, limit, user, movie_id)
+        movies               = await aget_movie_summaries(list(dict.fromkeys(review.movie_id for review in reviews)))
+        result               = [get_search_data(review, movies.get(review.movie_id)) for review in reviews]
+        
+        return JsonResponse({'message' : 'SUCCESS', 'result' : result, 'next_cursor' : next_cursor}, status=200)
+
+def get_place_data(place):
+    return {
+        'id'           : place.id,
+        'name'         : place.name,
+        'mapx'         : place.mapx,
+        'mapy'         : place.mapy,
+        'link'         : place.link,
+        'distance'     : round(place.distance),
+        'review_count' : place.review_count,
+    }
+
+class NearbyPlaceView(View):
+    @http_cache(max_age=60)
+    def get(self, request):
+        try:
+            mapx     = float(request.GET['mapx'])
+            mapy     = float(request.GET['mapy'])
+            radius   = max(1, min(int(request.GET.get('radius', places.NEARBY_RADIUS_METERS)), places.NEARBY_MAX_RADIUS))
+            limit    = max(1, min(int(request.GET.get('limit', 20)), 50))
+            movie_id = request.GET.get('movie_id')
+            
+            if not places.is_valid_point(mapx, mapy):
+                raise ValueError('invalid point')
+            
+            result = [get_place_data(place) for place in places.get_nearby_places(mapx, mapy, radius, limit, movie_id)]
+            
+            return JsonResponse({'message' : 'SUCCESS', 'result' : result}, status=200)
+        
+        except KeyError:
+            return JsonResponse({'message' : 'KEY_ERROR'}, status=400)
+        
+        except ValueError:
+            return JsonResponse({'message' : 'VALUE_ERROR'}, status=400)
+
+class MovieTagView(View):
+    @http_cache(max_age=60)
+    def get(self, request, movie_id):
+        try:
+            limit = get_limit(request.GET, 10, 50)
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_LIMIT'}, status=400)
+        
+        result = [get_tag_data(movie_tag.tag, movie_tag.review_count) for movie_tag in tag_index.get_movie_tags(movie_id, limit)]
+        
+        return JsonResponse({'message' : 'SUCCESS', 'result' : result}, status=200)
+
+class RelatedTagView(View):
+    @http_cache(max_age=60)
+    def get(self, request, tag_id):
+        try:
+            limit = get_limit(request.GET, 10, 50)
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_LIMIT'}, status=400)
+        
+        result = [get_tag_data(pair.other_tag, pair.review_count) for pair in tag_index.get_related_tags(tag_id, limit)]
+        
+        return JsonResponse({'message' : 'SUCCESS', 'result' : result}, status=200)
+
+class TagSimilarMovieView(AsyncView):
+    @http_cache(max_age=60*10)
+    async def get(self, request, movie_id):
+        try:
+            limit = get_limit(request.GET, 10, 20)
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_LIMIT'}, status=400)
+        
+        items  = await sync_to_async(tag_index.get_similar_movies)(movie_id, limit)
+        result = await ahydrate(items)
+        
+        return JsonResponse({'message' : 'SUCCESS', 'result' : result}, status=200)
@@ -0,0 +1,112 @@
+import logging, random
+
+from django.core.cache import cache
+from django.db         import transaction
+
+from users.models    import LoginBackground
+from core.exceptions import TMDBError
+from core.tmdb       import tmdb_helper
+from my_settings     import TMDB_IMAGE_BASE_URL
+
+BACKGROUND_SOURCES   = ['/movie/popular', '/movie/now_playing']
+BACKGROUND_FILL_LOCK = 60
+
+# 풀이 비어 있고 채우지도 못할 때 로그인 화면에 보여줄 기본 배경입니다. (TMDB 이미지 서버의 고정 경로)
+DEFAULT_LOGIN_BACKGROUND = {
+    'movie_id'    : 550,
+    'title'       : '파이트 클럽',
+    'description' : '',
+    'image_url'   : TMDB_IMAGE_BASE_URL+'/fCayJrkfRaCRCTh8GqN30f8oyQF.jpg',
+}
+
+logger = logging.getLogger(__name__)
+
+def collect_login_backgrounds(pages=10):
+    """인기/현재 상영 목록에서 배경 이미지 후보를 수집합니다.
+
+    목록 응답에 backdrop_path, title, overview가 포함되어 있으므로
+    영화별 상세 요청 없이 후보를 구성합니다.
+
+    Args:
+        pages: 목록별로 조회할 페이지 수입니다.
+
+    Returns:
+        (movie_id, title, description, image_url) dict 리스트를 반환합니다.
+    """
+    candidates = {}
+
+    for method in BACKGROUND_SOURCES:
+        for page in range(1, pages+1):
+            movies = tmdb_helper.get(method, language='ko-KR', region='KR', page=page)
+
+            for movie in movies.get('results', []):
+                if not movie.get('backdrop_path') or movie['id'] in candidates:
+                    continue
+
+                candidates[movie['id']] = {
+                    'movie_id'    : movie['id'],
+                    'title'       : movie.get('title', ''),
+                    'description' : movie.get('overview', ''),
+                    'image_url'   : TMDB_IMAGE_BASE_URL+movie['backdrop_path'],
+                }
+
+            if page >= movies.get('total_pages', 0):
+                break
+
+    return list(candidates.values())
+
+def refresh_login_backgrounds(pages=10):
+    """배경 이미지 후보 풀을 새로 구성합니다.
+
+    후보를 모두 수집한 뒤 한 트랜잭션 안에서 교체하므로
+    요청 처리 중에는 항상 완성된 풀이 조회됩니다.
+    """
+    candidates = collect_login_backgrounds(pages)
+
+    if not candidates:
+        return 0
+
+    with transaction.atomic(using='default'):
+        LoginBackground.objects.all().delete()
+        LoginBackground.objects.bulk_create([
+            LoginBackground(slot=slot, **candidate) for slot, candidate in enumerate(candidates)
+        ])
+
+    return len(candidates)
+
+def pick_login_background():
+    """풀에서 임의의 배경 이미지를 하나 선택합니다.
+
+    slot 컬럼은 0부터 연속된 값을 가지므로 unique 인덱스 조회만으로 선택합니다.
+
+    Returns:
+        LoginBackground 객체, 풀이 비어있으면 None을 반환합니다.
+    """
+    last_slot = LoginBackground.objects.order_by('-slot').values_list('slot', flat=True).first()
+
+    if last_slot is None:
+        return None
+
+    return LoginBackground.objects.filter(slot=random.randint(0, last_slot)).first()
+
+def get_login_background():
+    """로그인 화면의 배경 이미지를 반환합니다. 로그인 화면에는 오류 대신 항상 이미지를 보여줍니다.
+
+    풀이 비어 있으면(배포 직후 등) 캐시 락을 잡은 요청 하나가 목록 첫 페이지로 풀을 채우고,
+    다른 요청이 채우는 중이거나 TMDB 장애로 채우지 못하면 저장하지 않은 DEFAULT_LOGIN_BACKGROUND를 반환합니다.
+    """
+    background = pick_login_background()
+
+    if background is not None:
+        return background
+
+    if cache.add('login_background_fill', True, BACKGROUND_FILL_LOCK):
+        try:
+            refresh_login_backgrounds(pages=1)
+            background = pick_login_background()
+        except TMDBError:
+            logger.exception('login background pool fill failed, serving the default background')
+        finally:
+            cache.delete('login_background_fill')
+
+    return background or LoginBackground(slot=0, **DEFAULT_LOGIN_BACKGROUND)
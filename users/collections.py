@@ -0,0 +1,151 @@
+import json, re
+
+from django.db        import transaction
+from django.db.models import Count
+
+from users.models import Collection, CollectionMovie
+
+COLLECTION_PAGE_SIZE       = 20
+COLLECTION_MOVIE_PAGE_SIZE = 50
+COLLECTION_MAX_PAGE_SIZE   = 100
+COLLECTION_BULK_LIMIT      = 500
+COLLECTION_NAME_MAX_LENGTH = 200
+MOVIE_ID_MAX_LENGTH        = 20
+
+def get_page_params(params, default):
+    """keyset pagination의 cursor, limit 쿼리 파라미터를 반환합니다.
+
+    Raises:
+        ValueError: cursor, limit이 정수가 아닌 경우 발생합니다.
+    """
+    cursor = params.get('cursor')
+    limit  = max(1, min(int(params.get('limit', default)), COLLECTION_MAX_PAGE_SIZE))
+
+    return int(cursor) if cursor else None, limit
+
+def paginate(queryset, cursor, limit, descending=False):
+    """id 기준 keyset pagination으로 한 페이지를 조회합니다.
+
+    OFFSET 없이 마지막으로 받은 id 다음부터 limit+1개만 읽으므로 페이지가 뒤로 가도 비용이 같습니다.
+
+    Returns:
+        (rows, next_cursor), 마지막 페이지면 next_cursor는 None입니다.
+    """
+    if cursor is not None:
+        queryset = queryset.filter(id__lt=cursor) if descending else queryset.filter(id__gt=cursor)
+
+    rows = list(queryset.order_by('-id' if descending else 'id')[:limit+1])
+
+    return rows[:limit], (rows[limit-1].id if len(rows) > limit else None)
+
+def load_body(body):
+    """요청 본문(JSON 객체)을 dict로 반환합니다. 컬렉션 API는 모두 이 함수로 본문을 읽습니다.
+
+    Raises:
+        ValueError: 본문이 JSON 객체가 아닌 경우 발생합니다.
+    """
+    data = json.loads(body or b'{}')
+
+    if not isinstance(data, dict):
+        raise ValueError('body must be a JSON object')
+
+    return data
+
+def clean_name(name):
+    """컬렉션 이름의 앞뒤 공백을 지웁니다.
+
+    Raises:
+        ValueError: 문자열이 아니거나, 비어 있거나, COLLECTION_NAME_MAX_LENGTH자를 넘는 경우 발생합니다.
+    """
+    if not isinstance(name, str) or not 0 < len(name.strip()) <= COLLECTION_NAME_MAX_LENGTH:
+        raise ValueError('invalid name')
+
+    return name.strip()
+
+def clean_movie_id(movie_id):
+    """movie_id를 앞자리 0 없는 10진수 문자열로 정리합니다. ('²' 같은 유니코드 숫자는 int()로 읽을 수 없으므로 ASCII 숫자만 허용합니다)
+
+    Raises:
+        ValueError: ASCII 숫자가 아니거나 MOVIE_ID_MAX_LENGTH자를 넘는 경우 발생합니다.
+    """
+    if not re.fullmatch(r'[0-9]+', str(movie_id)):
+        raise ValueError('invalid movie_id')
+
+    movie_id = str(int(movie_id))
+
+    if len(movie_id) > MOVIE_ID_MAX_LENGTH:
+        raise ValueError('invalid movie_id')
+
+    return movie_id
+
+def clean_movie_ids(movie_ids):
+    """movie_ids를 중복 없는 문자열 목록으로 정리합니다.
+
+    Raises:
+        ValueError: 목록이 아니거나, 숫자가 아닌 id가 있거나, COLLECTION_BULK_LIMIT개를 넘는 경우 발생합니다.
+    """
+    if not isinstance(movie_ids, list):
+        raise ValueError('movie_ids must be a list')
+
+    movie_ids = list(dict.fromkeys(clean_movie_id(movie_id) for movie_id in movie_ids))
+
+    if len(movie_ids) > COLLECTION_BULK_LIMIT:
+        raise ValueError('invalid movie_ids')
+
+    return movie_ids
+
+def get_collections(user, cursor, limit):
+    """사용자의 컬렉션을 최근에 만든 순서로 한 페이지 조회합니다. (영화 수 포함)"""
+    queryset = Collection.objects.filter(user=user).annotate(movie_count=Count('collectionmovie'))
+
+    return paginate(queryset, cursor, limit, descending=True)
+
+def get_collection(user, collection_id):
+    """사용자의 컬렉션을 조회합니다. 없거나 다른 사용자의 컬렉션이면 None을 반환합니다."""
+    return Collection.objects.filter(id=collection_id, user=user).first()
+
+def get_collection_movies(collection, cursor, limit):
+    """컬렉션의 영화를 추가한 순서로 한 페이지 조회합니다. ((collection_id, id) 인덱스 범위 조회)"""
+    return paginate(CollectionMovie.objects.filter(collection=collection), cursor, limit)
+
+def add_movies(collection, movie_ids):
+    """컬렉션에 영화를 한 번에 추가합니다. 이미 있는 영화는 건너뜁니다.
+
+    Returns:
+        새로 추가한 영화 수를 반환합니다. (추가 전후의 행 수 차이, 동시에 추가되어 건너뛴 영화는 세지 않습니다)
+    """
+    if not movie_ids:
+        return 0
+
+    with transaction.atomic(using='default'):
+        movies   = CollectionMovie.objects.filter(collection=collection, movie_id__in=movie_ids)
+        existing = set(movies.values_list('movie_id', flat=True))
+
+        # 동시에 같은 영화를 추가한 요청과 충돌하면 unique_collection_movie 제약조건으로 건너뜁니다.
+        CollectionMovie.objects.bulk_create([
+            CollectionMovie(collection=collection, movie_id=movie_id) for movie_id in movie_ids if movie_id not in existing
+        ], ignore_conflicts=True)
+
+        return movies.count() - len(existing)
+
+def remove_movies(collection, movie_ids):
+    """컬렉션에서 영화를 한 번에 삭제합니다.
+
+    Returns:
+        삭제한 영화 수를 반환합니다.
+    """
+    if not movie_ids:
+        return 0
+
+    deleted, _ = CollectionMovie.objects.filter(collection=collection, movie_id__in=movie_ids).delete()
+
+    return deleted
+
+def create_collection(user, name, movie_ids):
+    """컬렉션을 만들고 처음 담을 영화를 함께 추가합니다."""
+    with transaction.atomic(using='default'):
+        collection = Collection.objects.create(user=user, name=name)
+
+        CollectionMovie.objects.bulk_create([CollectionMovie(collection=collection, movie_id=movie_id) for movie_id in movie_ids])
+
+    return collection
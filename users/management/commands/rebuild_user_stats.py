@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core.exceptions import TMDBError
+from core.ratelimit  import background
+from reviews.models  import Review
+from users.models    import UserStats
+from users.stats     import STATS_BATCH_SIZE, rebuild_users
+
+class Command(BaseCommand):
+    help = '리뷰 전체로 사용자별 리뷰 통계를 다시 계산합니다. (데이터 이전, TMDB 장애로 건너뛴 갱신 보정용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('users', nargs='*', type=int, help='다시 계산할 사용자 id (기본값: 리뷰를 작성한 전체 사용자)')
+        parser.add_argument('--batch-size', type=int, default=STATS_BATCH_SIZE, help='한 번에 다시 계산할 사용자 수')
+
+    @background
+    def handle(self, *args, **options):
+        user_ids = options['users'] or list(Review.objects.values_list('user_id', flat=True).distinct().order_by('user_id'))
+        size     = options['batch_size']
+
+        if not options['users']:
+            deleted, _ = UserStats.objects.exclude(user_id__in=Review.objects.values('user_id')).delete()
+
+            self.stdout.write(f'stats without reviews deleted : {deleted}')
+
+        for start in range(0, len(user_ids), size):
+            batch = user_ids[start:start+size]
+
+            try:
+                reviews = rebuild_users(batch)
+            except TMDBError:
+                self.stdout.write(self.style.ERROR(f'users {batch[0]}-{batch[-1]} skipped : TMDB error'))
+                continue
+
+            self.stdout.write(self.style.SUCCESS(f'users {batch[0]}-{batch[-1]} stats rebuilt : {reviews} reviews'))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.ratelimit    import background
+from users.backgrounds import refresh_login_backgrounds
+
+class Command(BaseCommand):
+    help = '로그인 배경 이미지 후보 풀을 TMDB 인기/현재 상영 목록으로 갱신합니다. (cron 등록용)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=10, help='목록별 조회 페이지 수')
+
+    @background
+    def handle(self, *args, **options):
+        count = refresh_login_backgrounds(pages=options['pages'])
+        
+        self.stdout.write(self.style.SUCCESS(f'login backgrounds refreshed : {count}'))
@@ -0,0 +1,27 @@
+# Generated by Django 4.0.4 on 2026-10-19 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginBackground',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.IntegerField(unique=True)),
+                ('movie_id', models.IntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('image_url', models.CharField(max_length=200)),
+            ],
+            options={
+                'db_table': 'login_backgrounds',
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.0.4 on 2026-10-19 16:59
+
+from django.db        import migrations, models
+from django.db.models import Count, Min
+
+BATCH_SIZE = 1000
+
+
+def clean_collection_movies(apps, schema_editor):
+    """max_length=20, unique_collection_movie 제약조건을 추가하기 전에 기존 행을 정리합니다.
+
+    앞뒤 공백을 지우고, 숫자가 아니거나 20자를 넘는(TMDB 영화 id가 아닌) movie_id는 삭제한 뒤,
+    컬렉션에 같은 영화가 여러 번 담긴 행은 가장 먼저 추가한 행만 남깁니다.
+    """
+    CollectionMovie = apps.get_model('users', 'CollectionMovie')
+    invalid, changed = [], []
+
+    for movie in CollectionMovie.objects.only('id', 'movie_id').iterator(chunk_size=BATCH_SIZE):
+        movie_id = movie.movie_id.strip()
+
+        if not movie_id.isdigit() or len(movie_id) > 20:
+            invalid.append(movie.id)
+        elif movie_id != movie.movie_id:
+            movie.movie_id = movie_id
+            changed.append(movie)
+
+    for start in range(0, len(invalid), BATCH_SIZE):
+        CollectionMovie.objects.filter(id__in=invalid[start:start+BATCH_SIZE]).delete()
+
+    CollectionMovie.objects.bulk_update(changed, ['movie_id'], batch_size=BATCH_SIZE)
+
+    duplicates = (
+        CollectionMovie.objects.values('collection_id', 'movie_id')
+        .annotate(first_id=Min('id'), count=Count('id'))
+        .filter(count__gt=1)
+        .order_by()
+    )
+
+    for duplicate in list(duplicates):
+        CollectionMovie.objects.filter(collection_id=duplicate['collection_id'], movie_id=duplicate['movie_id']).exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_login_background'),
+    ]
+
+    operations = [
+        migrations.RunPython(clean_collection_movies, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='collectionmovie',
+            name='movie_id',
+            field=models.CharField(max_length=20),
+        ),
+        migrations.AddConstraint(
+            model_name='collectionmovie',
+            constraint=models.UniqueConstraint(fields=('collection', 'movie_id'), name='unique_collection_movie'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.0.4 on 2026-10-19 17:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_collection_movie_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('runtime', models.PositiveIntegerField(default=0)),
+                ('ratings', models.JSONField(default=dict)),
+                ('months', models.JSONField(default=dict)),
+                ('genres', models.JSONField(default=dict)),
+                ('places', models.JSONField(default=dict)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='users.user')),
+            ],
+            options={
+                'db_table': 'user_stats',
+            },
+        ),
+    ]
@@ -53,8 +53,38 @@ class Collection(TimeStampedModel):
         db_table = 'collections'
 
 class CollectionMovie(models.Model):
-    movie_id   = models.CharField(max_length=1000)
+    movie_id   = models.CharField(max_length=20)
     collection = models.ForeignKey('Collection', on_delete=models.CASCADE)
     
     class Meta:
-        db_table = 'collection_movies'
\ No newline at end of file
+        db_table    = 'collection_movies'
+        constraints = [
+            models.UniqueConstraint(fields=['collection', 'movie_id'], name='unique_collection_movie'),
+        ]
+
+class UserStats(TimeStampedModel):
+    """사용자 리뷰 통계 집계입니다.
+
+    리뷰를 작성, 수정, 삭제할 때 증감하고, rebuild_user_stats 명령으로 다시 계산합니다. (users.stats)
+    ratings, months, genres, places는 {키: 리뷰 수} 형태이며 genres, places의 값은 {'name', 'count'}입니다.
+    """
+    user         = models.OneToOneField('User', on_delete=models.CASCADE)
+    review_count = models.PositiveIntegerField(default=0)
+    runtime      = models.PositiveIntegerField(default=0)
+    ratings      = models.JSONField(default=dict)
+    months       = models.JSONField(default=dict)
+    genres       = models.JSONField(default=dict)
+    places       = models.JSONField(default=dict)
+    
+    class Meta:
+        db_table = 'user_stats'
+
+class LoginBackground(models.Model):
+    slot        = models.IntegerField(unique=True)
+    movie_id    = models.IntegerField()
+    title       = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    image_url   = models.CharField(max_length=200)
+    
+    class Meta:
+        db_table = 'login_backgrounds'
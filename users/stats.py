@@ -0,0 +1,173 @@
+"""사용자 리뷰 통계
+
+리뷰 하나가 통계에 더하는 값(평점, 본 달, 장소)은 리뷰를 저장하는 트랜잭션 안에서 get_contribution으로 구하고,
+트랜잭션이 커밋된 뒤에 영화 요약 정보(장르, 상영 시간)와 함께 사용자의 UserStats 행 하나에 더하거나 뺍니다.
+rebuild_user_stats 명령은 사용자 STATS_BATCH_SIZE명씩 리뷰 전체로 다시 계산합니다.
+"""
+import logging, threading
+
+from collections import defaultdict
+from decimal     import ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+from django.db         import connections, transaction
+
+from core.ratelimit   import background
+from movies.summaries import get_movie_summary
+from reviews.models   import Review, ReviewPlace
+from users.models     import UserStats
+
+STATS_BATCH_SIZE    = 500
+STATS_REBUILD_DELAY = 60
+STATS_REBUILD_LOCK  = 60*10
+RATING_BUCKETS      = [f'{rating/2:.1f}' for rating in range(1, 11)]
+
+logger = logging.getLogger(__name__)
+
+def get_summary(movie_id):
+    """통계에 사용할 영화 요약 정보를 반환합니다. 숫자가 아닌 movie_id는 TMDB에 조회하지 않습니다."""
+    return get_movie_summary(movie_id) if str(movie_id).isdigit() else {}
+
+def get_rating_bucket(rating):
+    """평점을 가장 가까운 0.5 단위 구간(RATING_BUCKETS)으로 반환합니다.
+
+    평점은 소수점 한 자리까지 저장되므로(4.3 등) 반올림하고(4.3 → '4.5', 4.2 → '4.0'), 0.5보다 작으면 '0.5'로 셉니다.
+    """
+    bucket = (Decimal(str(rating))*2).quantize(Decimal('1'), rounding=ROUND_HALF_UP) / 2
+
+    return f'{min(max(bucket, Decimal("0.5")), Decimal("5")):.1f}'
+
+def get_contribution(review, places=None):
+    """리뷰 하나가 통계에 더하는 값을 반환합니다.
+
+    Args:
+        places: 리뷰 장소 (place_id, name) 목록입니다. 없으면 조회합니다.
+    """
+    if places is None:
+        places = ReviewPlace.objects.filter(review=review).values_list('place_id', 'place__name')
+
+    return {
+        'movie_id' : review.movie_id,
+        'rating'   : get_rating_bucket(review.rating),
+        'month'    : str(review.watched_date or review.created_at)[:7],
+        'places'   : [[place_id, name] for place_id, name in places],
+    }
+
+def increment(counts, key, sign, name=None):
+    """counts[key]에 sign을 더하고, 0 이하가 된 키는 삭제합니다. name이 있으면 값을 {'name', 'count'}로 저장합니다."""
+    key   = str(key)
+    count = (counts.get(key, 0) if name is None else counts.get(key, {}).get('count', 0)) + sign
+
+    if count <= 0:
+        counts.pop(key, None)
+    else:
+        counts[key] = {'name': name, 'count': count} if name is not None else count
+
+def apply(stats, contribution, summary, sign):
+    """리뷰 하나의 값을 통계에 더하거나(sign=1) 뺍니다(sign=-1)."""
+    stats.review_count = max(0, stats.review_count+sign)
+    stats.runtime      = max(0, stats.runtime+sign*(summary.get('runtime') or 0))
+
+    increment(stats.ratings, contribution['rating'], sign)
+    increment(stats.months, contribution['month'], sign)
+
+    for genre in summary.get('genres') or []:
+        increment(stats.genres, genre['id'], sign, genre['name'])
+
+    for place_id, name in contribution['places']:
+        increment(stats.places, place_id, sign, name)
+
+def update(user_id, removed=(), added=()):
+    """사용자 통계에서 removed 리뷰의 값을 빼고 added 리뷰의 값을 더합니다.
+
+    영화 요약 정보는 트랜잭션을 열기 전에 조회하고, 통계 행은 select_for_update로 잠근 뒤 갱신합니다.
+    """
+    summaries = {contribution['movie_id']: get_summary(contribution['movie_id']) for contribution in [*removed, *added]}
+
+    with transaction.atomic(using='default'):
+        stats, _ = UserStats.objects.select_for_update().get_or_create(user_id=user_id)
+
+        for contribution in removed:
+            apply(stats, contribution, summaries[contribution['movie_id']], -1)
+
+        for contribution in added:
+            apply(stats, contribution, summaries[contribution['movie_id']], 1)
+
+        stats.save()
+
+def on_commit(user_id, removed=(), added=()):
+    """리뷰를 저장, 수정, 삭제한 트랜잭션이 커밋된 뒤에 통계를 갱신합니다.
+
+    리뷰는 이미 커밋되었으므로 갱신이 실패해도(TMDB 장애 등) 예외를 응답으로 전달하지 않고,
+    기록한 뒤 schedule_rebuild로 사용자의 통계를 다시 계산합니다.
+    """
+    def run():
+        try:
+            update(user_id, removed, added)
+        except Exception:
+            logger.exception('user %s stats update failed, scheduling a rebuild', user_id)
+            schedule_rebuild(user_id)
+
+    transaction.on_commit(run, using='default')
+
+def rebuild_users(user_ids):
+    """사용자들의 리뷰 전체로 통계를 다시 계산합니다. 리뷰, 장소는 사용자 묶음 전체를 쿼리 하나씩으로 읽습니다.
+
+    Returns:
+        처리한 리뷰 수를 반환합니다.
+
+    Raises:
+        TMDBError: 영화 요약 정보 조회에 실패한 경우 발생하며, 이 묶음의 통계는 바뀌지 않습니다.
+    """
+    reviews = list(Review.objects.filter(user_id__in=user_ids).only('user_id', 'movie_id', 'rating', 'watched_date', 'created_at'))
+    places  = defaultdict(list)
+
+    for review_id, place_id, name in ReviewPlace.objects.filter(review__user_id__in=user_ids).values_list('review_id', 'place_id', 'place__name'):
+        places[review_id].append((place_id, name))
+
+    summaries = {movie_id: get_summary(movie_id) for movie_id in {review.movie_id for review in reviews}}
+    stats     = {user_id: UserStats(user_id=user_id) for user_id in user_ids}
+
+    for review in reviews:
+        apply(stats[review.user_id], get_contribution(review, places[review.id]), summaries[review.movie_id], 1)
+
+    with transaction.atomic(using='default'):
+        UserStats.objects.filter(user_id__in=user_ids).delete()
+        UserStats.objects.bulk_create(stats.values())
+
+    return len(reviews)
+
+@background
+def _rebuild_in_background(user_id):
+    try:
+        rebuild_users([user_id])
+    except Exception:
+        logger.exception('user %s stats rebuild failed', user_id)
+    finally:
+        cache.delete(f'user_stats_rebuild:{user_id}')
+        connections.close_all()
+
+def schedule_rebuild(user_id, delay=STATS_REBUILD_DELAY):
+    """delay초 뒤에 백그라운드 스레드에서 사용자의 통계를 다시 계산합니다. (갱신 실패 보정용)
+
+    TMDB 장애가 지나갈 시간을 두고 실행하며, 캐시 락으로 같은 사용자의 재계산이 여러 번 예약되지 않도록 합니다.
+    재계산도 실패하면 rebuild_user_stats 명령으로 보정합니다.
+    """
+    if not cache.add(f'user_stats_rebuild:{user_id}', True, STATS_REBUILD_LOCK):
+        return False
+
+    timer        = threading.Timer(delay, _rebuild_in_background, args=(user_id,))
+    timer.daemon = True
+    timer.start()
+
+    return True
+
+def get_user_stats(user):
+    """사용자 통계를 쿼리 하나로 조회합니다. 리뷰가 없는 사용자는 저장하지 않은 빈 통계를 반환합니다."""
+    return UserStats.objects.filter(user=user).first() or UserStats(user=user)
+
+def get_top(counts, limit):
+    """{id: {'name', 'count'}}를 리뷰 수가 많은 순서의 [{'id', 'name', 'count'}] limit개로 반환합니다."""
+    items = sorted(counts.items(), key=lambda item: (-item[1]['count'], int(item[0])))
+
+    return [{'id': int(key), **value} for key, value in items[:limit]]
@@ -1,12 +1,20 @@
-import jwt
+import json, jwt
 
-from rest_framework.test import APITestCase, APIClient
-from django.test         import TestCase, Client
-from unittest.mock       import MagicMock, patch
+from rest_framework.test    import APITestCase, APIClient
+from django.core.cache      import cache
+from django.core.management import call_command
+from django.test            import TestCase, Client
+from unittest.mock          import MagicMock, patch
 
-from users.models     import ProfileImage, SocialPlatform, User, Group
-from adminpage.models import Image
-from my_settings      import SECRET_KEY, ALGORITHM 
+from users.models      import Collection, CollectionMovie, ProfileImage, SocialPlatform, User, Group, LoginBackground, UserStats
+from users             import backgrounds, stats
+from users.backgrounds import refresh_login_backgrounds
+from adminpage.models  import Image
+from core.exceptions   import TMDBError
+from core.testing      import PerformanceBudgetMixin
+from movies.tests      import mock_tmdb_get_or_not_found
+from reviews.models    import Review
+from my_settings       import SECRET_KEY, ALGORITHM, TMDB_IMAGE_BASE_URL
 
 class MockNaverTokenDataResponse:
     def json():
@@ -54,7 +62,7 @@ class LoginTest(APITestCase):
         
         response = self.client.get('/user/login/naver/callback')
 
-class UserInformationTest(TestCase):
+class UserInformationTest(PerformanceBudgetMixin, TestCase):
     maxDiff = None
     
     @classmethod
@@ -109,6 +117,7 @@ class UserInformationTest(TestCase):
                     }
                 }
         )
+        self.assertWithinBudget(response)
         
     def test_user_profile_update_patch(self):
         
@@ -122,3 +131,373 @@ class UserInformationTest(TestCase):
     def test_user_account_delete(self):
         
         response = self.client.delete('/user/delete', **self.header)
+
+class MockMovieListResponse:
+    def json():
+        movie_list = {
+            'page'          : 1,
+            'total_pages'   : 1,
+            'results'       : [
+                {
+                    'id'            : 550,
+                    'title'         : '파이트 클럽',
+                    'overview'      : 'overview',
+                    'backdrop_path' : '/fCayJrkfRaCRCTh8GqN30f8oyQF.jpg'
+                },
+                {
+                    'id'            : 551,
+                    'title'         : 'no backdrop',
+                    'overview'      : 'overview',
+                    'backdrop_path' : None
+                }
+            ]
+        }
+        return movie_list
+
+class LoginBackGroundTest(PerformanceBudgetMixin, TestCase):
+    maxDiff = None
+    
+    @patch('core.tmdb.requests.get', MagicMock(return_value=MockMovieListResponse))
+    def test_refresh_login_backgrounds(self):
+        
+        count = refresh_login_backgrounds(pages=3)
+        
+        self.assertEqual(count, 1)
+        self.assertEqual(list(LoginBackground.objects.values_list('slot', 'movie_id')), [(0, 550)])
+    
+    @patch('core.tmdb.requests.get')
+    def test_login_background_get(self, mocked_requests):
+        LoginBackground.objects.create(
+            slot        = 0,
+            movie_id    = 550,
+            title       = '파이트 클럽',
+            description = 'overview',
+            image_url   = 'image_url'
+        )
+        
+        response = self.client.get('/user/login/background')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'data': {
+                'movie_id'    : 550,
+                'title'       : '파이트 클럽',
+                'description' : 'overview',
+                'image_url'   : 'image_url'
+            }
+        })
+        mocked_requests.assert_not_called()
+        self.assertWithinBudget(response)
+    
+    @patch('core.tmdb.requests.get', MagicMock(return_value=MockMovieListResponse))
+    def test_login_background_get_empty_pool(self):
+        cache.clear()
+        
+        response = self.client.get('/user/login/background')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['movie_id'], 550)
+        self.assertEqual(list(LoginBackground.objects.values_list('slot', 'movie_id')), [(0, 550)])
+    
+    def test_login_background_default_when_fill_fails(self):
+        cache.clear()
+        
+        with patch('users.backgrounds.refresh_login_backgrounds', side_effect=TMDBError()), self.assertLogs('users.backgrounds', 'ERROR'):
+            response = self.client.get('/user/login/background')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'data': backgrounds.DEFAULT_LOGIN_BACKGROUND})
+        self.assertIsNone(cache.get('login_background_fill'))
+        
+        with patch('users.backgrounds.refresh_login_backgrounds') as mocked_refresh:
+            cache.add('login_background_fill', True)
+            response = self.client.get('/user/login/background')
+        
+        self.assertEqual(response.json(), {'data': backgrounds.DEFAULT_LOGIN_BACKGROUND})
+        mocked_refresh.assert_not_called()
+
+TMDB_MOVIES = {
+    '550' : {'id': 550, 'title': '파이트 클럽', 'original_title': 'Fight Club', 'poster_path': '/poster.jpg', 'release_date': '1999-10-12', 'vote_average': 8.4},
+    '13'  : {'id': 13, 'title': '포레스트 검프', 'original_title': 'Forrest Gump', 'poster_path': None, 'release_date': '1994-06-23', 'vote_average': 8.5},
+}
+
+def mock_tmdb_movie(request_url, **kwargs):
+    movie_id = request_url.split('/movie/', 1)[1].split('?')[0]
+    
+    return MagicMock(json=MagicMock(return_value=TMDB_MOVIES.get(movie_id, {'success': False, 'status_code': 34})))
+
+class CollectionTest(PerformanceBudgetMixin, TestCase):
+    
+    @classmethod
+    def setUpTestData(cls):
+        group           = Group.objects.create(name='user')
+        social_platform = SocialPlatform.objects.create(name='naver')
+        
+        cls.user   = User.objects.create(social_id='소셜아이디', nickname='테스트유저', group=group, social_platform=social_platform)
+        cls.other  = User.objects.create(social_id='다른아이디', nickname='다른유저', group=group, social_platform=social_platform)
+        cls.header = {'HTTP_Authorization': jwt.encode({'id': cls.user.id}, SECRET_KEY, algorithm=ALGORITHM)}
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_create_and_list(self):
+        
+        response = self.client.post('/user/collections', data={'name': '보고싶은 영화', 'movie_ids': [550, 13, 550]}, content_type='application/json', **self.header)
+        
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['result']['movie_count'], 2)
+        
+        response = self.client.post('/user/collections', data=['보고싶은 영화'], content_type='application/json', **self.header)
+        
+        self.assertEqual(response.status_code, 400)
+        
+        for name in ['두번째', '세번째']:
+            Collection.objects.create(user=self.user, name=name)
+        
+        Collection.objects.create(user=self.other, name='다른 사용자')
+        
+        response = self.client.get('/user/collections', {'limit': 2}, **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(collection['name'], collection['movie_count']) for collection in response.json()['result']], [('세번째', 0), ('두번째', 0)])
+        self.assertWithinBudget(response)
+        
+        response = self.client.get('/user/collections', {'limit': 2, 'cursor': response.json()['next_cursor']}, **self.header)
+        
+        self.assertEqual([(collection['name'], collection['movie_count']) for collection in response.json()['result']], [('보고싶은 영화', 2)])
+        self.assertIsNone(response.json()['next_cursor'])
+    
+    def test_update_and_delete(self):
+        collection = Collection.objects.create(user=self.user, name='이름')
+        others     = Collection.objects.create(user=self.other, name='다른 사용자')
+        
+        CollectionMovie.objects.create(collection=collection, movie_id='550')
+        
+        response = self.client.patch(f'/user/collections/{collection.id}', data={'name': '새 이름'}, content_type='application/json', **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Collection.objects.get(id=collection.id).name, '새 이름')
+        
+        response = self.client.patch(f'/user/collections/{collection.id}', data=['새 이름'], content_type='application/json', **self.header)
+        
+        self.assertEqual((response.status_code, response.json()), (400, {'message': 'VALUE_ERROR'}))
+        
+        for name in [['a'], '   ', 'a'*201]:
+            response = self.client.patch(f'/user/collections/{collection.id}', data={'name': name}, content_type='application/json', **self.header)
+            
+            self.assertEqual((response.status_code, response.json()), (400, {'message': 'INVALID_NAME'}))
+        
+        response = self.client.post('/user/collections', data={'name': ['a']}, content_type='application/json', **self.header)
+        
+        self.assertEqual((response.status_code, response.json()), (400, {'message': 'INVALID_NAME'}))
+        self.assertEqual(Collection.objects.get(id=collection.id).name, '새 이름')
+        
+        response = self.client.delete(f'/user/collections/{others.id}', **self.header)
+        
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Collection.objects.filter(id=others.id).exists())
+        
+        response = self.client.delete(f'/user/collections/{collection.id}', **self.header)
+        
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(CollectionMovie.objects.filter(collection_id=collection.id).exists())
+    
+    def test_bulk_add_and_remove(self):
+        collection = Collection.objects.create(user=self.user, name='이름')
+        url        = f'/user/collections/{collection.id}/movies'
+        
+        CollectionMovie.objects.create(collection=collection, movie_id='550')
+        
+        response = self.client.post(url, data={'movie_ids': [str(movie_id) for movie_id in range(1, 301)] + ['550']}, content_type='application/json', **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'message': 'SUCCESS', 'added': 300})
+        self.assertWithinBudget(response)
+        self.assertEqual(CollectionMovie.objects.filter(collection=collection).count(), 301)
+        
+        response = self.client.delete(url, data={'movie_ids': list(range(1, 301))}, content_type='application/json', **self.header)
+        
+        self.assertEqual(response.json(), {'message': 'SUCCESS', 'removed': 300})
+        self.assertEqual(list(CollectionMovie.objects.filter(collection=collection).values_list('movie_id', flat=True)), ['550'])
+        
+        with patch('users.collections.CollectionMovie.objects.bulk_create') as mocked_bulk_create:
+            response = self.client.post(url, data={'movie_ids': ['13', '680']}, content_type='application/json', **self.header)
+        
+        self.assertEqual(response.json(), {'message': 'SUCCESS', 'added': 0})
+        mocked_bulk_create.assert_called_once()
+        
+        for movie_ids in [['fight club'], ['²'], ['１３'], ['1'*21]]:
+            response = self.client.post(url, data={'movie_ids': movie_ids}, content_type='application/json', **self.header)
+            
+            self.assertEqual(response.status_code, 400)
+        
+        response = self.client.post(url, data={'movie_ids': ['0013', 13]}, content_type='application/json', **self.header)
+        
+        self.assertEqual(response.json(), {'message': 'SUCCESS', 'added': 1})
+        self.assertTrue(CollectionMovie.objects.filter(collection=collection, movie_id='13').exists())
+        
+        response = self.client.post(f'/user/collections/{collection.id+1}/movies', data={'movie_ids': [13]}, content_type='application/json', **self.header)
+        
+        self.assertEqual(response.status_code, 404)
+    
+    @patch('core.tmdb.httpx.AsyncClient.get', side_effect=mock_tmdb_movie)
+    def test_movies_hydrated_from_summary_cache(self, mocked_requests):
+        collection = Collection.objects.create(user=self.user, name='이름')
+        
+        CollectionMovie.objects.bulk_create([CollectionMovie(collection=collection, movie_id=movie_id) for movie_id in ['550', '13', '999']])
+        
+        response = self.client.get(f'/user/collections/{collection.id}/movies', {'limit': 2}, **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'], [
+            {'id': 550, 'title': '파이트 클럽', 'en_title': 'Fight Club', 'poster': TMDB_IMAGE_BASE_URL+'/poster.jpg', 'release_date': '1999-10-12', 'ratings': 4.2, 'genres': [], 'runtime': 0},
+            {'id': 13, 'title': '포레스트 검프', 'en_title': 'Forrest Gump', 'poster': '', 'release_date': '1994-06-23', 'ratings': 4.2, 'genres': [], 'runtime': 0},
+        ])
+        self.assertEqual(mocked_requests.call_count, 2)
+        
+        response = self.client.get(f'/user/collections/{collection.id}/movies', {'cursor': response.json()['next_cursor']}, **self.header)
+        
+        self.assertEqual(response.json()['result'], [{'id': 999}])
+        self.assertIsNone(response.json()['next_cursor'])
+        
+        with patch('movies.summaries.cache.aget_many', wraps=cache.aget_many) as get_many:
+            response = self.client.get(f'/user/collections/{collection.id}/movies', **self.header)
+        
+        self.assertEqual([movie['id'] for movie in response.json()['result']], [550, 13, 999])
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(mocked_requests.call_count, 3)
+        self.assertWithinBudget(response)
+
+@patch('core.tmdb.requests.get', MagicMock(side_effect=mock_tmdb_get_or_not_found))
+class UserStatsTest(PerformanceBudgetMixin, TestCase):
+    maxDiff = None
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user   = User.objects.create(social_id='소셜아이디', nickname='테스트유저', group=Group.objects.create(name='user'), social_platform=SocialPlatform.objects.create(name='naver'))
+        cls.header = {'HTTP_Authorization': jwt.encode({'id': cls.user.id}, SECRET_KEY, algorithm=ALGORITHM)}
+    
+    def setUp(self):
+        cache.clear()
+    
+    def get_stats(self):
+        response = self.client.get('/user/stats', **self.header)
+        
+        self.assertEqual(response.status_code, 200)
+        
+        return response.json()['result']
+    
+    def rebuild(self):
+        call_command('rebuild_user_stats', stdout=MagicMock())
+    
+    def test_empty_stats(self):
+        
+        result = self.get_stats()
+        
+        self.assertEqual(result['review_count'], 0)
+        self.assertEqual(len(result['ratings']), 10)
+        self.assertEqual(result['genres'], [])
+        self.assertFalse(UserStats.objects.exists())
+        
+        response = self.client.get('/user/stats', {'limit': 'abc'}, **self.header)
+        
+        self.assertEqual((response.status_code, response.json()), (400, {'message': 'INVALID_LIMIT'}))
+    
+    def test_incremental_update_matches_rebuild(self):
+        data = {
+            'movie_id'     : 550,
+            'title'        : 'title',
+            'content'      : 'content',
+            'rating'       : 4.5,
+            'watched_date' : '2022-10-26 19:43:14',
+            'with_user'    : '',
+            'place'        : ['127.0', '37.5', 'CGV', 'http://cgv.co.kr'],
+        }
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post('/review', data=data, **self.header)
+        
+        self.assertEqual(response.status_code, 201)
+        
+        Review.objects.create(user=self.user, movie_id='999', title='title', content='content', rating=3.0, watched_date='2022-11-01')
+        
+        self.rebuild()
+        
+        rebuilt = self.get_stats()
+        review  = Review.objects.get(movie_id='999')
+        
+        self.assertEqual(rebuilt['review_count'], 2)
+        self.assertEqual(rebuilt['runtime'], 139)
+        self.assertEqual([rating for rating in rebuilt['ratings'] if rating['count']], [{'rating': 3.0, 'count': 1}, {'rating': 4.5, 'count': 1}])
+        self.assertEqual(rebuilt['months'], [{'month': '2022-10', 'count': 1}, {'month': '2022-11', 'count': 1}])
+        self.assertEqual(rebuilt['genres'], [{'id': 18, 'name': 'Drama', 'count': 1}])
+        self.assertEqual([place['name'] for place in rebuilt['places']], ['CGV'])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().put('/review', data={'review_id': review.id, 'rating': 2.5, 'watched_date': '2022-10-01 10:00:00'}, **self.header)
+        
+        self.assertEqual(response.status_code, 201)
+        
+        incremental = self.get_stats()
+        
+        self.rebuild()
+        
+        self.assertEqual(incremental, self.get_stats())
+        self.assertEqual(incremental['months'], [{'month': '2022-10', 'count': 2}])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/review/{Review.objects.get(movie_id="550").id}', **self.header)
+        
+        self.assertEqual(response.status_code, 204)
+        
+        incremental = self.get_stats()
+        
+        self.rebuild()
+        
+        self.assertEqual(incremental, self.get_stats())
+        self.assertEqual((incremental['review_count'], incremental['runtime'], incremental['genres'], incremental['places']), (1, 0, [], []))
+    
+    def test_rating_bucketed_to_half_point(self):
+        for movie_id, rating in [('13', '4.3'), ('550', '4.2'), ('680', '0.2')]:
+            Review.objects.create(user=self.user, movie_id=movie_id, title='title', content='content', rating=rating, watched_date='2022-10-26')
+        
+        with patch('core.tmdb.requests.get', side_effect=mock_tmdb_get_or_not_found):
+            self.rebuild()
+        
+        result = self.get_stats()
+        
+        self.assertEqual([rating for rating in result['ratings'] if rating['count']], [{'rating': 0.5, 'count': 1}, {'rating': 4.0, 'count': 1}, {'rating': 4.5, 'count': 1}])
+        self.assertEqual(sum(rating['count'] for rating in result['ratings']), result['review_count'])
+    
+    @patch('users.stats.schedule_rebuild')
+    @patch('users.stats.update', side_effect=RuntimeError('deadlock'))
+    def test_failed_update_schedules_rebuild(self, mocked_update, mocked_schedule):
+        
+        with self.assertLogs('users.stats', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            stats.on_commit(self.user.id, added=[{'movie_id': '550', 'rating': '4.5', 'month': '2022-10', 'places': []}])
+        
+        mocked_schedule.assert_called_once_with(self.user.id)
+    
+    @patch('users.stats.connections')
+    @patch('users.stats.rebuild_users', side_effect=RuntimeError('deadlock'))
+    def test_failed_rebuild_logged(self, mocked_rebuild, mocked_connections):
+        
+        with patch('users.stats.threading.Timer') as mocked_timer:
+            self.assertTrue(stats.schedule_rebuild(self.user.id))
+            self.assertFalse(stats.schedule_rebuild(self.user.id))
+        
+        mocked_timer.assert_called_once_with(60, stats._rebuild_in_background, args=(self.user.id,))
+        
+        with self.assertLogs('users.stats', 'ERROR'):
+            stats._rebuild_in_background(self.user.id)
+        
+        self.assertIsNone(cache.get(f'user_stats_rebuild:{self.user.id}'))
+        mocked_connections.close_all.assert_called_once_with()
+    
+    def test_stats_single_query(self):
+        UserStats.objects.create(user=self.user, review_count=1, ratings={'4.0': 1}, genres={'18': {'name': 'Drama', 'count': 1}})
+        
+        response = self.client.get('/user/stats', **self.header)
+        
+        self.assertEqual(response.json()['result']['genres'], [{'id': 18, 'name': 'Drama', 'count': 1}])
+        self.assertWithinBudget(response)
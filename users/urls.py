@@ -1,5 +1,6 @@
 from django.urls import path
 from users.views import KakaoLogIn, DeleteAccountView, KakaoLogInCallbackView, LoginBackGroundView, UserInformationView, UserProfileUpdateView, UserListView
+from users.views import CollectionListView, CollectionView, CollectionMovieView, UserStatsView
 from users.views import LoginNaverCallBackView #, LoginNaverView 
 
 urlpatterns = [
@@ -24,4 +25,16 @@ urlpatterns = [
     
     #user_list
     path('/list', UserListView.as_view()),
-]
\ No newline at end of file
+    
+    #user review stats
+    path('/stats', UserStatsView.as_view()),
+    
+    #collection list, create
+    path('/collections', CollectionListView.as_view()),
+    
+    #collection update, delete
+    path('/collections/<int:collection_id>', CollectionView.as_view()),
+    
+    #collection movies read, bulk add, bulk remove
+    path('/collections/<int:collection_id>/movies', CollectionMovieView.as_view()),
+]
@@ -1,18 +1,23 @@
-import requests, jwt, datetime, random
+import requests, jwt, datetime
 
+from asgiref.sync            import sync_to_async
+from django.db               import transaction
 from django.shortcuts        import redirect
 from django.views            import View
-from django.http             import JsonResponse
 from rest_framework.views    import APIView
 from rest_framework.response import Response
 
 
-from users.models     import User, SocialPlatform, Group, ProfileImage, SocialToken
-from reviews.models   import Review
-from adminpage.models import Image
-from core.utils       import login_decorator
-from core.tmdb        import tmdb_helper
-from my_settings      import AWS_S3_URL, SECRET_KEY, ALGORITHM, KAKAO_REST_API_KEY, NAVER_CLIENT_ID, NAVER_CLIENT_SECRET, TMDB_IMAGE_BASE_URL
+from users             import collections, stats
+from users.models      import User, SocialPlatform, Group, ProfileImage, SocialToken, Collection
+from reviews.models    import Review
+from adminpage.models  import Image
+from core.http         import JsonResponse
+from core.utils        import alogin_decorator, get_limit, login_decorator
+from core.views        import AsyncView, non_atomic_requests
+from movies.summaries  import ahydrate
+from users.backgrounds import get_login_background
+from my_settings       import AWS_S3_URL, SECRET_KEY, ALGORITHM, KAKAO_REST_API_KEY, NAVER_CLIENT_ID, NAVER_CLIENT_SECRET
 
 
 #* 카카오 신규유저 테스트
@@ -24,6 +29,7 @@ class KakaoLogIn(APIView):
         
         return redirect(f'{kakao_auth_api}&client_id={app_key}&redirect_uri={redirect_uri}')
 
+@non_atomic_requests
 class KakaoLogInCallbackView(APIView):
     def get(self, request):
         try:
@@ -84,21 +90,22 @@ class KakaoLogInCallbackView(APIView):
 
             #* 신규 유저가 로그인 할 때 (회원가입) 
             else:
-                user = User.objects.create(
-                    social_id       = social_id,
-                    nickname        = nickname,
-                    social_platform = SocialPlatform.objects.get(name='kakao'),
-                    group_id        = Group.objects.get(id=2).id,
-                )
-                
-                image = Image.objects.create(
-                    image_url = profile_image_url
-                )
+                with transaction.atomic(using='default'):
+                    user = User.objects.create(
+                        social_id       = social_id,
+                        nickname        = nickname,
+                        social_platform = SocialPlatform.objects.get(name='kakao'),
+                        group_id        = Group.objects.get(id=2).id,
+                    )
+                    
+                    image = Image.objects.create(
+                        image_url = profile_image_url
+                    )
 
-                ProfileImage.objects.create(
-                    user  = user,
-                    image = image
-                )
+                    ProfileImage.objects.create(
+                        user  = user,
+                        image = image
+                    )
                 
                 access_token  = jwt.encode({'id': user.id, 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=6)}, SECRET_KEY, ALGORITHM)
                 refresh_token = jwt.encode({'id': user.id, 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)}, SECRET_KEY, ALGORITHM)
@@ -120,6 +127,7 @@ class KakaoLogInCallbackView(APIView):
             return Response({'message': 'KEY_ERROR'}, status=400)
         
 #NaverLogin
+@non_atomic_requests
 class LoginNaverCallBackView(View):
     def get(self, request):
         token_api_uri = 'https://nid.naver.com/oauth2.0/token'
@@ -151,16 +159,17 @@ class LoginNaverCallBackView(View):
             user = User.objects.get(social_id=user_info['response']['id'])
             
         else:
-            user = User.objects.create(
-                social_id       = user_info['response']['id'],
-                nickname        = user_info['response']['name'],
-                email           = user_info['response'].get('email', None),
-                group           = Group.objects.get(id=2),
-                social_platform = SocialPlatform.objects.get(id=3)
-            )
-            
-            user_image    = Image.objects.create(image_url=user_info['response']['profile_image'])
-            profile_image = ProfileImage.objects.create(user_id=user.id, image_id=user_image.id)
+            with transaction.atomic(using='default'):
+                user = User.objects.create(
+                    social_id       = user_info['response']['id'],
+                    nickname        = user_info['response']['name'],
+                    email           = user_info['response'].get('email', None),
+                    group           = Group.objects.get(id=2),
+                    social_platform = SocialPlatform.objects.get(id=3)
+                )
+                
+                user_image    = Image.objects.create(image_url=user_info['response']['profile_image'])
+                profile_image = ProfileImage.objects.create(user_id=user.id, image_id=user_image.id)
             
         access_token = jwt.encode({'id':user.id, 
             'exp':datetime.datetime.utcnow()+datetime.timedelta(hours=6)}, SECRET_KEY, ALGORITHM)
@@ -274,30 +283,163 @@ class UserListView(APIView):
         
 #         return JsonResponse({'data': data}, status=200)
 
-#tmdb
-class LoginBackGroundView(APIView):
+class LoginBackGroundView(AsyncView):
+    async def get(self, request):
+        background = await sync_to_async(get_login_background)()
+        
+        data = {
+            'movie_id'    : background.movie_id,
+            'title'       : background.title,
+            'description' : background.description,
+            'image_url'   : background.image_url,
+        }
+        
+        return JsonResponse({'data': data}, status=200)
+
+def get_collection_data(collection, movie_count):
+    return {
+        'id'          : collection.id,
+        'name'        : collection.name,
+        'movie_count' : movie_count,
+        'created_at'  : collection.created_at,
+    }
+
+class CollectionListView(APIView):
+    @login_decorator
     def get(self, request):
-        random_num             = random.randrange(1,100)
+        try:
+            cursor, limit = collections.get_page_params(request.GET, collections.COLLECTION_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({'message': 'VALUE_ERROR'}, status=400)
         
-        image_data_request_url = tmdb_helper.get_request_url(method='/movie/'+str(random_num)+'/images')
-        image_data_raw_data    = requests.get(image_data_request_url)
-        image_data             = image_data_raw_data.json()
+        rows, next_cursor = collections.get_collections(request.user, cursor, limit)
+        result            = [get_collection_data(collection, collection.movie_count) for collection in rows]
         
-        while image_data.get('backdrops') == None or image_data.get('backdrops') == []:
-            random_num             += 101
-            image_data_request_url = tmdb_helper.get_request_url(method='/movie/'+str(random_num)+'/images')
-            image_data_raw_data    = requests.get(image_data_request_url)
-            image_data             = image_data_raw_data.json()
+        return JsonResponse({'message': 'SUCCESS', 'result': result, 'next_cursor': next_cursor}, status=200)
+    
+    @login_decorator
+    def post(self, request):
+        try:
+            data      = collections.load_body(request.body)
+            name      = data['name']
+            movie_ids = collections.clean_movie_ids(data.get('movie_ids', []))
+        except KeyError:
+            return JsonResponse({'message': 'KEY_ERROR'}, status=400)
+        except ValueError:
+            return JsonResponse({'message': 'VALUE_ERROR'}, status=400)
         
-        movie_data_request_url = tmdb_helper.get_request_url(method='/movie/'+str(random_num), region='KR', language='ko')
-        movie_data_raw_data    = requests.get(movie_data_request_url)
-        movie_data             = movie_data_raw_data.json()
+        try:
+            name = collections.clean_name(name)
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_NAME'}, status=400)
         
-        data = {
-            'movie_id'    : random_num,
-            'title'       : movie_data.get('title'),
-            'description' : movie_data.get('overview'),
-            'image_url'   : TMDB_IMAGE_BASE_URL+image_data.get('backdrops')[0].get('file_path'),
-        }
+        collection = collections.create_collection(request.user, name, movie_ids)
+        
+        return JsonResponse({'message': 'CREATED', 'result': get_collection_data(collection, len(movie_ids))}, status=201)
+
+class CollectionView(APIView):
+    @login_decorator
+    def patch(self, request, collection_id):
+        collection = collections.get_collection(request.user, collection_id)
+        
+        if collection is None:
+            return JsonResponse({'message': 'COLLECTION_NOT_FOUND'}, status=404)
+        
+        try:
+            name = collections.load_body(request.body)['name']
+        except KeyError:
+            return JsonResponse({'message': 'KEY_ERROR'}, status=400)
+        except ValueError:
+            return JsonResponse({'message': 'VALUE_ERROR'}, status=400)
+        
+        try:
+            collection.name = collections.clean_name(name)
+        except ValueError:
+            return JsonResponse({'message': 'INVALID_NAME'}, status=400)
+        
+        collection.save(update_fields=['name', 'updated_at'])
+        
+        return JsonResponse({'message': 'SUCCESS'}, status=200)
+    
+    @login_decorator
+    def delete(self, request, collection_id):
+        deleted, _ = Collection.objects.filter(id=collection_id, user=request.user).delete()
+        
+        if not deleted:
+            return JsonResponse({'message': 'COLLECTION_NOT_FOUND'}, status=404)
+        
+        return JsonResponse({'message': 'DELETE_SUCCESS'}, status=204)
+
+class CollectionMovieView(AsyncView):
+    """컬렉션의 영화 목록 조회와 일괄 추가, 삭제
+
+    영화 정보는 페이지의 영화 id로 요약 정보 캐시를 한 번에 조회하고, 캐시에 없는 영화만 TMDB에 동시에 요청합니다.
+    추가, 삭제는 요청 본문(JSON)의 movie_ids 목록을 한 번의 bulk 쿼리로 처리합니다.
+    """
+    
+    @alogin_decorator
+    async def get(self, request, collection_id):
+        try:
+            cursor, limit = collections.get_page_params(request.GET, collections.COLLECTION_MOVIE_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({'message': 'VALUE_ERROR'}, status=400)
+        
+        collection = await sync_to_async(collections.get_collection)(request.user, collection_id)
+        
+        if collection is None:
+            return JsonResponse({'message': 'COLLECTION_NOT_FOUND'}, status=404)
+        
+        rows, next_cursor = await sync_to_async(collections.get_collection_movies)(collection, cursor, limit)
+        result            = await ahydrate([{'id': int(row.movie_id)} for row in rows])
+        
+        return JsonResponse({
+            'message'     : 'SUCCESS',
+            'collection'  : {'id': collection.id, 'name': collection.name},
+            'result'      : result,
+            'next_cursor' : next_cursor,
+        }, status=200)
+    
+    @alogin_decorator
+    async def post(self, request, collection_id):
+        return await self.update_movies(request, collection_id, collections.add_movies, 'added')
+    
+    @alogin_decorator
+    async def delete(self, request, collection_id):
+        return await self.update_movies(request, collection_id, collections.remove_movies, 'removed')
+    
+    async def update_movies(self, request, collection_id, update, count_name):
+        try:
+            movie_ids = collections.clean_movie_ids(collections.load_body(request.body)['movie_ids'])
+        except KeyError:
+            return JsonResponse({'message': 'KEY_ERROR'}, status=400)
+        except ValueError:
+            return JsonResponse({'message': 'VALUE_ERROR'}, status=400)
+        
+        collection = await sync_to_async(collections.get_collection)(request.user, collection_id)
+        
+        if collection is None:
+            return JsonResponse({'message': 'COLLECTION_NOT_FOUND'}, status=404)
+        
+        count = await sync_to_async(update)(collection, movie_ids)
+        
+        return JsonResponse({'message': 'SUCCESS', count_name: count}, status=200)
+
+def get_stats_data(user_stats, limit):
+    return {
+        'review_count' : user_stats.review_count,
+        'runtime'      : user_stats.runtime,
+        'ratings'      : [{'rating': float(rating), 'count': user_stats.ratings.get(rating, 0)} for rating in stats.RATING_BUCKETS],
+        'months'       : [{'month': month, 'count': count} for month, count in sorted(user_stats.months.items())],
+        'genres'       : stats.get_top(user_stats.genres, limit),
+        'places'       : stats.get_top(user_stats.places, limit),
+    }
+
+class UserStatsView(APIView):
+    @login_decorator
+    def get(self, request):
+        try:
+            limit = get_limit(request.GET, 5, 20)
+        except ValueError:
+            return JsonResponse({'message' : 'INVALID_LIMIT'}, status=400)
         
-        return JsonResponse({'data': data}, status=200)
\ No newline at end of file
+        return JsonResponse({'message' : 'SUCCESS', 'result' : get_stats_data(stats.get_user_stats(request.user), limit)}, status=200)